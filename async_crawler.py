@@ -0,0 +1,207 @@
+"""
+Concurrent website checker for RSS feeds and news sections, built on httpx.
+
+Many companies are checked at once, bounded by a global concurrency limit,
+while a crawl_scheduler.CrawlScheduler keeps us polite towards any single
+web server.
+"""
+
+import asyncio
+from contextlib import nullcontext
+from urllib.parse import urlparse
+
+import metrics
+from config import Config
+from crawl_scheduler import CrawlScheduler
+from http_client import arequest
+from http_cache import acached_get
+from html_scan import scan_page
+from sitemap_scan import discover_news
+from check_rss_news import (
+    COMMON_FEED_PATHS,
+    is_feed_content_type,
+    normalize_url,
+)
+
+
+async def probe_feed_path_async(test_url, limiter=None):
+    """
+    HEAD a candidate feed URL; return it if it answers with a feed content type.
+    With a limiter the probe takes its own slot, and the response is recorded
+    so throttling and errors reach the adaptive delay and circuit breaker.
+    """
+    try:
+        async with limiter.slot(test_url) if limiter is not None else nullcontext() as ticket:
+            response = await arequest('HEAD', test_url, retries=0, timeout=5, follow_redirects=True)
+            if ticket is not None:
+                ticket.record(response)
+        if response.status_code == 200:
+            if is_feed_content_type(response.headers.get('content-type')):
+                return test_url
+    except Exception:
+        pass
+    return None
+
+
+async def first_feed(test_urls, limiter=None):
+    """
+    Probe all candidate paths concurrently (as far as the limiter's per-host
+    slots allow) and return the first valid feed. The remaining probes,
+    including those still waiting for a slot, are cancelled as soon as one
+    answers.
+    """
+    tasks = [asyncio.create_task(probe_feed_path_async(test_url, limiter)) for test_url in test_urls]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            feed_url = await next_done
+            if feed_url:
+                return feed_url
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def resolve_rss_feed_async(url, rss_feeds, limiter, probe_mode=None):
+    """
+    Pick the feed for a page from its <link> feeds, probing the common feed
+    paths as probe_mode says (default: Config.RSS_PROBE_MODE):
+    - 'fallback': only probe when the page links no feed; probes run
+      concurrently up to the per-host limit and the first valid feed wins
+    - 'always': probe every path one after another
+    - 'never': rely on <link> tags only
+    Every probe is a request of its own under the limiter.
+    """
+    probe_mode = probe_mode or Config.RSS_PROBE_MODE
+    rss_feeds = list(rss_feeds)
+
+    if probe_mode == 'never' or (probe_mode == 'fallback' and rss_feeds):
+        return rss_feeds[0] if rss_feeds else None
+
+    base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
+    test_urls = [base_url + path for path in COMMON_FEED_PATHS]
+    test_urls = [test_url for test_url in test_urls if await limiter.allowed(test_url)]
+    if not test_urls:
+        return rss_feeds[0] if rss_feeds else None
+
+    # Probes never raise: one refused by the scheduler (open circuit) finds nothing
+    if probe_mode == 'always':
+        for test_url in test_urls:
+            feed_url = await probe_feed_path_async(test_url, limiter)
+            if feed_url:
+                rss_feeds.append(feed_url)
+    else:
+        feed_url = await first_feed(test_urls, limiter)
+        if feed_url:
+            rss_feeds.append(feed_url)
+
+    return rss_feeds[0] if rss_feeds else None
+
+
+async def find_news_section_async(url, news_url, limiter, sitemap_mode=None):
+    """
+    News section from the site's sitemaps, depending on SITEMAP_MODE:
+    'fallback' only when the homepage links to none, 'always' preferring
+    the freshest sitemap section, 'never' keeping the homepage result.
+    """
+    sitemap_mode = sitemap_mode or Config.SITEMAP_MODE
+    if sitemap_mode == 'never' or (sitemap_mode == 'fallback' and news_url):
+        return news_url
+    with metrics.timed('sitemaps'):
+        found = await discover_news(url, limiter)
+    return found['news_url'] or news_url
+
+
+async def check_website_async(url, limiter, cache=None, recheck_days=None):
+    """
+    Check a website for RSS feed and news section.
+    With a cache, sites checked within recheck_days are answered from it
+    and the homepage GET is revalidated conditionally.
+    Returns: (rss_url, news_url, error)
+    """
+    url = normalize_url(url)
+    if not url:
+        return None, None, None
+
+    if cache is not None:
+        cached = cache.get_probe(url, recheck_days)
+        if cached is not None:
+            return cached[0], cached[1], None
+
+    try:
+        async with limiter.slot(url) as ticket:
+            with metrics.timed('homepage'):
+                if cache is not None:
+                    response = await acached_get(url, cache, timeout=10, follow_redirects=True,
+                                                  max_bytes=Config.PAGE_MAX_BYTES, html_only=True)
+                else:
+                    response = await arequest('GET', url, timeout=10, follow_redirects=True,
+                                              max_bytes=Config.PAGE_MAX_BYTES, html_only=True)
+            ticket.record(response)
+        response.raise_for_status()
+
+        with metrics.timed('html_parse'):
+            feed_links, news_url = scan_page(url, response.content, response.encoding)
+        with metrics.timed('feed_probe'):
+            rss_url = await resolve_rss_feed_async(url, feed_links, limiter)
+        news_url = await find_news_section_async(url, news_url, limiter)
+
+        if cache is not None:
+            cache.store_probe(url, rss_url, news_url)
+
+        return rss_url, news_url, None
+
+    except Exception as e:
+        return None, None, str(e) or type(e).__name__
+
+
+async def check_companies(companies, concurrency=None, per_host=None, host_delay=None,
+                         cache=None, recheck_days=None, on_result=None, respect_robots=None):
+    """
+    Check many company websites concurrently.
+
+    `companies` is an iterable of (key, company_name, webpage) tuples.
+    Pass an http_cache.HTTPCache to reuse earlier results and responses
+    (robots.txt files included). host_delay is each domain's starting delay;
+    the scheduler adapts it to how the site responds.
+    on_result(key, company, webpage, rss_url, news_url, error) is called as
+    soon as each company finishes, e.g. to checkpoint it.
+    Returns a dict mapping key -> (rss_url, news_url).
+    """
+    concurrency = concurrency or Config.CRAWL_CONCURRENCY
+    per_host = per_host or Config.CRAWL_PER_HOST_LIMIT
+    host_delay = Config.CRAWL_HOST_DELAY if host_delay is None else host_delay
+
+    companies = list(companies)
+    limiter = CrawlScheduler(max_per_host=per_host, delay=host_delay, respect_robots=respect_robots, cache=cache)
+    semaphore = asyncio.Semaphore(concurrency)
+    results = {}
+    done = 0
+
+    async def worker(key, company, webpage):
+        nonlocal done
+        async with semaphore:
+            rss_url, news_url, error = await check_website_async(webpage, limiter, cache, recheck_days)
+        results[key] = (rss_url, news_url)
+        done += 1
+        if on_result is not None:
+            on_result(key, company, webpage, rss_url, news_url, error)
+
+        print(f"\n[{done}/{len(companies)}] {company}")
+        if error:
+            print(f"    Error: {error}")
+        else:
+            print(f"    RSS: {rss_url if rss_url else 'Not found'}")
+            print(f"    News: {news_url if news_url else 'Not found'}")
+
+    try:
+        await asyncio.gather(*(worker(*company) for company in companies))
+    finally:
+        await limiter.aclose()
+
+    stats = limiter.stats()
+    print(f"\n🚦 Scheduler: {stats['requests']} requests to {stats['domains']} domains, "
+          f"{stats['throttled']} throttled, {stats['disallowed']} blocked by robots.txt, "
+          f"{len(stats['open_circuits'])} failing domains skipped")
+    return results
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark for formatted Excel exports.
+Compares the original to_excel() + load_workbook() + cell-by-cell
+formatting cycle with excel_writer.write_formatted_excel() on every
+installed engine, using a synthetic companies sheet.
+
+Usage: python bench_excel_writer.py [--rows 50000] [--memory]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.styles import Alignment, Font
+from openpyxl.utils import get_column_letter
+
+from excel_writer import COLUMN_WIDTHS, ENGINES, engine_installed, write_formatted_excel
+
+
+def build_frame(rows):
+    """A companies sheet with wrapped text and URL columns"""
+    return pd.DataFrame({
+        'Company': [f"Example Bioplastics {i}" for i in range(rows)],
+        'Type': ['Producer' if i % 3 else 'Converter' for i in range(rows)],
+        'Country': ['Germany' if i % 2 else 'Japan' for i in range(rows)],
+        'Webpage': [f"www.example-bioplastics-{i}.com" for i in range(rows)],
+        'Description': [f"Company {i} develops PLA and PHA compounds for packaging. " * 3 for i in range(rows)],
+        'Primary Materials': ['PLA, PHA, PBS' for _ in range(rows)],
+        'Market Segments': ['Packaging, Agriculture, Textiles' for _ in range(rows)],
+        'Status': ['Active' for _ in range(rows)],
+        'RSS Feed URL': [f"https://www.example-bioplastics-{i}.com/feed" if i % 4 == 0 else None
+                         for i in range(rows)],
+        'News Section URL': [f"https://www.example-bioplastics-{i}.com/news" if i % 2 == 0 else None
+                             for i in range(rows)],
+    })
+
+
+def legacy_export(df, filename):
+    """The original two-pass export (to_excel, then an openpyxl formatting pass)"""
+    df.to_excel(filename, index=False, engine='openpyxl')
+    wb = load_workbook(filename)
+    ws = wb.active
+    headers = [cell.value for cell in ws[1]]
+
+    for idx, header in enumerate(headers, 1):
+        col_letter = get_column_letter(idx)
+        if header in COLUMN_WIDTHS:
+            ws.column_dimensions[col_letter].width = COLUMN_WIDTHS[header]
+        if header in ['Description', 'Primary Materials', 'Market Segments', 'Headline']:
+            for row in range(2, ws.max_row + 1):
+                ws[f'{col_letter}{row}'].alignment = Alignment(wrap_text=True, vertical='top')
+
+    for col_name in ['Webpage', 'RSS Feed URL', 'News Section URL']:
+        if col_name in headers:
+            col_letter = get_column_letter(headers.index(col_name) + 1)
+            for row in range(2, ws.max_row + 1):
+                cell = ws[f'{col_letter}{row}']
+                if cell.value and str(cell.value).strip():
+                    url = str(cell.value).strip()
+                    if not url.startswith(('http://', 'https://')):
+                        url = 'https://' + url
+                    cell.hyperlink = url
+                    cell.font = Font(color="0563C1", underline="single")
+
+    wb.save(filename)
+
+
+def bench(label, func, filename, memory):
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    func(filename)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if memory else None
+    if memory:
+        tracemalloc.stop()
+    return label, elapsed, peak, os.path.getsize(filename)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=50000, help="Rows in the synthetic sheet")
+    parser.add_argument('--memory', action='store_true', help="Also report peak Python memory (slower)")
+    args = parser.parse_args()
+
+    df = build_frame(args.rows)
+    print(f"Sheet: {len(df)} rows x {len(df.columns)} columns\n")
+
+    variants = [('to_excel + openpyxl formatting pass (original)', lambda f: legacy_export(df, f))]
+    for engine in ENGINES:
+        if not engine_installed(engine):
+            print(f"  (skipping {engine}: not installed)")
+            continue
+        variants.append((f'write_formatted_excel engine={engine}',
+                         lambda f, engine=engine: write_formatted_excel(df, f, engine)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = [bench(label, func, os.path.join(tmp, f"bench{i}.xlsx"), args.memory)
+                for i, (label, func) in enumerate(variants)]
+
+    base_time = runs[0][1]
+    print(f"{'Variant':<45} {'seconds':>8} {'speedup':>8} {'peak MB':>8} {'file MB':>8}")
+    print("-" * 81)
+    for label, elapsed, peak, size in runs:
+        peak_text = f"{peak / 1024 / 1024:>8.0f}" if peak is not None else f"{'-':>8}"
+        print(f"{label:<45} {elapsed:>8.2f} {base_time / elapsed:>7.1f}x {peak_text} {size / 1024 / 1024:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
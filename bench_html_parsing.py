@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for homepage discovery parsing.
+Compares the original BeautifulSoup path (find_feed_links + find_news_section)
+with html_scan.scan_page() on every installed parser backend, using a
+synthetic heavy corporate homepage.
+
+Usage: python bench_html_parsing.py [--links 3000] [--repeat 20]
+"""
+
+import argparse
+import time
+
+from bs4 import BeautifulSoup
+
+from check_rss_news import find_feed_links, find_news_section
+from html_scan import BACKENDS, scan_page, backend_installed
+
+URL = 'https://www.example-bioplastics.com/'
+
+
+def build_page(links):
+    """A large homepage: big <head>, mega-menu navigation, long footer"""
+    head = ['<head><title>Example Bioplastics</title>']
+    head += [f'<meta name="m{i}" content="{"x" * 40}">' for i in range(200)]
+    head += [f'<link rel="stylesheet" href="/static/css/style{i}.css">' for i in range(40)]
+    head.append('<link rel="alternate" type="application/rss+xml" href="/feed.xml">')
+    head += [f'<script>var config{i} = {{"key": "{"v" * 200}"}};</script>' for i in range(30)]
+    head.append('</head>')
+
+    body = ['<body><nav><ul>']
+    for i in range(links):
+        if i % 500 == 250:
+            body.append(f'<li><a href="/company/newsroom/">Newsroom</a></li>')
+        elif i % 97 == 0:
+            body.append(f'<li><a href="/2024/{i}/article-{i}">Press release {i}</a></li>')
+        else:
+            body.append(f'<li><a href="/products/category-{i % 40}/item-{i}">'
+                        f'<span>Product {i}</span> <em>Polylactic acid grade {i}</em></a></li>')
+    body.append('</ul></nav>')
+    body += [f'<p>{"Lorem ipsum dolor sit amet. " * 20}</p>' for _ in range(links // 10)]
+    body.append('</body>')
+    return ('<!DOCTYPE html><html>' + ''.join(head) + ''.join(body) + '</html>').encode('utf-8')
+
+
+def bench(label, func, repeat):
+    func()  # Warm-up and result check
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    return label, elapsed, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--links', type=int, default=3000, help="Number of <a> links on the page")
+    parser.add_argument('--repeat', type=int, default=20, help="Iterations per measurement")
+    args = parser.parse_args()
+
+    page = build_page(args.links)
+    print(f"Page size: {len(page) / 1024:.0f} KB, {args.links} links\n")
+
+    def baseline():
+        soup = BeautifulSoup(page, 'html.parser')
+        return find_feed_links(URL, soup), find_news_section(URL, soup)
+
+    runs = [bench('BeautifulSoup html.parser (original)', baseline, args.repeat)]
+    for backend in BACKENDS:
+        if not backend_installed(backend):
+            print(f"  (skipping {backend}: not installed)")
+            continue
+        runs.append(bench(f'scan_page backend={backend}',
+                          lambda backend=backend: scan_page(URL, page, 'utf-8', backend), args.repeat))
+
+    base_time, base_result = runs[0][1], runs[0][2]
+    print(f"{'Variant':<40} {'ms/page':>10} {'speedup':>9}  same result")
+    print("-" * 75)
+    for label, elapsed, result in runs:
+        print(f"{label:<40} {elapsed * 1000:>10.2f} {base_time / elapsed:>8.1f}x  "
+              f"{'yes' if result == base_result else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the discovery and news pipelines.
+
+Every stage runs against local stand-ins, so no company site or paid API
+is touched: fake_web.py serves the company sites (feeds, redirects, large
+pages, slow hosts, 429s, dead hosts) and fake_perplexity.py the
+chat/completions endpoint (latency, periodic 429s).
+
+- discovery: check_website_async() per company under one CrawlScheduler
+- fetch:     fetch_company_news() per company under the API rate limiter
+- dedup:     NewsStore.add_news() per company, with syndicated copies and
+             tracking-parameter URL variants mixed in
+- excel:     NewsStore.export_news() of everything stored
+
+For each company count it reports throughput and p50/p99 latency per
+company (per export for excel). --save keeps the results as a baseline,
+--compare flags stages that got slower than a saved baseline.
+
+Usage: python bench_pipeline.py [--sizes 100,1000,10000] [--stages discovery,fetch,dedup,excel]
+                                [--save baseline.json | --compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import fake_perplexity
+import fake_web
+from config import Config
+from http_client import run_async
+
+STAGES = ('discovery', 'fetch', 'dedup', 'excel')
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(share * len(values)))] if values else 0.0
+
+
+def summarize(stage, size, units, elapsed, latencies, **extra):
+    return {'stage': stage, 'size': size, 'units': units, 'seconds': round(elapsed, 3),
+            'throughput': round(units / elapsed, 2) if elapsed else 0.0,
+            'p50': round(percentile(latencies, 0.50), 5), 'p99': round(percentile(latencies, 0.99), 5), **extra}
+
+
+async def timed_all(items, func, concurrency):
+    """Await func(item) for every item, at most `concurrency` at once; returns (results, latencies)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(item):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                return await func(item)
+            except Exception as e:
+                return e
+            finally:
+                latencies.append(time.perf_counter() - started)
+
+    return await asyncio.gather(*(one(item) for item in items)), latencies
+
+
+def bench_discovery(size, args):
+    from async_crawler import check_website_async
+    from crawl_scheduler import CrawlScheduler
+
+    urls = [f"http://{fake_web.company_domain(i)}/" for i in range(size)]
+
+    async def run():
+        limiter = CrawlScheduler(delay=args.host_delay, min_delay=args.host_delay)
+        try:
+            return await timed_all(urls, lambda url: check_website_async(url, limiter), args.concurrency)
+        finally:
+            await limiter.aclose()
+
+    started = time.perf_counter()
+    results, latencies = run_async(run())
+    elapsed = time.perf_counter() - started
+    ok = [result for result in results if isinstance(result, tuple)]
+    return summarize('discovery', size, size, elapsed, latencies,
+                     feeds=sum(1 for rss, _, _ in ok if rss), news=sum(1 for _, news, _ in ok if news),
+                     errors=sum(1 for _, _, error in ok if error) + len(results) - len(ok))
+
+
+def bench_fetch(size, args):
+    from news_fetcher import fetch_company_news
+    from rate_limiter import RateLimitScheduler
+
+    companies = [fake_web.company_name(i) for i in range(size)]
+
+    async def run():
+        scheduler = RateLimitScheduler(rpm=None)  # Measure the client, not the account quota
+        return await timed_all(companies, lambda company: fetch_company_news(company, scheduler),
+                               args.llm_concurrency)
+
+    started = time.perf_counter()
+    results, latencies = run_async(run())
+    elapsed = time.perf_counter() - started
+    items = [item for result in results if isinstance(result, tuple) for item in result[0]]
+    errors = sum(1 for result in results if not isinstance(result, tuple))
+    return summarize('fetch', size, size, elapsed, latencies, items=len(items), errors=errors), items
+
+
+def with_duplicates(items):
+    """Items plus syndicated copies (same text, other site) and tracking-parameter URL variants"""
+    mixed = []
+    for n, item in enumerate(items):
+        mixed.append(item)
+        if n % 5 == 0:
+            mixed.append(dict(item, url=f"https://syndication.example/wire/{n}"))
+        if n % 10 == 1:
+            mixed.append(dict(item, url=f"{item['url']}?utm_source=newsletter&utm_medium=email"))
+    return mixed
+
+
+def bench_dedup(size, items, store_path):
+    import pandas as pd
+    from news_store import NewsStore
+
+    companies = [fake_web.company_name(i) for i in range(size)]
+    if items is None:
+        items = [item for company in companies for item in fake_perplexity.generate_items(company)]
+    by_company = {}
+    for item in with_duplicates(items):
+        by_company.setdefault(item['company'], []).append(item)
+
+    with NewsStore(path=store_path, import_workbooks=False) as store:
+        store.save_companies(pd.DataFrame({'Company': companies}))
+        latencies = []
+        started = time.perf_counter()
+        for group in by_company.values():
+            group_started = time.perf_counter()
+            store.add_news(group)
+            latencies.append(time.perf_counter() - group_started)
+        elapsed = time.perf_counter() - started
+        return summarize('dedup', size, len(companies), elapsed, latencies, items=sum(map(len, by_company.values())),
+                         added=store.count_news(), duplicate_url=store.skipped['url'],
+                         near_duplicate=store.skipped['near_duplicate'])
+
+
+def bench_excel(size, store_path, tmp, repeat):
+    from news_store import NewsStore
+
+    with NewsStore(path=store_path, import_workbooks=False) as store:
+        rows = store.count_news()
+        latencies = []
+        for n in range(repeat):
+            started = time.perf_counter()
+            store.export_news(str(Path(tmp) / f"news-{size}-{n}.xlsx"))
+            latencies.append(time.perf_counter() - started)
+    return summarize('excel', size, repeat, sum(latencies), latencies, rows=rows,
+                     rows_per_second=round(rows * repeat / sum(latencies), 1))
+
+
+def print_result(result):
+    extra = ', '.join(f"{key}={value}" for key, value in result.items()
+                      if key not in ('stage', 'size', 'units', 'seconds', 'throughput', 'p50', 'p99'))
+    print(f"{result['stage']:<10} {result['size']:>7} {result['seconds']:>9.2f} {result['throughput']:>10.1f}/s "
+          f"{result['p50'] * 1000:>9.1f} {result['p99'] * 1000:>9.1f}   {extra}")
+
+
+def compare(results, baseline, tolerance):
+    """Print changes against a baseline; returns the number of regressions"""
+    base = {(r['stage'], r['size']): r for r in baseline['results']}
+    regressions = 0
+    print(f"\nCompared with baseline (tolerance {tolerance:.0%}):")
+    for result in results:
+        old = base.get((result['stage'], result['size']))
+        if old is None:
+            continue
+        slower_p99 = old['p99'] and result['p99'] > old['p99'] * (1 + tolerance)
+        lower_throughput = result['throughput'] < old['throughput'] * (1 - tolerance)
+        flag = '❌ regression' if slower_p99 or lower_throughput else '✅'
+        regressions += flag != '✅'
+        print(f"  {result['stage']:<10} {result['size']:>7}  throughput {old['throughput']:>9.1f} -> "
+              f"{result['throughput']:>9.1f}/s   p99 {old['p99'] * 1000:>8.1f} -> {result['p99'] * 1000:>8.1f}ms  {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='100,1000,10000', help="Comma-separated company counts")
+    parser.add_argument('--stages', default=','.join(STAGES), help=f"Comma-separated subset of {', '.join(STAGES)}")
+    parser.add_argument('--concurrency', type=int, default=Config.CRAWL_CONCURRENCY, help="Sites checked at once")
+    parser.add_argument('--host-delay', type=float, default=0.0,
+                        help="Crawl delay per domain (default 0: measure processing, not politeness)")
+    parser.add_argument('--slow-latency', type=float, default=0.5, help="Response delay of slow fake hosts")
+    parser.add_argument('--llm-concurrency', type=int, default=Config.NEWS_FETCH_CONCURRENCY,
+                        help="API calls in flight")
+    parser.add_argument('--llm-latency', type=float, default=0.05, help="Fake API seconds before the first byte")
+    parser.add_argument('--rate-limit-every', type=int, default=100, help="Fake API answers every Nth call with 429")
+    parser.add_argument('--retry-after', type=float, default=0.1, help="Retry-After seconds of fake 429s")
+    parser.add_argument('--excel-repeat', type=int, default=3, help="Exports per size")
+    parser.add_argument('--save', type=Path, help="Write the results as a baseline JSON")
+    parser.add_argument('--compare', type=Path, help="Compare with a baseline JSON; exit 1 on regressions")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown before flagging")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    stages = [stage.strip() for stage in args.stages.split(',')]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    web, proxy_url = fake_web.start_in_thread(slow_latency=args.slow_latency, retry_after=args.retry_after)
+    api, api_url = fake_perplexity.start_in_thread(latency=args.llm_latency, rate_limit_every=args.rate_limit_every,
+                                                   retry_after=args.retry_after)
+    # The fake sites are reached through fake_web as HTTP proxy; the fake API directly
+    os.environ['HTTP_PROXY'] = os.environ['http_proxy'] = proxy_url
+    os.environ['NO_PROXY'] = os.environ['no_proxy'] = '127.0.0.1,localhost'
+    Config.PERPLEXITY_API_URL = api_url
+    Config.PERPLEXITY_API_KEY = Config.PERPLEXITY_API_KEY or 'offline-benchmark'
+
+    print(f"Fake sites via {proxy_url}, fake API at {api_url}\n")
+    print(f"{'stage':<10} {'size':>7} {'seconds':>9} {'throughput':>12} {'p50 ms':>9} {'p99 ms':>9}")
+    print("-" * 62)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            items = None
+            store_path = Path(tmp) / f"bench-{size}.sqlite"
+            for stage in STAGES:
+                if stage not in stages and not (stage == 'dedup' and 'excel' in stages):
+                    continue
+                if stage == 'discovery':
+                    result = bench_discovery(size, args)
+                elif stage == 'fetch':
+                    result, items = bench_fetch(size, args)
+                elif stage == 'dedup':
+                    result = bench_dedup(size, items, store_path)
+                    if stage not in stages:
+                        continue  # Only needed to fill the store for the export
+                else:
+                    result = bench_excel(size, store_path, tmp, args.excel_repeat)
+                results.append(result)
+                print_result(result)
+
+    web.shutdown()
+    api.shutdown()
+
+    if args.save:
+        args.save.write_text(json.dumps({'results': results}, indent=2), encoding='utf-8')
+        print(f"\n💾 Baseline saved to {args.save}")
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text(encoding='utf-8')), args.tolerance)
+        if regressions:
+            print(f"\n❌ {regressions} regressions")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the CLI entry points.
+
+Runs each quick command in a fresh interpreter, --repeat times, and
+reports the median wall time plus the import time measured by
+`python -X importtime`, with the heaviest top-level imports. Quick
+commands (cli.py config, --help of every tool) should not pay for pandas,
+numpy or openpyxl; --max-ms turns the report into a check that fails
+when a command gets slower.
+
+Usage: python bench_startup.py [--repeat 5] [--top 3] [--max-ms 150]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+CLI = str(HERE / 'cli.py')
+
+COMMANDS = [
+    ('cli.py config', [CLI, 'config']),
+    ('cli.py discover --help', [CLI, 'discover', '--help']),
+    ('cli.py fetch --help', [CLI, 'fetch', '--help']),
+    ('cli.py export --help', [CLI, 'export', '--help']),
+    ('cli.py export hugo --help', [CLI, 'export', 'hugo', '--help']),
+    ('import check_rss_news', ['-c', 'import check_rss_news']),
+    ('import async_crawler', ['-c', 'import async_crawler']),
+]
+
+
+def parse_importtime(stderr):
+    """Top-level imports as [(cumulative_us, module)] from -X importtime output"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name[1:].startswith(' '):  # Nested imports are indented
+            modules.append((int(cumulative), name.strip()))
+    return modules
+
+
+def run(args, importtime=False):
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + args
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=HERE, capture_output=True, text=True)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time of the CLI entry points")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per command (median wall time)")
+    parser.add_argument('--top', type=int, default=3, help="Heaviest top-level imports shown per command")
+    parser.add_argument('--max-ms', type=float, help="Exit 1 if a cli.py command's median exceeds this")
+    args = parser.parse_args()
+
+    baseline = statistics.median(run(['-c', 'pass'])[0] for _ in range(args.repeat))
+    print(f"Interpreter startup: {baseline * 1000:.1f} ms (median of {args.repeat})\n")
+    print(f"{'command':<28} {'wall ms':>9} {'imports ms':>11}   heaviest imports")
+    print("-" * 90)
+
+    too_slow = []
+    for label, command in COMMANDS:
+        wall = statistics.median(run(command)[0] for _ in range(args.repeat))
+        _, result = run(command, importtime=True)
+        if result.returncode not in (0, 1):
+            print(f"{label:<28} failed: {result.stderr.strip().splitlines()[-1]}")
+            continue
+        modules = parse_importtime(result.stderr)
+        heaviest = sorted(modules, reverse=True)[:args.top]
+        print(f"{label:<28} {wall * 1000:>9.1f} {sum(us for us, _ in modules) / 1000:>11.1f}   "
+              + ', '.join(f"{name} {us / 1000:.0f}" for us, name in heaviest))
+        if args.max_ms and label.startswith('cli.py') and wall * 1000 > args.max_ms:
+            too_slow.append(label)
+
+    if too_slow:
+        print(f"\n❌ Slower than {args.max_ms:.0f} ms: {', '.join(too_slow)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,75 +1,70 @@
 #!/usr/bin/env python3
 """
 Check company websites for RSS feeds and news sections.
-Adds two new columns to companies.xlsx:
+Adds two new columns to the companies database (news_store.py):
 - RSS Feed URL
 - News Section URL
+--export regenerates companies.xlsx from it; --url checks single websites
+without touching the database; --shards N splits large company lists by
+domain over N worker processes (see discovery_shards.py).
+
+pandas and the Excel writer are imported only by the functions that use
+them, so quick checks start fast.
 """
 
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
+import argparse
 from urllib.parse import urljoin, urlparse
-import time
 import re
-from openpyxl import load_workbook
-from openpyxl.styles import Font, Alignment
-from openpyxl.utils import get_column_letter
+import metrics
+from config import Config
+from http_client import run_async
+
+# Paths probed for a feed when the page has no <link> tag pointing to one
+COMMON_FEED_PATHS = [
+    '/feed',
+    '/rss',
+    '/blog/feed',
+    '/news/feed',
+    '/feed/',
+    '/rss/',
+    '/atom.xml',
+    '/rss.xml',
+    '/feed.xml'
+]
+
+FEED_LINK_TYPE = re.compile(r'application/(rss|atom)\+xml', re.I)
+
+def is_missing(value):
+    """None, NaN, NaT or pd.NA (an empty workbook cell), without importing pandas"""
+    if value is None:
+        return True
+    try:
+        return bool(value != value)  # NaN and NaT are not equal to themselves
+    except TypeError:  # pd.NA has no truth value
+        return True
 
 def normalize_url(url):
     """Add https:// if missing"""
-    if not url or pd.isna(url):
+    if is_missing(url) or not url:
         return None
     url = str(url).strip()
     if not url.startswith(('http://', 'https://')):
         url = 'https://' + url
     return url
 
-def find_rss_feed(url, soup, session):
-    """
-    Find RSS feed URLs on the page.
-    Checks:
-    1. <link> tags with type="application/rss+xml"
-    2. Common RSS feed paths
-    """
-    rss_feeds = []
+def is_feed_content_type(content_type):
+    """Check whether a Content-Type header looks like an RSS/Atom feed"""
+    content_type = (content_type or '').lower()
+    return 'xml' in content_type or 'rss' in content_type or 'atom' in content_type
 
-    # Method 1: Look for RSS link tags in HTML
-    link_tags = soup.find_all('link', {'type': re.compile(r'application/(rss|atom)\+xml', re.I)})
-    for tag in link_tags:
+def find_feed_links(url, soup):
+    """Return absolute URLs of all RSS/Atom <link> tags on the page"""
+    feeds = []
+    for tag in soup.find_all('link', {'type': FEED_LINK_TYPE}):
         href = tag.get('href')
         if href:
-            full_url = urljoin(url, href)
-            rss_feeds.append(full_url)
-
-    # Method 2: Check common RSS feed paths
-    common_paths = [
-        '/feed',
-        '/rss',
-        '/blog/feed',
-        '/news/feed',
-        '/feed/',
-        '/rss/',
-        '/atom.xml',
-        '/rss.xml',
-        '/feed.xml'
-    ]
-
-    base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
-
-    for path in common_paths:
-        test_url = base_url + path
-        try:
-            response = session.head(test_url, timeout=5, allow_redirects=True)
-            if response.status_code == 200:
-                content_type = response.headers.get('content-type', '').lower()
-                if 'xml' in content_type or 'rss' in content_type or 'atom' in content_type:
-                    rss_feeds.append(test_url)
-        except:
-            pass
-
-    # Return the first RSS feed found
-    return rss_feeds[0] if rss_feeds else None
+            feeds.append(urljoin(url, href))
+    return feeds
 
 def find_news_section(url, soup):
     """
@@ -106,108 +101,93 @@ def find_news_section(url, soup):
 
     return None
 
-def check_website(url):
-    """
-    Check a website for RSS feed and news section.
-    Returns: (rss_url, news_url)
-    """
-    url = normalize_url(url)
-    if not url:
-        return None, None
-
-    try:
-        session = requests.Session()
-        session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-
-        print(f"  Checking: {url}")
-        response = session.get(url, timeout=10, allow_redirects=True)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # Find RSS feed
-        rss_url = find_rss_feed(url, soup, session)
-
-        # Find news section
-        news_url = find_news_section(url, soup)
-
+def parse_args(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Check company websites for RSS feeds and news sections")
+    parser.add_argument('--concurrency', type=int, default=Config.CRAWL_CONCURRENCY,
+                        help="Number of companies checked at once")
+    parser.add_argument('--per-host', type=int, default=Config.CRAWL_PER_HOST_LIMIT,
+                        help="Maximum open requests to a single domain")
+    parser.add_argument('--host-delay', type=float, default=Config.CRAWL_HOST_DELAY,
+                        help="Starting delay between requests to a domain (adapted to how it responds)")
+    parser.add_argument('--ignore-robots', action='store_true',
+                        help="Don't fetch or honour robots.txt")
+    parser.add_argument('--recheck-days', type=float, default=Config.DISCOVERY_RECHECK_DAYS,
+                        help="Reuse cached results for sites checked more recently than this")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignore the discovery cache and fetch every site again")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only check companies that are new, failed last time or are older than --max-age-days "
+                             "(also resumes an interrupted run)")
+    parser.add_argument('--max-age-days', type=float, default=Config.DISCOVERY_MAX_AGE_DAYS,
+                        help="Age after which an incremental run re-checks a company")
+    parser.add_argument('--export', action='store_true', help=f"Regenerate {Config.COMPANIES_XLSX} after the run")
+    parser.add_argument('--url', action='append', metavar='URL',
+                        help="Only check this website and print the result (repeatable; the database is not used)")
+    parser.add_argument('--shards', type=int, default=Config.DISCOVERY_SHARDS,
+                        help="Split the companies by domain into N shards, each checked in its own worker process")
+    parser.add_argument('--shard', type=int,
+                        help="Only check shard K (0 to N-1) of --shards, e.g. on another machine with shared storage; "
+                             "results stay in the shard journal until --merge")
+    parser.add_argument('--merge', action='store_true',
+                        help="Merge the shard journals of --shards into the database without checking")
+    metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.shard is not None and not 0 <= args.shard < args.shards:
+        parser.error("--shard must be between 0 and --shards - 1")
+    if args.merge and args.shards < 2:
+        parser.error("--merge needs --shards N (N > 1)")
+    return args
+
+def main(argv=None, prog=None):
+    args = parse_args(argv, prog)
+    if args.url:
+        check_urls(args.url, args)
+        return
+    with metrics.run_report('check_rss_news', args):
+        run(args)
+
+def check_urls(urls, args):
+    """Quick check of single websites under the crawl scheduler, without reading or saving companies"""
+    import asyncio
+    from async_crawler import check_website_async
+    from crawl_scheduler import CrawlScheduler
+
+    async def check_all():
+        limiter = CrawlScheduler(max_per_host=args.per_host, delay=args.host_delay,
+                                 respect_robots=False if args.ignore_robots else None)
+        try:
+            return await asyncio.gather(*(check_website_async(url, limiter) for url in urls))
+        finally:
+            await limiter.aclose()
+
+    for url, (rss_url, news_url, error) in zip(urls, run_async(check_all())):
+        print(f"🔍 {normalize_url(url)}")
+        if error:
+            print(f"    Error: {error}")
         print(f"    RSS: {rss_url if rss_url else 'Not found'}")
         print(f"    News: {news_url if news_url else 'Not found'}")
 
-        return rss_url, news_url
-
-    except Exception as e:
-        print(f"    Error: {str(e)}")
-        return None, None
-
-def format_excel_file(filename):
-    """Format the Excel file with clickable URLs and optimized column widths"""
-    wb = load_workbook(filename)
-    ws = wb.active
-
-    # Define column widths
-    column_widths = {
-        'Company': 25,
-        'Type': 20,
-        'Country': 15,
-        'Webpage': 40,
-        'Description': 70,
-        'Primary Materials': 50,
-        'Market Segments': 50,
-        'Status': 12,
-        'Publicly Listed': 15,
-        'Stock Ticker': 15,
-        'Date Added': 15,
-        'RSS Feed URL': 50,
-        'News Section URL': 50
-    }
+def run(args):
+    from async_crawler import check_companies
+    from http_cache import HTTPCache
+    from discovery_journal import DiscoveryJournal
+    from discovery_shards import (merge_shard_caches, merge_shards, run_shard, run_shards, shard_journal,
+                                  shard_path, split_companies)
+    from news_store import NewsStore, read_companies_frame
 
-    # Get header row
-    headers = [cell.value for cell in ws[1]]
-
-    # Set column widths and format
-    for idx, header in enumerate(headers, 1):
-        col_letter = get_column_letter(idx)
-
-        # Set width
-        if header in column_widths:
-            ws.column_dimensions[col_letter].width = column_widths[header]
-
-        # Set text wrapping for long text columns
-        if header in ['Description', 'Primary Materials', 'Market Segments', 'Headline']:
-            for row in range(2, ws.max_row + 1):
-                ws[f'{col_letter}{row}'].alignment = Alignment(wrap_text=True, vertical='top')
-
-    # Make URLs clickable
-    url_columns = ['Webpage', 'RSS Feed URL', 'News Section URL']
-    for col_name in url_columns:
-        if col_name in headers:
-            col_idx = headers.index(col_name) + 1
-            col_letter = get_column_letter(col_idx)
-
-            for row in range(2, ws.max_row + 1):
-                cell = ws[f'{col_letter}{row}']
-                if cell.value and str(cell.value).strip():
-                    url = str(cell.value).strip()
-                    # Add https:// if missing
-                    if not url.startswith(('http://', 'https://')):
-                        url = 'https://' + url
-                    cell.hyperlink = url
-                    cell.font = Font(color="0563C1", underline="single")
-
-    wb.save(filename)
-    print(f"\n✅ Excel file formatted with clickable URLs and optimized column widths")
-
-def main():
     print("=" * 60)
     print("RSS Feed and News Section Checker")
     print("=" * 60)
 
-    # Read the companies file
-    print("\n📖 Reading companies.xlsx...")
-    df = pd.read_excel('companies.xlsx')
+    # Read the companies (imported from companies.xlsx on first use)
+    print("\n📖 Reading companies...")
+    if args.shard is not None:
+        # Only the merge writes the companies database, so shards on several machines don't race
+        store = None
+        df = read_companies_frame()
+    else:
+        store = NewsStore()
+        df = store.companies_frame()
 
     print(f"Found {len(df)} companies")
 
@@ -220,41 +200,119 @@ def main():
     # Check each company's website
     print("\n🔍 Checking websites for RSS feeds and news sections...\n")
 
+    companies = []
     for idx, row in df.iterrows():
-        company = row['Company']
         webpage = row.get('Webpage')
-
-        print(f"\n[{idx+1}/{len(df)}] {company}")
-
-        if pd.isna(webpage) or not webpage:
-            print("  No webpage - skipping")
+        if is_missing(webpage) or not webpage:
+            print(f"[{idx+1}/{len(df)}] {row['Company']}: No webpage - skipping")
             continue
+        companies.append((idx, row['Company'], webpage))
+
+    journal = DiscoveryJournal()
+    sharded = args.shards > 1 and args.shard is None
+    if sharded:
+        # Checkpoints of an interrupted sharded run, or of shards run on other machines
+        merged = merge_shards(args.shards, journal)
+        if merged:
+            print(f"🧩 Merged {merged} results from the shard journals")
+        if not args.no_cache and merge_shard_caches(args.shards):
+            print("🧩 Merged the shard HTTP caches")
+    elif args.shard is not None:
+        # This shard's own checkpoints count for --incremental (in memory; the main journal isn't written)
+        journal.merge(shard_journal(args.shard, args.shards).entries.values())
+        companies = split_companies(companies, args.shards)[args.shard]
+        print(f"🧩 Shard {args.shard} of {args.shards} (0-{args.shards - 1}): {len(companies)} companies")
+
+    if args.merge:
+        companies = []
+    elif args.incremental:
+        pending = [c for c in companies if journal.needs_check(c[1], c[2], args.max_age_days)]
+        print(f"♻️  Incremental run: {len(pending)} of {len(companies)} companies need checking")
+        companies = pending
+
+    def checkpoint(idx, company, webpage, rss_url, news_url, error):
+        journal.record(company, webpage, rss_url, news_url, error)
+
+    options = {
+        'concurrency': args.concurrency,
+        'per_host': args.per_host,
+        'host_delay': args.host_delay,
+        'recheck_days': args.recheck_days,
+        'no_cache': args.no_cache,
+        'respect_robots': False if args.ignore_robots else None,
+    }
 
-        # Check website
-        rss_url, news_url = check_website(webpage)
-
-        # Update dataframe
-        df.at[idx, 'RSS Feed URL'] = rss_url
-        df.at[idx, 'News Section URL'] = news_url
-
-        # Rate limiting
-        time.sleep(2)
+    # Concurrent check, paced per domain by the adaptive crawl scheduler
+    cache = None
+    try:
+        with metrics.timed('crawl'):
+            if args.shard is not None:
+                summary = run_shard(args.shard, args.shards, companies, options)
+                metrics.gauge('discovery_shard_seconds', summary['seconds'], shard=args.shard)
+            elif sharded and companies:
+                for summary in run_shards(companies, args.shards, options):
+                    metrics.gauge('discovery_shard_seconds', summary['seconds'], shard=summary['shard'])
+            elif companies:
+                cache = None if args.no_cache else HTTPCache()
+                run_async(check_companies(
+                    companies,
+                    concurrency=args.concurrency,
+                    per_host=args.per_host,
+                    host_delay=args.host_delay,
+                    cache=cache,
+                    recheck_days=args.recheck_days,
+                    on_result=checkpoint,
+                    respect_robots=options['respect_robots'],
+                ))
+    except KeyboardInterrupt:
+        print("\n⚠️ Interrupted - saving checkpointed results (rerun with --incremental to resume)")
+    finally:
+        if cache is not None:
+            cache.close()
+        journal.close()
+
+    if args.shard is not None:
+        print(f"\n✅ Shard {args.shard} results: {shard_path(journal.path, args.shard, args.shards)}")
+        print(f"   Run with --shards {args.shards} --merge once every shard has finished")
+        return
+    if sharded:
+        merge_shards(args.shards, journal)
+        if not args.no_cache:
+            merge_shard_caches(args.shards)
+
+    if cache is not None:
+        print(f"\n🗄️  Cache: {cache.hits} skipped (checked recently), "
+              f"{cache.revalidated} not modified, {cache.misses} downloaded")
+        metrics.incr('http_cache', cache.hits, result='skipped')
+        metrics.incr('http_cache', cache.revalidated, result='not_modified')
+        metrics.incr('http_cache', cache.misses, result='downloaded')
+
+    # Update dataframe from the journal, which also holds checkpoints of earlier interrupted runs
+    for idx, row in df.iterrows():
+        webpage = row.get('Webpage')
+        if is_missing(webpage) or not webpage:
+            continue
+        entry = journal.get(row['Company'], webpage)
+        if entry is not None:
+            df.at[idx, 'RSS Feed URL'] = entry['rss_url']
+            df.at[idx, 'News Section URL'] = entry['news_url']
+    journal.compact()
 
-    # Save updated file
+    # Save updated companies
     print("\n" + "=" * 60)
-    print("💾 Saving results to companies.xlsx...")
-
-    # Create backup
-    import shutil
-    shutil.copy('companies.xlsx', 'companies_backup.xlsx')
-    print("✅ Backup created: companies_backup.xlsx")
-
-    # Save to Excel
-    df.to_excel('companies.xlsx', index=False, engine='openpyxl')
-    print("✅ Data saved to companies.xlsx")
-
-    # Format Excel file
-    format_excel_file('companies.xlsx')
+    with metrics.timed('save'):
+        store.save_companies(df)
+    print(f"✅ Data saved to {store.path}")
+
+    if args.export:
+        import os
+        import shutil
+        if os.path.exists(Config.COMPANIES_XLSX):
+            shutil.copy(Config.COMPANIES_XLSX, 'companies_backup.xlsx')
+            print("✅ Backup created: companies_backup.xlsx")
+        with metrics.timed('excel_export'):
+            print(f"✅ Data exported to {store.export_companies()}")
+    store.close()
 
     # Print summary
     rss_count = df['RSS Feed URL'].notna().sum()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the news tools.
+
+    python cli.py discover [options]          check company websites (check_rss_news.py)
+    python cli.py discover --url example.com  check one website, without the database
+    python cli.py fetch [options]             fetch news via Perplexity (news_fetcher.py)
+    python cli.py export [xlsx] [options]     regenerate the workbooks (news_store.py)
+    python cli.py export hugo [options]       write changed Hugo pages (hugo_export.py)
+    python cli.py config [--check]            show the configuration (--check: cron health check)
+
+Options after the command go to that tool's own parser, so
+`python cli.py fetch --help` lists the fetcher's options. A tool's module
+(and with it pandas, httpx, numpy, ...) is imported only when its command
+runs; `config` loads nothing but config.py. bench_startup.py measures the
+startup cost of each command with `python -X importtime`.
+"""
+
+import argparse
+import sys
+
+
+def show_config(check=False):
+    from config import Config
+    Config.display_config()
+    if check:
+        if not Config.PERPLEXITY_API_KEY:
+            print("❌ PERPLEXITY_API_KEY is not set")
+            sys.exit(1)
+        print("✅ Configuration complete")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Bioplastic news tools",
+        epilog="Options after a command go to that tool; `cli.py <command> --help` lists them.")
+    commands = parser.add_subparsers(dest='command', required=True, metavar='command')
+    # The tools parse their own options (including --help)
+    commands.add_parser('discover', add_help=False, help="Check company websites for RSS feeds and news sections")
+    commands.add_parser('fetch', add_help=False, help="Fetch recent news for all companies via Perplexity")
+    export = commands.add_parser('export', add_help=False, help="Regenerate the workbooks or the Hugo pages")
+    export.add_argument('target', nargs='?', choices=['xlsx', 'hugo'], default='xlsx')
+    config = commands.add_parser('config', help="Show the configuration")
+    config.add_argument('--check', action='store_true',
+                        help="Exit with status 1 when the API key is missing (for health checks)")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, rest = parser.parse_known_args(argv)
+    prog = f"{parser.prog} {args.command}"  # Usage lines of the tools show the cli.py command
+
+    if args.command == 'discover':
+        import check_rss_news
+        check_rss_news.main(rest, prog)
+    elif args.command == 'fetch':
+        import news_fetcher
+        news_fetcher.main(rest, prog)
+    elif args.command == 'export':
+        if args.target == 'hugo':
+            import hugo_export
+            hugo_export.main(rest, f"{prog} hugo")
+        else:
+            import news_store
+            news_store.main(rest, command='export', prog=f"{prog} [xlsx]")
+    else:
+        if rest:
+            parser.error(f"unrecognized arguments: {' '.join(rest)}")
+        show_config(args.check)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""
+Company-name entity resolution.
+
+Perplexity names companies in free text ("Roquette Frères", "BASF SE",
+"Blue Ocean Closures (BOC)"). Instead of fuzzy-scoring every item
+against every company, names are resolved through an alias index:
+
+1. normalize (accents, case, punctuation) and strip legal suffixes
+2. exact lookup of the alias
+3. otherwise block on shared character trigrams, then score only the
+   blocked candidates; rapidfuzz process.cdist scores a whole batch at
+   once when installed, a trigram Dice score is the fallback
+
+The alias table lives in the news database and is rebuilt only when the
+set of companies changes (e.g. after companies.xlsx was edited).
+"""
+
+import hashlib
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+from config import Config
+
+# Trailing words that don't distinguish companies
+LEGAL_SUFFIXES = {
+    'ag', 'se', 'sa', 'spa', 'gmbh', 'inc', 'incorporated', 'corp', 'corporation', 'co', 'company',
+    'ltd', 'limited', 'llc', 'plc', 'nv', 'bv', 'kg', 'oy', 'oyj', 'ab', 'as', 'srl', 'sas', 'pte',
+    'pty', 'kk', 'group', 'holding', 'holdings',
+}
+
+MAX_CANDIDATES = 20  # Blocked candidates scored per name
+CDIST_MAX_COLUMNS = 500  # Above this many distinct candidates, score each name against its own
+COMMON_GRAM_SHARE = 0.05  # Trigrams in more aliases than this share don't block ('gmb', 'ics')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS company_aliases (
+    alias TEXT PRIMARY KEY,
+    company TEXT NOT NULL
+);
+"""
+
+
+def normalize_name(name):
+    """'Roquette Frères' -> 'roquette freres'"""
+    text = unicodedata.normalize('NFKD', str(name or '')).encode('ascii', 'ignore').decode('ascii')
+    text = text.lower().replace('&', ' and ').replace('.', '')
+    return ' '.join(re.findall(r'[a-z0-9]+', text))
+
+
+def strip_legal_suffixes(normalized):
+    """'basf se' -> 'basf' (never strips the name down to nothing)"""
+    words = normalized.split()
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+
+def name_aliases(name):
+    """Lookup keys for a company name, most specific first"""
+    full = normalize_name(name)
+    outside = normalize_name(re.sub(r'\(.*?\)', ' ', str(name)))
+    inside = [normalize_name(part) for part in re.findall(r'\((.*?)\)', str(name))]
+
+    aliases = []
+    for alias in [full, outside] + inside:
+        for key in (alias, strip_legal_suffixes(alias)):
+            if len(key) >= 2 and key not in aliases:
+                aliases.append(key)
+    return aliases
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def dice(a, b):
+    return 200.0 * len(a & b) / (len(a) + len(b)) if a or b else 0.0
+
+
+def companies_fingerprint(names):
+    return hashlib.sha256('\n'.join(names).encode('utf-8')).hexdigest()
+
+
+class CompanyIndex:
+    """Alias -> company lookup with trigram blocking"""
+
+    def __init__(self, aliases, threshold=None):
+        self.threshold = Config.COMPANY_MATCH_THRESHOLD if threshold is None else threshold
+        self.aliases = dict(aliases)
+        self.alias_list = list(self.aliases)
+        self._grams = [trigrams(alias) for alias in self.alias_list]
+        self._blocks = defaultdict(list)
+        for idx, grams in enumerate(self._grams):
+            for gram in grams:
+                self._blocks[gram].append(idx)
+
+    @classmethod
+    def from_names(cls, names, threshold=None):
+        """Build the index for a list of company names (earlier names win shared aliases)"""
+        aliases = {}
+        # Full names first, so 'BASF' keeps 'basf' even if 'BASF SE' comes earlier
+        for name in names:
+            aliases.setdefault(normalize_name(name), name)
+        for name in names:
+            for alias in name_aliases(name):
+                aliases.setdefault(alias, name)
+        return cls(aliases, threshold)
+
+    @classmethod
+    def load(cls, db, names, threshold=None):
+        """
+        The persisted index for these company names; rebuilt (and saved) when
+        the names differ from the ones it was built from.
+        """
+        db.executescript(SCHEMA)
+        fingerprint = companies_fingerprint(names)
+        row = db.execute("SELECT value FROM meta WHERE key = 'company_index'").fetchone()
+        if row is not None and row[0] == fingerprint:
+            return cls(db.execute("SELECT alias, company FROM company_aliases").fetchall(), threshold)
+
+        index = cls.from_names(names, threshold)
+        with db:
+            db.execute("DELETE FROM company_aliases")
+            db.executemany("INSERT INTO company_aliases VALUES (?, ?)", index.aliases.items())
+            db.execute("INSERT OR REPLACE INTO meta VALUES ('company_index', ?)", (fingerprint,))
+        return index
+
+    def candidates(self, key):
+        """Indexes of the aliases sharing the most (reasonably rare) trigrams with key"""
+        postings = sorted((self._blocks[gram] for gram in trigrams(key) if gram in self._blocks), key=len)
+        limit = max(50, int(len(self.alias_list) * COMMON_GRAM_SHARE))
+        rare = [posting for posting in postings if len(posting) <= limit] or postings[:3]
+        shared = Counter()
+        for posting in rare:
+            shared.update(posting)
+        return [idx for idx, _ in shared.most_common(MAX_CANDIDATES)]
+
+    def resolve(self, name):
+        return self.resolve_many([name])[0]
+
+    def resolve_many(self, names):
+        """Company name (the companies table key) for each name, or None if nothing matches well enough"""
+        keys = {}
+        for name in names:
+            key = normalize_name(name)
+            if key not in keys:
+                keys[key] = self._exact(key)
+
+        pending = [key for key, company in keys.items() if company is None and key]
+        if pending:
+            keys.update(zip(pending, self._fuzzy(pending)))
+        return [keys[normalize_name(name)] for name in names]
+
+    def _exact(self, key):
+        if key in self.aliases:
+            return self.aliases[key]
+        stripped = strip_legal_suffixes(key)
+        return self.aliases.get(stripped)
+
+    def _fuzzy(self, keys):
+        blocked = [self.candidates(key) for key in keys]
+        try:
+            from rapidfuzz import fuzz, process
+        except ImportError:
+            return [self._best_dice(key, candidates) for key, candidates in zip(keys, blocked)]
+        # token_sort_ratio, not token_set_ratio: a name whose words are a subset
+        # of another's ('Bio' vs 'Bio-On') must not score 100
+        scorer = fuzz.token_sort_ratio
+
+        columns = sorted({idx for candidates in blocked for idx in candidates})
+        if not columns:
+            return [None] * len(keys)
+        if len(columns) > CDIST_MAX_COLUMNS:
+            resolved = []
+            for key, candidates in zip(keys, blocked):
+                match = process.extractOne(key, {idx: self.alias_list[idx] for idx in candidates},
+                                           scorer=scorer, processor=strip_legal_suffixes,
+                                           score_cutoff=self.threshold)
+                resolved.append(self.aliases[self.alias_list[match[2]]] if match else None)
+            return resolved
+
+        # One vectorized scoring pass over the union of the blocked candidates
+        position = {idx: col for col, idx in enumerate(columns)}
+        scores = process.cdist(keys, [self.alias_list[idx] for idx in columns], scorer=scorer,
+                               processor=strip_legal_suffixes, workers=-1)
+
+        resolved = []
+        for row, candidates in enumerate(blocked):
+            best_idx, best_score = None, self.threshold
+            for idx in candidates:
+                score = scores[row, position[idx]]
+                if score > best_score or (best_idx is None and score == best_score):
+                    best_idx, best_score = idx, score
+            resolved.append(self.aliases[self.alias_list[best_idx]] if best_idx is not None else None)
+        return resolved
+
+    def _best_dice(self, key, candidates):
+        grams = trigrams(strip_legal_suffixes(key))
+        best_idx, best_score = None, self.threshold
+        for idx in candidates:
+            score = dice(grams, self._grams[idx])
+            if score > best_score or (best_idx is None and score == best_score):
+                best_idx, best_score = idx, score
+        return self.aliases[self.alias_list[best_idx]] if best_idx is not None else None
@@ -5,11 +5,12 @@ Handles environment variables and configuration settings
 
 import os
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
+# Load environment variables from .env file (python-dotenv is only imported when there is one)
 env_path = Path('.') / '.env'
-load_dotenv(dotenv_path=env_path)
+if env_path.is_file():
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=env_path)
 
 class Config:
     """Configuration class for API keys and settings"""
@@ -18,7 +19,7 @@ class Config:
     PERPLEXITY_API_KEY = os.getenv('PERPLEXITY_API_KEY')
     
     # API Endpoints
-    PERPLEXITY_API_URL = "https://api.perplexity.ai/chat/completions"
+    PERPLEXITY_API_URL = os.getenv('PERPLEXITY_API_URL', "https://api.perplexity.ai/chat/completions")
     
     # Default settings
     DEFAULT_MODEL = "sonar"  # or "sonar-pro" for better quality
@@ -28,10 +29,83 @@ class Config:
     # News search settings
     DAYS_TO_SEARCH = 7  # Last week
     MAX_RESULTS_PER_COMPANY = 3
-    
+
+    # Perplexity account quota and batch fetching (news_fetcher.py)
+    PERPLEXITY_RPM = int(os.getenv('PERPLEXITY_RPM', 50))  # Requests per minute
+    PERPLEXITY_TPM = int(os.getenv('PERPLEXITY_TPM', 100000))  # Tokens per minute (0 = no limit)
+    RATE_LIMIT_HEADROOM = float(os.getenv('RATE_LIMIT_HEADROOM', 0.9))  # Share of quota used for steady rate
+    PERPLEXITY_MAX_RETRIES = int(os.getenv('PERPLEXITY_MAX_RETRIES', 5))  # Retries per company after a 429
+    NEWS_FETCH_CONCURRENCY = int(os.getenv('NEWS_FETCH_CONCURRENCY', 10))  # API calls in flight
+    NEWS_BATCH_SIZE = int(os.getenv('NEWS_BATCH_SIZE', 1))  # Companies per query (1 = one query per company)
+    BATCH_MAX_TOKENS = int(os.getenv('BATCH_MAX_TOKENS', 4000))  # Completion budget of a batched query
+    LLM_CACHE_PATH = Path(os.getenv('LLM_CACHE_PATH', './news_cache/llm_cache.sqlite'))
+    LLM_CACHE_MODE = os.getenv('LLM_CACHE_MODE', 'read-write')  # 'read-write', 'record', 'replay' or 'off'
+    LLM_CACHE_MAX_MB = float(os.getenv('LLM_CACHE_MAX_MB', 100))  # Entries also expire after DAYS_TO_SEARCH
+
+    # Website discovery settings (check_rss_news.py)
+    CRAWL_CONCURRENCY = int(os.getenv('CRAWL_CONCURRENCY', 20))  # Companies checked at once
+    CRAWL_PER_HOST_LIMIT = int(os.getenv('CRAWL_PER_HOST_LIMIT', 2))  # Open requests per host
+    CRAWL_HOST_DELAY = float(os.getenv('CRAWL_HOST_DELAY', 1.0))  # Starting delay between requests to one domain
+    CRAWL_MIN_DELAY = float(os.getenv('CRAWL_MIN_DELAY', 0.25))  # Fastest a responsive domain is crawled
+    CRAWL_MAX_DELAY = float(os.getenv('CRAWL_MAX_DELAY', 60.0))  # Slowest (after 429s, errors, Crawl-delay)
+    CRAWL_DELAY_STEP = float(os.getenv('CRAWL_DELAY_STEP', 0.25))  # Delay decrease per clean response
+    CRAWL_BREAKER_FAILURES = int(os.getenv('CRAWL_BREAKER_FAILURES', 3))  # Consecutive failures before giving up
+    CRAWL_RESPECT_ROBOTS = os.getenv('CRAWL_RESPECT_ROBOTS', '1') == '1'  # Honour robots.txt rules and Crawl-delay
+    CRAWL_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    RSS_PROBE_MODE = os.getenv('RSS_PROBE_MODE', 'fallback')  # 'fallback', 'always' or 'never'
+    SITEMAP_MODE = os.getenv('SITEMAP_MODE', 'fallback')  # News section from sitemaps: 'fallback', 'always', 'never'
+    SITEMAP_MAX_FILES = int(os.getenv('SITEMAP_MAX_FILES', 4))  # Sitemap files read per site
+    SITEMAP_MAX_BYTES = int(os.getenv('SITEMAP_MAX_BYTES', 20 * 1024 * 1024))  # Per file, uncompressed
+    HTML_PARSER = os.getenv('HTML_PARSER', 'auto')  # 'auto', 'selectolax', 'lxml' or 'html.parser'
+    PAGE_MAX_BYTES = int(os.getenv('PAGE_MAX_BYTES', 2 * 1024 * 1024))  # Homepage download cap
+
+    # Shared HTTP client settings (http_client.py)
+    HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', 100))  # Pool size
+    HTTP_MAX_KEEPALIVE = int(os.getenv('HTTP_MAX_KEEPALIVE', 20))  # Idle connections kept open
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', 30.0))  # Seconds
+    HTTP2 = os.getenv('HTTP2', '1') == '1'  # Used when the h2 package is installed
+    HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', 10.0))  # Default request timeout (seconds)
+    HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 2))  # Retries on connection errors, 429 and 5xx
+    HTTP_BACKOFF = float(os.getenv('HTTP_BACKOFF', 0.5))  # Base for exponential backoff (seconds)
+    HTTP_MAX_RETRY_AFTER = float(os.getenv('HTTP_MAX_RETRY_AFTER', 60.0))  # Longer Retry-After = give up
+
+    # Discovery cache settings (http_cache.py)
+    HTTP_CACHE_PATH = Path(os.getenv('HTTP_CACHE_PATH', './news_cache/http_cache.sqlite'))
+    HTTP_CACHE_TTL_DAYS = float(os.getenv('HTTP_CACHE_TTL_DAYS', 30))  # Entries older than this are evicted
+    HTTP_CACHE_MAX_MB = float(os.getenv('HTTP_CACHE_MAX_MB', 200))  # Size cap for cached page bodies
+    DISCOVERY_RECHECK_DAYS = float(os.getenv('DISCOVERY_RECHECK_DAYS', 7))  # Skip sites checked more recently
+
+    # Incremental discovery runs (discovery_journal.py)
+    DISCOVERY_JOURNAL_PATH = Path(os.getenv('DISCOVERY_JOURNAL_PATH', './news_cache/discovery_journal.jsonl'))
+    DISCOVERY_MAX_AGE_DAYS = float(os.getenv('DISCOVERY_MAX_AGE_DAYS', 30))  # Re-check results older than this
+    DISCOVERY_SHARDS = int(os.getenv('DISCOVERY_SHARDS', 1))  # Worker processes, companies split by domain hash
+
+    # News and companies database (news_store.py); the workbooks are exports
+    NEWS_DB_PATH = Path(os.getenv('NEWS_DB_PATH', './data/news.sqlite'))
+    NEWS_XLSX = os.getenv('NEWS_XLSX', 'companies_news.xlsx')
+    COMPANIES_XLSX = os.getenv('COMPANIES_XLSX', 'companies.xlsx')
+    NEAR_DUPLICATE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', 0.6))  # MinHash Jaccard estimate
+    COMPANY_MATCH_THRESHOLD = float(os.getenv('COMPANY_MATCH_THRESHOLD', 85))  # 0-100 name similarity
+    EXCEL_ENGINE = os.getenv('EXCEL_ENGINE', 'auto')  # 'auto', 'xlsxwriter' or 'openpyxl' (excel_writer.py)
+
+    # Feed polling (feed_poller.py)
+    FEED_STATE_PATH = Path(os.getenv('FEED_STATE_PATH', './news_cache/feeds.sqlite'))
+    FEED_CONCURRENCY = int(os.getenv('FEED_CONCURRENCY', 20))  # Feeds polled at once
+    FEED_DEFAULT_INTERVAL_HOURS = float(os.getenv('FEED_DEFAULT_INTERVAL_HOURS', 6))  # Until a feed's rhythm is known
+    FEED_MIN_INTERVAL_HOURS = float(os.getenv('FEED_MIN_INTERVAL_HOURS', 1))
+    FEED_MAX_INTERVAL_HOURS = float(os.getenv('FEED_MAX_INTERVAL_HOURS', 72))
+    FEED_MAX_BYTES = int(os.getenv('FEED_MAX_BYTES', 5 * 1024 * 1024))  # Download cap per feed
+
+    # Run metrics and profiling (metrics.py)
+    METRICS_DIR = Path(os.getenv('METRICS_DIR', './news_cache/metrics'))  # JSON run reports and profiles
+    METRICS_PROMETHEUS_FILE = os.getenv('METRICS_PROMETHEUS_FILE')  # Prometheus text file, written when set
+
     # Output settings
     OUTPUT_DIR = Path('./output')
     HUGO_CONTENT_DIR = Path('./content/news')  # Adjust to your Hugo structure
+    HUGO_MANIFEST_PATH = Path(os.getenv('HUGO_MANIFEST_PATH', './news_cache/hugo_manifest.json'))  # Page hashes
+    HUGO_WORKERS = int(os.getenv('HUGO_WORKERS', 0))  # Render processes (0 = one per CPU)
+    HUGO_POOL_MIN_PAGES = int(os.getenv('HUGO_POOL_MIN_PAGES', 500))  # Smaller batches render in-process
     
     @classmethod
     def validate(cls):
@@ -50,6 +124,18 @@ class Config:
         
         return True
 
+    @classmethod
+    def http_client(cls):
+        """Shared, pooled HTTP client for synchronous code"""
+        from http_client import get_client
+        return get_client()
+
+    @classmethod
+    def async_http_client(cls):
+        """Shared, pooled HTTP client for the running event loop"""
+        from http_client import get_async_client
+        return get_async_client()
+
     @classmethod
     def display_config(cls):
         """Display current configuration (hiding sensitive data)"""
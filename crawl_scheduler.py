@@ -0,0 +1,364 @@
+"""
+Adaptive per-domain crawl scheduling.
+
+Replaces the fixed delay between requests to a host with a scheduler that
+learns how hard each site can be crawled:
+
+- domains wait in a priority queue ordered by their next allowed fetch
+  time; one dispatcher hands out request slots in that order
+- delays follow AIMD: every clean response shortens a domain's delay by a
+  fixed step, a 429/5xx/timeout or a response much slower than usual
+  doubles it, and the delay never drops below the observed latency
+- robots.txt is fetched once per site and run (revalidated through the
+  HTTP cache across runs); Disallow rules, Crawl-delay and Request-rate
+  are honoured
+- a circuit breaker stops requests to a domain after consecutive
+  failures, so a dead site costs a few timeouts instead of one per probe
+
+Domains are registrable domains ("news.example.co.uk" -> "example.co.uk"),
+so companies hosted on the same platform share one politeness budget.
+"""
+
+import asyncio
+import heapq
+import ipaddress
+import itertools
+from collections import deque
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+import metrics
+from config import Config
+from http_client import arequest, retry_delay
+from http_cache import acached_get
+
+THROTTLE_STATUSES = {429, 503}  # The server asks us to slow down
+SECOND_LEVEL_LABELS = {'co', 'com', 'net', 'org', 'ac', 'gov', 'edu', 'ne', 'or', 'go'}  # example.co.uk
+
+LATENCY_ALPHA = 0.3  # Weight of the newest response time in the moving average
+SLOW_FACTOR = 3.0  # A response this many times slower than average counts as congestion
+
+ROBOTS_TIMEOUT = 5
+ROBOTS_MAX_BYTES = 512 * 1024
+
+
+class CircuitOpenError(httpx.HTTPError):
+    """Raised instead of sending a request to a domain that kept failing"""
+
+
+class RobotsDisallowedError(httpx.HTTPError):
+    """Raised for URLs that robots.txt asks us not to fetch"""
+
+
+def domain_key(url):
+    """Registrable domain of a URL: 'https://news.example.co.uk/x' -> 'example.co.uk'"""
+    host = (urlsplit(url if '://' in url else '//' + url).hostname or '').lower().rstrip('.')
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        pass
+    labels = host.split('.')
+    if len(labels) > 2 and len(labels[-1]) == 2 and labels[-2] in SECOND_LEVEL_LABELS:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+def robots_crawl_delay(lines, user_agent):
+    """
+    Crawl-delay for user_agent (its own group, else '*'); unlike
+    RobotFileParser.crawl_delay() this also accepts fractional seconds.
+    """
+    token = user_agent.split('/')[0].lower()
+    delays = {}
+    agents, in_rules = [], False
+    for line in lines:
+        key, _, value = line.split('#', 1)[0].partition(':')
+        key, value = key.strip().lower(), value.strip()
+        if key == 'user-agent':
+            if in_rules:
+                agents, in_rules = [], False
+            agents.append(value.lower())
+        elif key:
+            in_rules = True
+            if key == 'crawl-delay':
+                try:
+                    for agent in agents:
+                        delays.setdefault(agent, float(value))
+                except ValueError:
+                    pass
+    own = [delay for agent, delay in delays.items() if agent != '*' and agent in token]
+    return own[0] if own else delays.get('*')
+
+
+class Ticket:
+    """Handed out by slot(); record the response so the scheduler can adapt"""
+
+    def __init__(self):
+        self.status = None
+        self.retry_after = None
+
+    def record(self, response):
+        self.status = response.status_code
+        if response.headers.get('retry-after'):
+            self.retry_after = retry_delay(0, response)
+
+
+class DomainState:
+    """Scheduling state of one domain"""
+
+    def __init__(self, key, delay):
+        self.key = key
+        self.delay = delay
+        self.crawl_delay = 0.0  # From robots.txt
+        self.next_time = 0.0
+        self.latency = None
+        self.active = 0
+        self.waiting = deque()
+        self.queued = False
+        self.failures = 0
+        self.open = False
+        self.requests = 0
+        self.throttled = 0
+
+
+class CrawlScheduler:
+    """
+    Per-host politeness for the crawler: bounded concurrency per host with
+    adaptive delays, robots.txt and a per-domain circuit breaker.
+
+        async with scheduler.slot(url) as ticket:
+            response = await arequest('GET', url)
+            ticket.record(response)
+    """
+
+    def __init__(self, max_per_host=None, delay=None, min_delay=None, max_delay=None, step=None,
+                 breaker_failures=None, respect_robots=None, cache=None):
+        self.max_per_host = max_per_host or Config.CRAWL_PER_HOST_LIMIT
+        self.delay = Config.CRAWL_HOST_DELAY if delay is None else delay
+        self.min_delay = Config.CRAWL_MIN_DELAY if min_delay is None else min_delay
+        self.max_delay = Config.CRAWL_MAX_DELAY if max_delay is None else max_delay
+        self.step = Config.CRAWL_DELAY_STEP if step is None else step
+        self.breaker_failures = breaker_failures or Config.CRAWL_BREAKER_FAILURES
+        self.respect_robots = Config.CRAWL_RESPECT_ROBOTS if respect_robots is None else respect_robots
+        self.cache = cache
+        self.disallowed = 0
+
+        self._domains = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._dispatcher = None
+        self._robots = {}
+
+    def domain(self, url):
+        key = domain_key(url)
+        state = self._domains.get(key)
+        if state is None:
+            state = self._domains[key] = DomainState(key, self.delay)
+        return state
+
+    async def allowed(self, url):
+        """False if robots.txt disallows url"""
+        if not self.respect_robots:
+            return True
+        rules = await self._robots_for(url)
+        return rules is None or rules.can_fetch(Config.CRAWL_USER_AGENT, url)
+
+    async def sitemaps(self, url):
+        """Sitemap URLs listed in the site's robots.txt (none when robots.txt is ignored)"""
+        if not self.respect_robots:
+            return []
+        rules = await self._robots_for(url)
+        return list(rules.site_maps() or []) if rules is not None else []
+
+    @asynccontextmanager
+    async def slot(self, url):
+        """
+        Wait for the domain's turn, then yield a Ticket for the request.
+        Raises CircuitOpenError / RobotsDisallowedError instead of waiting
+        when the request must not be sent at all.
+        """
+        if not await self.allowed(url):
+            self.disallowed += 1
+            metrics.incr('crawl_robots_disallowed')
+            raise RobotsDisallowedError(f"Disallowed by robots.txt: {url}")
+        async with self._slot(self.domain(url)) as ticket:
+            yield ticket
+
+    @asynccontextmanager
+    async def _slot(self, state):
+        if state.open:
+            raise CircuitOpenError(f"{state.key}: skipped after {state.failures} consecutive failures")
+        loop = asyncio.get_running_loop()
+        queued = loop.time()
+        await self._acquire(state)
+
+        ticket = Ticket()
+        started = loop.time()
+        metrics.observe('crawl_wait_seconds', started - queued)
+        error = None
+        try:
+            yield ticket
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._release(state, ticket, error, loop.time() - started)
+
+    async def _acquire(self, state):
+        future = asyncio.get_running_loop().create_future()
+        state.waiting.append(future)
+        self._schedule(state)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():  # Granted just before we were cancelled
+                state.active -= 1
+                self._schedule(state)
+            raise
+
+    def _schedule(self, state):
+        """Queue the domain for its next slot if it has waiters and room"""
+        if state.queued or not state.waiting or state.active >= self.max_per_host:
+            return
+        state.queued = True
+        heapq.heappush(self._heap, (state.next_time, next(self._seq), state.key))
+        self._wakeup.set()
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def _dispatch(self):
+        """Grant slots in order of each domain's next allowed fetch time"""
+        loop = asyncio.get_running_loop()
+        try:
+            while self._heap:
+                ready, _, key = self._heap[0]
+                state = self._domains[key]
+                if state.next_time > ready:  # Its delay grew (429, Retry-After) since it was queued
+                    heapq.heapreplace(self._heap, (state.next_time, next(self._seq), key))
+                    continue
+                wait = ready - loop.time()
+                if wait > 0:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                heapq.heappop(self._heap)
+                state.queued = False
+                while state.waiting and state.waiting[0].done():  # Cancelled or failed while waiting
+                    state.waiting.popleft()
+                if not state.waiting or state.active >= self.max_per_host:
+                    continue  # Requeued when a request finishes
+                state.active += 1
+                state.requests += 1
+                state.next_time = loop.time() + max(state.delay, state.crawl_delay)
+                state.waiting.popleft().set_result(None)
+                self._schedule(state)
+        finally:
+            self._dispatcher = None
+
+    def _release(self, state, ticket, error, latency):
+        state.active -= 1
+        if isinstance(error, asyncio.CancelledError):
+            self._schedule(state)
+            return
+
+        status = ticket.status
+        if isinstance(error, httpx.TransportError) or (status is not None and status >= 500
+                                                       and status not in THROTTLE_STATUSES):
+            # Multiplicative decrease of the request rate; dead sites trip the breaker
+            state.failures += 1
+            state.delay = min(self.max_delay, state.delay * 2)
+            if state.failures >= self.breaker_failures:
+                self._open_circuit(state)
+        elif status in THROTTLE_STATUSES:
+            state.throttled += 1
+            metrics.incr('crawl_throttled')
+            state.delay = min(self.max_delay, state.delay * 2)
+            if ticket.retry_after:
+                loop_time = asyncio.get_running_loop().time()
+                state.next_time = max(state.next_time, loop_time + min(ticket.retry_after, self.max_delay))
+        else:
+            # Answered (any 2xx-4xx): additive increase, bounded below by the site's latency
+            state.failures = 0
+            slow = state.latency is not None and latency > SLOW_FACTOR * state.latency
+            state.latency = latency if state.latency is None else \
+                LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * state.latency
+            if slow:
+                state.delay = min(self.max_delay, state.delay * 2)
+            else:
+                state.delay = max(self.min_delay, state.crawl_delay, state.latency, state.delay - self.step)
+        self._schedule(state)
+
+    def _open_circuit(self, state):
+        state.open = True
+        metrics.incr('crawl_circuits_opened')
+        error = CircuitOpenError(f"{state.key}: skipped after {state.failures} consecutive failures")
+        while state.waiting:
+            future = state.waiting.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+    # robots.txt
+
+    async def _robots_for(self, url):
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc.lower()}"
+        task = self._robots.get(origin)
+        if task is None:
+            task = self._robots[origin] = asyncio.ensure_future(self._fetch_robots(origin))
+        return await asyncio.shield(task)  # Shared by every request to the site
+
+    async def _fetch_robots(self, origin):
+        """Parsed robots.txt of a site, or None when it has none (or can't be read)"""
+        robots_url = origin + '/robots.txt'
+        state = self.domain(origin)
+        try:
+            async with self._slot(state) as ticket:
+                kwargs = {'retries': 0, 'timeout': ROBOTS_TIMEOUT, 'follow_redirects': True,
+                          'max_bytes': ROBOTS_MAX_BYTES}
+                if self.cache is not None:
+                    response = await acached_get(robots_url, self.cache, **kwargs)
+                else:
+                    response = await arequest('GET', robots_url, **kwargs)
+                ticket.record(response)
+        except httpx.HTTPError:
+            return None  # Unreachable: the breaker deals with the site itself
+        if response.status_code != 200:
+            return None  # 4xx: no rules; 5xx: counted as a failure above
+
+        lines = response.text.splitlines()
+        rules = RobotFileParser(robots_url)
+        rules.parse(lines)
+        crawl_delay = robots_crawl_delay(lines, Config.CRAWL_USER_AGENT)
+        rate = rules.request_rate(Config.CRAWL_USER_AGENT)
+        if rate and rate.requests:
+            crawl_delay = max(float(crawl_delay or 0), rate.seconds / rate.requests)
+        if crawl_delay:
+            state.crawl_delay = max(state.crawl_delay, min(float(crawl_delay), self.max_delay))
+        return rules
+
+    async def aclose(self):
+        """Stop the dispatcher and pending robots.txt fetches"""
+        tasks = [task for task in [self._dispatcher] + list(self._robots.values())
+                 if task is not None and not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self):
+        domains = self._domains.values()
+        return {
+            'domains': len(self._domains),
+            'requests': sum(state.requests for state in domains),
+            'throttled': sum(state.throttled for state in domains),
+            'open_circuits': sorted(state.key for state in domains if state.open),
+            'disallowed': self.disallowed,
+        }
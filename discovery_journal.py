@@ -0,0 +1,110 @@
+"""
+Checkpoint journal for website discovery runs.
+
+Every finished company is appended to a JSON-lines journal as soon as its
+check completes, so a crash or Ctrl-C loses at most the checks in flight.
+Incremental runs read the journal back and only re-check companies that
+are new, failed last time, or were checked longer ago than a configured age.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+from config import Config
+from check_rss_news import normalize_url
+
+
+class DiscoveryJournal:
+    """Append-only record of discovery results, latest entry per company wins"""
+
+    def __init__(self, path=None):
+        self.path = path or Config.DISCOVERY_JOURNAL_PATH
+        self.entries = {}
+        self._lines = 0
+        self._file = None
+        self.load()
+
+    @staticmethod
+    def key(company, webpage):
+        """A company is identified by name and website, so a changed website counts as new"""
+        return f"{str(company).strip()}|{normalize_url(webpage) or ''}"
+
+    def load(self):
+        self.entries = {}
+        self._lines = 0
+        if not self.path.exists():
+            return self.entries
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Torn last line from an interrupted write
+                self.entries[entry['key']] = entry
+                self._lines += 1
+        return self.entries
+
+    def get(self, company, webpage):
+        return self.entries.get(self.key(company, webpage))
+
+    def needs_check(self, company, webpage, max_age_days=None):
+        """True if the company is new, failed last time, or its result is too old"""
+        max_age_days = Config.DISCOVERY_MAX_AGE_DAYS if max_age_days is None else max_age_days
+        entry = self.get(company, webpage)
+        if entry is None or entry.get('error'):
+            return True
+        checked_at = datetime.fromisoformat(entry['checked_at'])
+        return datetime.now() - checked_at > timedelta(days=max_age_days)
+
+    def record(self, company, webpage, rss_url, news_url, error=None):
+        """Checkpoint one finished company (flushed to disk immediately)"""
+        entry = {
+            'key': self.key(company, webpage),
+            'company': str(company),
+            'rss_url': rss_url,
+            'news_url': news_url,
+            'error': error,
+            'checked_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.entries[entry['key']] = entry
+        self._lines += 1
+
+    def merge(self, entries):
+        """
+        Take over entries of another journal (e.g. a shard's): the later check
+        wins, ties keep the entry already here. Call compact(force=True) to
+        write the result. Returns how many entries were taken over.
+        """
+        taken = 0
+        for entry in entries:
+            current = self.entries.get(entry['key'])
+            if current is None or entry['checked_at'] > current['checked_at']:
+                self.entries[entry['key']] = entry
+                self._lines += 1
+                taken += 1
+        return taken
+
+    def compact(self, force=False):
+        """Rewrite the journal with one line per company (sorted) once it has grown stale lines"""
+        if not force and self._lines <= 2 * len(self.entries):
+            return
+        self.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for key in sorted(self.entries):
+                f.write(json.dumps(self.entries[key], ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self.path)
+        self._lines = len(self.entries)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
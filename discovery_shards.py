@@ -0,0 +1,186 @@
+"""
+Sharded website discovery for very large company lists.
+
+A single process checking tens of thousands of websites is bound to one
+core (HTML parsing, feed probing, scheduling), however much of the time is
+spent waiting on the network. A sharded run splits the companies by a
+stable hash of their registrable domain into N shards:
+
+- every domain lives in exactly one shard, so that shard's CrawlScheduler
+  sees all requests to it: per-host limits, adaptive delays, robots.txt
+  and circuit breakers stay correct without coordination between workers
+- each shard checkpoints into its own journal and HTTP cache next to the
+  main ones (discovery_journal.shard-2-of-4.jsonl, ...), so shards never
+  write the same file and can run as local worker processes or on
+  separate machines that share the news_cache directory; a shard reads
+  the companies without opening the database for writing
+- a shard's cache starts from the main cache's entries for its domains,
+  and merge_shard_caches() folds the shard caches back into the main one,
+  so the cache stays warm when the number of shards changes
+- merge_shards() folds the shard journals into the main journal in a fixed
+  order (later check wins, ties go to the lower shard) and writes it
+  sorted, so the result doesn't depend on which shard finished first;
+  only the merge writes the companies database
+
+    python check_rss_news.py --shards 4             # 4 worker processes, then merge
+    python check_rss_news.py --shards 4 --shard 2   # only shard 2 (e.g. on another machine)
+    python check_rss_news.py --shards 4 --merge     # once every shard has finished
+"""
+
+import hashlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import metrics
+from config import Config
+from check_rss_news import normalize_url
+from crawl_scheduler import domain_key
+from discovery_journal import DiscoveryJournal
+from http_client import run_async
+
+
+def shard_of(webpage, shards):
+    """Shard of a website, from its registrable domain (stable across processes, unlike hash())"""
+    domain = domain_key(normalize_url(webpage) or '')
+    digest = hashlib.blake2b(domain.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % shards
+
+
+def shard_path(path, shard, shards):
+    """discovery_journal.jsonl -> discovery_journal.shard-2-of-4.jsonl"""
+    path = Path(path)
+    return path.with_name(f"{path.stem}.shard-{shard}-of-{shards}{path.suffix}")
+
+
+def split_companies(companies, shards):
+    """(key, company, webpage) tuples -> one list per shard, in input order"""
+    parts = [[] for _ in range(shards)]
+    for company in companies:
+        parts[shard_of(company[2], shards)].append(company)
+    return parts
+
+
+def shard_journal(shard, shards):
+    return DiscoveryJournal(shard_path(Config.DISCOVERY_JOURNAL_PATH, shard, shards))
+
+
+def run_shard(shard, shards, companies, options):
+    """
+    Check one shard's companies into its own journal and HTTP cache.
+    options: concurrency, per_host, host_delay, recheck_days, no_cache,
+    respect_robots (as for async_crawler.check_companies).
+    """
+    from async_crawler import check_companies
+    from http_cache import HTTPCache
+
+    journal = shard_journal(shard, shards)
+    cache = None
+    if not options.get('no_cache'):
+        cache = HTTPCache(shard_path(Config.HTTP_CACHE_PATH, shard, shards))
+        if Config.HTTP_CACHE_PATH.exists():
+            cache.merge(Config.HTTP_CACHE_PATH, lambda url: shard_of(url, shards) == shard)
+
+    def checkpoint(idx, company, webpage, rss_url, news_url, error):
+        journal.record(company, webpage, rss_url, news_url, error)
+
+    started = time.perf_counter()
+    try:
+        run_async(check_companies(
+            companies,
+            concurrency=options.get('concurrency'),
+            per_host=options.get('per_host'),
+            host_delay=options.get('host_delay'),
+            cache=cache,
+            recheck_days=options.get('recheck_days'),
+            on_result=checkpoint,
+            respect_robots=options.get('respect_robots'),
+        ))
+    finally:
+        if cache is not None:
+            cache.close()
+        journal.close()
+
+    errors = sum(1 for _, company, webpage in companies if (journal.get(company, webpage) or {}).get('error'))
+    return {'shard': shard, 'companies': len(companies), 'errors': errors,
+            'seconds': round(time.perf_counter() - started, 1)}
+
+
+def _shard_worker(shard, shards, companies, options):
+    """
+    Worker process entry point: run_shard() with the per-company output going
+    to a log file; the summary carries the worker's metrics under 'metrics'
+    """
+    log_path = shard_path(Config.DISCOVERY_JOURNAL_PATH, shard, shards).with_suffix('.log')
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    metrics.reset()  # A pool worker may run several shards; report each one's own metrics
+    with open(log_path, 'w', encoding='utf-8') as log, redirect_stdout(log):
+        summary = run_shard(shard, shards, companies, options)
+    return {**summary, 'metrics': metrics.snapshot()}
+
+
+def run_shards(companies, shards, options, workers=None):
+    """
+    Check every shard in a worker process (at most `workers` at once); returns
+    summaries in shard order. The workers' metrics are merged into this process.
+    """
+    parts = split_companies(companies, shards)
+    workers = workers or min(shards, os.cpu_count() or 1)
+    print(f"🧩 {len(companies)} companies in {shards} shards "
+          f"({', '.join(str(len(part)) for part in parts)}), {workers} worker processes")
+    print(f"   Per-shard output: {shard_path(Config.DISCOVERY_JOURNAL_PATH, 0, shards).with_suffix('.log')}, ...")
+
+    summaries = []
+    # spawn: workers start clean instead of inheriting the parent's database handles
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = [pool.submit(_shard_worker, shard, shards, part, options)
+                   for shard, part in enumerate(parts) if part]
+        for future in as_completed(futures):
+            summary = future.result()
+            metrics.merge(summary.pop('metrics'))  # Into this process's run report
+            summaries.append(summary)
+            print(f"   ✅ Shard {summary['shard']}: {summary['companies']} companies in {summary['seconds']:.0f}s "
+                  f"({summary['errors']} errors)")
+    return sorted(summaries, key=lambda summary: summary['shard'])
+
+
+def merge_shards(shards, journal):
+    """
+    Fold the journals of all shards into `journal` (the main one), write it
+    and delete the shard journals. Returns the number of entries taken over.
+    """
+    paths = [shard_path(journal.path, shard, shards) for shard in range(shards)]
+    paths = [path for path in paths if path.exists()]
+    if not paths:
+        return 0
+    taken = 0
+    for path in paths:
+        taken += journal.merge(DiscoveryJournal(path).entries.values())
+    journal.compact(force=True)
+    for path in paths:
+        path.unlink()
+    return taken
+
+
+def merge_shard_caches(shards, cache_path=None):
+    """
+    Fold the HTTP caches of all shards into the main cache and delete them.
+    Returns the number of cache rows taken over.
+    """
+    from http_cache import HTTPCache
+
+    cache_path = cache_path or Config.HTTP_CACHE_PATH
+    paths = [shard_path(cache_path, shard, shards) for shard in range(shards)]
+    paths = [path for path in paths if path.exists()]
+    if not paths:
+        return 0
+    taken = 0
+    with HTTPCache(cache_path) as cache:
+        for path in paths:
+            taken += cache.merge(path)
+    for path in paths:
+        path.unlink()
+    return taken
@@ -0,0 +1,206 @@
+"""
+Single-pass formatted Excel writer.
+
+Writes a DataFrame straight into the final workbook: column widths, text
+wrapping and clickable URLs are applied while the rows are streamed out,
+with one shared style object per kind of cell. This replaces the old
+to_excel() + load_workbook() + cell-by-cell formatting + save() cycle.
+
+Engines:
+- xlsxwriter: constant-memory mode, fastest (used when installed)
+- openpyxl:   write-only mode with named styles (always available)
+"""
+
+import importlib.util
+import math
+from datetime import date, datetime
+
+from config import Config
+
+ENGINES = ('xlsxwriter', 'openpyxl')
+
+# Column widths for companies.xlsx and companies_news.xlsx
+COLUMN_WIDTHS = {
+    'Company': 25,
+    'Type': 20,
+    'Country': 15,
+    'Webpage': 40,
+    'Description': 70,
+    'Primary Materials': 50,
+    'Market Segments': 50,
+    'Status': 12,
+    'Publicly Listed': 15,
+    'Stock Ticker': 15,
+    'Date Added': 15,
+    'RSS Feed URL': 50,
+    'News Section URL': 50,
+    'Company matched': 20,
+    'Publishing Date': 15,
+    'Headline': 50,
+    'Category': 20,
+    'Source URL (company)': 40,
+    'Source URL (other)': 40,
+    'Week': 12,
+}
+
+WRAP_COLUMNS = {'Description', 'Primary Materials', 'Market Segments', 'Headline'}
+
+URL_COLUMNS = {'Webpage', 'RSS Feed URL', 'News Section URL', 'Source URL (company)', 'Source URL (other)'}
+
+LINK_COLOR = '0563C1'
+
+# Excel refuses more hyperlinks per sheet / longer link targets than this
+MAX_HYPERLINKS = 65530
+MAX_URL_LENGTH = 2079
+
+
+def engine_installed(engine):
+    return importlib.util.find_spec(engine) is not None
+
+
+def get_engine(name=None):
+    """Resolve 'auto' (or None) to the fastest installed engine"""
+    name = name or Config.EXCEL_ENGINE
+    if name == 'auto':
+        return next(engine for engine in ENGINES if engine_installed(engine))
+    if name not in ENGINES:
+        raise ValueError(f"Unknown Excel engine: {name} (choose from auto, {', '.join(ENGINES)})")
+    return name
+
+
+def link_target(value):
+    """Hyperlink target for a URL cell ('example.com' -> 'https://example.com')"""
+    url = str(value).strip()
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return url
+
+
+def _value(value):
+    """Plain Python value for a cell (None for NaN/NaT)"""
+    if value is None:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if hasattr(value, 'to_pydatetime'):
+        try:
+            return value.to_pydatetime()
+        except ValueError:  # NaT
+            return None
+    if hasattr(value, 'item'):  # numpy scalars
+        return value.item()
+    return value
+
+
+def _column_kinds(columns):
+    return ['url' if column in URL_COLUMNS else 'wrap' if column in WRAP_COLUMNS else None
+            for column in columns]
+
+
+def _write_xlsxwriter(df, filename, sheet_name):
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(filename, {'constant_memory': True, 'strings_to_urls': False})
+    worksheet = workbook.add_worksheet(sheet_name)
+    formats = {
+        'header': workbook.add_format({'bold': True}),
+        'wrap': workbook.add_format({'text_wrap': True, 'valign': 'top'}),
+        'url': workbook.add_format({'font_color': f'#{LINK_COLOR}', 'underline': 1}),
+        'date': workbook.add_format({'num_format': 'yyyy-mm-dd'}),
+    }
+
+    columns = [str(column) for column in df.columns]
+    for idx, column in enumerate(columns):
+        if column in COLUMN_WIDTHS:
+            worksheet.set_column(idx, idx, COLUMN_WIDTHS[column])
+    for idx, column in enumerate(columns):
+        worksheet.write_string(0, idx, column, formats['header'])
+
+    kinds = _column_kinds(columns)
+    links = 0
+    for row_idx, row in enumerate(df.itertuples(index=False, name=None), 1):
+        for idx, raw in enumerate(row):
+            value = _value(raw)
+            if value is None:
+                continue
+            kind = kinds[idx]
+            if isinstance(value, bool):
+                worksheet.write_boolean(row_idx, idx, value)
+            elif isinstance(value, (int, float)):
+                worksheet.write_number(row_idx, idx, value)
+            elif isinstance(value, (datetime, date)):
+                worksheet.write_datetime(row_idx, idx, value, formats['date'])
+            elif kind == 'url' and str(value).strip() and links < MAX_HYPERLINKS \
+                    and len(link_target(value)) <= MAX_URL_LENGTH:
+                worksheet.write_url(row_idx, idx, link_target(value), formats['url'], str(value))
+                links += 1
+            else:
+                worksheet.write_string(row_idx, idx, str(value), formats.get(kind))
+
+    workbook.close()
+
+
+def _write_openpyxl(df, filename, sheet_name):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, NamedStyle
+    from openpyxl.utils import get_column_letter
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+    styles = {
+        'header': NamedStyle('header', font=Font(bold=True)),
+        'wrap': NamedStyle('wrap', alignment=Alignment(wrap_text=True, vertical='top')),
+        'url': NamedStyle('url', font=Font(color=LINK_COLOR, underline='single')),
+        'date': NamedStyle('date', number_format='yyyy-mm-dd'),
+    }
+    for style in styles.values():
+        workbook.add_named_style(style)
+
+    columns = [str(column) for column in df.columns]
+    for idx, column in enumerate(columns, 1):
+        if column in COLUMN_WIDTHS:
+            worksheet.column_dimensions[get_column_letter(idx)].width = COLUMN_WIDTHS[column]
+
+    def cell(value, style=None):
+        c = WriteOnlyCell(worksheet, value)
+        if style:
+            c.style = style
+        return c
+
+    worksheet.append([cell(column, 'header') for column in columns])
+
+    kinds = _column_kinds(columns)
+    links = 0
+    for row in df.itertuples(index=False, name=None):
+        cells = []
+        for idx, raw in enumerate(row):
+            value = _value(raw)
+            kind = kinds[idx]
+            if value is None or isinstance(value, (bool, int, float)):
+                cells.append(value)
+            elif isinstance(value, (datetime, date)):
+                cells.append(cell(value, 'date'))
+            elif kind == 'url' and str(value).strip() and links < MAX_HYPERLINKS \
+                    and len(link_target(value)) <= MAX_URL_LENGTH:
+                c = cell(str(value), 'url')
+                c.hyperlink = link_target(value)
+                cells.append(c)
+                links += 1
+            elif kind == 'wrap':
+                cells.append(cell(str(value), 'wrap'))
+            else:
+                cells.append(value)
+        worksheet.append(cells)
+
+    workbook.save(filename)
+
+
+def write_formatted_excel(df, filename, engine=None, sheet_name='Sheet1'):
+    """Write df to filename as a finished, formatted workbook in one pass"""
+    engine = get_engine(engine)
+    if engine == 'xlsxwriter':
+        _write_xlsxwriter(df, filename, sheet_name)
+    else:
+        _write_openpyxl(df, filename, sheet_name)
+    return filename
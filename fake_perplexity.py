@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Perplexity chat/completions endpoint.
+
+Answers POSTs in the same shape as the real API, both as one JSON body
+and, for "stream": true, as a server-sent-event stream of delta chunks
+ending in "data: [DONE]". By default every company gets generated news
+items dated today; --replay serves the content of a saved response
+(e.g. test_response.json) instead.
+
+Usage:
+    python fake_perplexity.py --port 8766 --latency 0.5 --chunk-delay 0.02
+    PERPLEXITY_API_URL=http://127.0.0.1:8766/chat/completions python news_fetcher.py --stream
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPANY_RE = re.compile(r'news about (.+?) bioplastics company')
+BATCH_RE = re.compile(r'each of these bioplastics companies:\s*((?:\s*- .+\n)+)')
+
+
+TOPICS = [
+    ('opens a new compounding line', 'The plant adds capacity for compostable packaging grades.'),
+    ('signs a supply partnership', 'The agreement covers multi-year deliveries of bio-based resin to converters.'),
+    ('raises growth funding', 'Investors back the expansion of its fermentation platform and pilot facility.'),
+    ('launches a home-compostable film', 'The new film targets flexible food packaging and certified organic recycling.'),
+    ('publishes quarterly results', 'Revenue grew on demand from textiles, agriculture and consumer goods customers.'),
+]
+
+# Filler vocabulary so generated items don't look like near-duplicates of each other
+DETAIL_WORDS = ('PLA PHA PBS PBAT starch cellulose lignin biomass sugarcane corn cassava algae seaweed '
+                'fermentation extrusion injection moulding thermoforming blown film fibre nonwoven coating '
+                'foam bottle cup cutlery mulch capsule label tray pouch certification tonnes pilot scale '
+                'Europe Asia Americas Italy Germany Thailand Brazil Japan Netherlands France India').split()
+
+
+def generate_items(company, items_per_company=3):
+    slug = re.sub(r'[^a-z0-9]+', '-', company.lower()).strip('-')
+    today = datetime.now().date().isoformat()
+    offset = sum(map(ord, company))
+    items = []
+    for n in range(1, items_per_company + 1):
+        action, detail = TOPICS[(offset + n) % len(TOPICS)]
+        words = ' '.join(random.Random(f"{company}|{n}").sample(DETAIL_WORDS, 12))
+        items.append({
+            'company': company,
+            'headline': f"{company} {action} (update {n})",
+            'summary': f"{detail} Focus: {words}.",
+            'date': today,
+            'url': f"https://news.example.com/{slug}/{n}",
+        })
+    return items
+
+
+def generate_content(prompt, items_per_company=3):
+    """A JSON-array answer for the company (or batch of companies) named in a news query"""
+    batch = BATCH_RE.search(prompt)
+    if batch:
+        companies = [line.strip()[2:].strip() for line in batch.group(1).splitlines() if line.strip()]
+        items = [item for company in companies for item in generate_items(company, items_per_company)]
+    else:
+        match = COMPANY_RE.search(prompt)
+        items = generate_items(match.group(1) if match else 'Unknown', items_per_company)
+    return json.dumps(items, indent=2)
+
+
+class FakePerplexityServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # Many concurrent benchmark calls connect at once
+
+
+class FakePerplexityHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FakePerplexity/1.0'
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        settings = self.server.settings
+        payload = json.loads(self.rfile.read(int(self.headers.get('content-length', 0))) or b'{}')
+
+        with self.server.lock:
+            self.server.requests += 1
+            number = self.server.requests
+        if settings['rate_limit_every'] and number % settings['rate_limit_every'] == 0:
+            self._send_json(429, {'error': 'rate limited'}, {'Retry-After': str(settings['retry_after'])})
+            return
+
+        time.sleep(settings['latency'])
+
+        prompt = ' '.join(m.get('content', '') for m in payload.get('messages', []))
+        content = settings['replay_content'] or generate_content(prompt, settings['items'])
+        usage = {
+            'prompt_tokens': len(prompt) // 4,
+            'completion_tokens': len(content) // 4,
+            'total_tokens': len(prompt) // 4 + len(content) // 4,
+        }
+        response_id = str(uuid.uuid4())
+        model = payload.get('model', 'sonar')
+
+        if not payload.get('stream'):
+            self._send_json(200, {
+                'id': response_id, 'model': model, 'created': int(time.time()), 'usage': usage,
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': content}}],
+            })
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        size = settings['chunk_size']
+        for start in range(0, len(content), size):
+            chunk = {'id': response_id, 'model': model, 'created': int(time.time()),
+                     'choices': [{'index': 0, 'delta': {'content': content[start:start + size]}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+            time.sleep(settings['chunk_delay'])
+
+        final = {'id': response_id, 'model': model, 'usage': usage,
+                 'choices': [{'index': 0, 'finish_reason': 'stop', 'delta': {}}]}
+        self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def make_server(host='127.0.0.1', port=0, latency=0.0, chunk_delay=0.0, chunk_size=24, items=3,
+                replay=None, rate_limit_every=0, retry_after=1):
+    """Create (but don't start) a stand-in server; port 0 picks a free port"""
+    replay_content = None
+    if replay:
+        with open(replay, encoding='utf-8') as f:
+            replay_content = json.load(f)['choices'][0]['message']['content']
+
+    server = FakePerplexityServer((host, port), FakePerplexityHandler)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.settings = {
+        'latency': latency,
+        'chunk_delay': chunk_delay,
+        'chunk_size': chunk_size,
+        'items': items,
+        'replay_content': replay_content,
+        'rate_limit_every': rate_limit_every,
+        'retry_after': retry_after,
+    }
+    return server
+
+
+def start_in_thread(**kwargs):
+    """Start a stand-in server in a background thread; returns (server, url)"""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/chat/completions"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Perplexity chat/completions API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds before the first byte")
+    parser.add_argument('--chunk-delay', type=float, default=0.0, help="Seconds between streamed chunks")
+    parser.add_argument('--chunk-size', type=int, default=24, help="Characters per streamed chunk")
+    parser.add_argument('--items', type=int, default=3, help="Generated news items per company")
+    parser.add_argument('--replay', help="Serve the content of a saved response JSON instead")
+    parser.add_argument('--rate-limit-every', type=int, default=0, help="Answer every Nth request with 429")
+    parser.add_argument('--retry-after', type=float, default=1, help="Retry-After seconds sent with 429s")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency, args.chunk_delay, args.chunk_size,
+                         args.items, args.replay, args.rate_limit_every, args.retry_after)
+    print(f"Fake Perplexity API on http://{args.host}:{args.port}/chat/completions")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for company websites, for offline benchmarks.
+
+Serves a synthetic corpus of company sites named company-00000.example,
+company-00001.example, ... Each site gets a fixed mix of features, drawn
+from its index, so every run sees the same corpus:
+
+- homepages with or without a feed <link> and a news link, a feed at a
+  common path only, news sections listed in sitemaps only
+- robots.txt with Sitemap: lines, sitemap.xml, RSS feeds, news pages
+- redirects to www., large pages, slow hosts, hosts that answer 429 once
+  and dead hosts that only return 503
+
+Clients reach the sites through the server as an HTTP proxy, so each site
+keeps its own hostname (and its own crawl-scheduler domain):
+
+    python fake_web.py --port 8768
+    HTTP_PROXY=http://127.0.0.1:8768 NO_PROXY=127.0.0.1,localhost python check_rss_news.py
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+DOMAIN_SUFFIX = '.example'
+
+# Share of sites with each feature
+FEATURE_SHARES = {
+    'feed_link': 0.4,  # <link rel="alternate" type="application/rss+xml"> on the homepage
+    'feed_path': 0.2,  # No <link>, but /feed answers (found by probing)
+    'news_link': 0.5,  # Homepage links to /news/
+    'sitemap': 0.5,  # robots.txt lists a sitemap with news articles
+    'redirect': 0.1,  # example.com -> www.example.com
+    'large': 0.03,  # Homepage of several MB
+    'slow': 0.05,  # Every response is delayed
+    'throttled': 0.03,  # First request gets 429 + Retry-After
+    'dead': 0.02,  # Only 503s
+}
+
+LARGE_PAGE_BYTES = 3 * 1024 * 1024
+ARTICLES_PER_SITE = 12
+
+
+def company_domain(index):
+    return f"company-{index:05d}{DOMAIN_SUFFIX}"
+
+
+def company_name(index):
+    return f"Bench Bioplastics {index:05d}"
+
+
+def site_features(index, seed=0):
+    """The fixed feature set of site number index"""
+    rng = random.Random(f"{seed}|{index}")
+    return {feature for feature, share in FEATURE_SHARES.items() if rng.random() < share}
+
+
+def site_index(host):
+    """company-00042.example / www.company-00042.example -> 42 (None for other hosts)"""
+    host = host.split(':')[0].lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if not (host.startswith('company-') and host.endswith(DOMAIN_SUFFIX)):
+        return None
+    try:
+        return int(host[len('company-'):-len(DOMAIN_SUFFIX)])
+    except ValueError:
+        return None
+
+
+def article_dates(index, now=None):
+    now = now or datetime.now(timezone.utc)
+    return [now - timedelta(days=3 * n + index % 3) for n in range(ARTICLES_PER_SITE)]
+
+
+def homepage(index, features, host):
+    name = company_name(index)
+    head = f"<title>{name}</title>"
+    if 'feed_link' in features:
+        head += f'<link rel="alternate" type="application/rss+xml" href="http://{host}/feed.xml">'
+    nav = '<a href="/products/">Products</a> <a href="/about/">About us</a> <a href="/contact/">Contact</a>'
+    if 'news_link' in features:
+        nav += ' <a href="/news/">Newsroom</a>'
+    products = ''.join(f'<li><a href="/products/grade-{n}">Grade {n}</a></li>' for n in range(60))
+    text = f"<p>{name} develops compostable PLA and PHA compounds for packaging and agriculture.</p>" * 40
+    page = f"<!DOCTYPE html><html><head>{head}</head><body><nav>{nav}</nav><ul>{products}</ul>{text}"
+    if 'large' in features:
+        filler = '<div class="gallery"><img src="/img/x.jpg" alt="product"></div>\n'
+        page += filler * (LARGE_PAGE_BYTES // len(filler))
+    return page + "</body></html>"
+
+
+def feed_xml(index, host):
+    items = ''.join(
+        f"<item><title>{company_name(index)} update {n}</title><link>http://{host}/news/update-{n}</link>"
+        f"<guid>{host}-{n}</guid><pubDate>{format_datetime(date)}</pubDate>"
+        f"<description>Update {n} on bio-based resin capacity and partnerships.</description></item>"
+        for n, date in enumerate(article_dates(index)))
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>{company_name(index)}</title>{items}</channel></rss>'
+
+
+def sitemap_xml(index, host):
+    urls = ''.join(f"<url><loc>http://{host}/products/grade-{n}</loc></url>" for n in range(60))
+    urls += ''.join(f"<url><loc>http://{host}/en/press-releases/update-{n}</loc>"
+                    f"<lastmod>{date.date().isoformat()}</lastmod></url>"
+                    for n, date in enumerate(article_dates(index)))
+    return f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+
+
+class FakeWebServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # Hundreds of benchmark connections arrive at once
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):  # Clients hang up on large pages
+            super().handle_error(request, client_address)
+
+
+class FakeWebHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FakeWeb/1.0'
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        # Proxy requests carry the full URL ('GET http://company-00001.example/ HTTP/1.1')
+        parts = urlsplit(self.path)
+        host = parts.netloc or self.headers.get('Host', '')
+        path = parts.path or '/'
+        index = site_index(host)
+        if index is None:
+            self._send(404, 'Unknown site')
+            return
+
+        settings = self.server.settings
+        features = site_features(index, settings['seed'])
+        with self.server.lock:
+            self.server.requests += 1
+            first_visit = host not in self.server.visited
+            self.server.visited.add(host)
+
+        if 'dead' in features:
+            self._send(503, 'Service unavailable')
+            return
+        if 'throttled' in features and first_visit:
+            self._send(429, 'Too many requests', headers={'Retry-After': str(settings['retry_after'])})
+            return
+        if 'slow' in features:
+            time.sleep(settings['slow_latency'])
+        if 'redirect' in features and not host.startswith('www.'):
+            self._send(301, '', headers={'Location': f"http://www.{host}{path}"})
+            return
+
+        if path == '/':
+            self._send(200, homepage(index, features, host))
+        elif path == '/robots.txt':
+            if 'sitemap' in features:
+                self._send(200, f"User-agent: *\nDisallow: /admin/\nSitemap: http://{host}/sitemap.xml\n",
+                           'text/plain')
+            else:
+                self._send(404, 'Not found')
+        elif path == '/sitemap.xml' and 'sitemap' in features:
+            self._send(200, sitemap_xml(index, host), 'application/xml')
+        elif (path == '/feed.xml' and 'feed_link' in features) or (path == '/feed' and 'feed_path' in features):
+            self._send(200, feed_xml(index, host), 'application/rss+xml')
+        elif path.startswith(('/news/', '/products/', '/about/', '/contact/', '/en/press-releases/')):
+            self._send(200, f"<html><body><h1>{company_name(index)}</h1><p>{path}</p></body></html>")
+        else:
+            self._send(404, 'Not found')
+
+    def _send(self, status, body, content_type='text/html; charset=utf-8', headers=None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(data)
+
+
+def make_server(host='127.0.0.1', port=0, seed=0, slow_latency=1.0, retry_after=1.0):
+    """Create (but don't start) a stand-in server; port 0 picks a free port"""
+    server = FakeWebServer((host, port), FakeWebHandler)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.visited = set()
+    server.settings = {'seed': seed, 'slow_latency': slow_latency, 'retry_after': retry_after}
+    return server
+
+
+def start_in_thread(**kwargs):
+    """Start a stand-in server in a background thread; returns (server, proxy_url)"""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for company websites (use it as HTTP proxy)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8768)
+    parser.add_argument('--seed', type=int, default=0, help="Changes which sites get which features")
+    parser.add_argument('--slow-latency', type=float, default=1.0, help="Delay of slow hosts (seconds)")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.seed, args.slow_latency, args.retry_after)
+    print(f"Fake company sites via proxy http://{args.host}:{args.port} "
+          f"(company-00000{DOMAIN_SUFFIX}, company-00001{DOMAIN_SUFFIX}, ...)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
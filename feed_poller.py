@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+RSS/Atom feed poller.
+
+Reads the feeds that check_rss_news.py discovered (the RSS Feed URL
+column) concurrently and turns new entries into news items, so companies
+with a feed don't need a paid Perplexity call.
+
+- Conditional GETs: the ETag / Last-Modified of the last poll are sent
+  back, an unchanged feed costs a 304; requests go through http_client
+  (retries, metrics) under the same CrawlScheduler as website discovery
+- Streaming parse: the body is fed chunk by chunk into an incremental XML
+  parser; entries are handled (and freed) as they close, and a newest-first
+  feed stops downloading once it reaches entries that were seen before
+- High-water mark: per feed, the newest entry timestamp and recent entry
+  ids, so only entries newer than the last poll are emitted
+- Adaptive schedule: each feed is polled about twice per typical gap
+  between its entries, backing off when nothing changes or it fails;
+  companies whose feed failed are reported so their news can come from
+  Perplexity instead
+
+Usage:
+    python feed_poller.py            # poll the feeds that are due
+    python feed_poller.py --force    # poll every feed now
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sqlite3
+import statistics
+import time
+import xml.etree.ElementTree as ET
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from html import unescape
+
+import httpx
+
+from config import Config
+from http_client import astream
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS feeds (
+    url TEXT PRIMARY KEY,
+    company TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    high_water REAL,
+    seen TEXT,
+    interval REAL NOT NULL,
+    next_poll REAL NOT NULL,
+    last_polled REAL,
+    last_new REAL,
+    failures INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS feeds_next_poll ON feeds (next_poll);
+"""
+
+ENTRY_TAGS = {'item', 'entry'}
+SEEN_IDS_KEPT = 200  # Entry ids remembered per feed (for undated entries and timestamp ties)
+OLD_STREAK_STOP = 3  # Consecutive already-seen entries after which a newest-first feed stops downloading
+SUMMARY_CHARS = 600
+
+
+def _local(tag):
+    """'{http://www.w3.org/2005/Atom}entry' -> 'entry'"""
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+
+def parse_timestamp(text):
+    """Unix timestamp of an RFC 822 (RSS) or ISO 8601 (Atom) date, or None"""
+    text = (text or '').strip()
+    if not text:
+        return None
+    for parse in (parsedate_to_datetime, datetime.fromisoformat):
+        try:
+            parsed = parse(text)
+        except (TypeError, ValueError, IndexError):
+            continue
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    return None
+
+
+def strip_html(text):
+    text = unescape(re.sub(r'<[^>]+>', ' ', text or ''))
+    text = ' '.join(text.split())
+    return text if len(text) <= SUMMARY_CHARS else text[:SUMMARY_CHARS].rsplit(' ', 1)[0] + '…'
+
+
+def parse_entry(elem):
+    """An RSS <item> / Atom <entry> element as a dict"""
+    entry = {'title': '', 'link': '', 'summary': '', 'timestamp': None, 'id': ''}
+    for child in elem:
+        name = _local(child.tag)
+        text = (child.text or '').strip()
+        if name == 'title':
+            entry['title'] = strip_html(text)
+        elif name == 'link':
+            href = child.get('href')
+            if href is None:
+                entry['link'] = entry['link'] or text
+            elif child.get('rel', 'alternate') == 'alternate' or not entry['link']:
+                entry['link'] = href.strip()
+        elif name in ('description', 'summary') or (name in ('content', 'encoded') and not entry['summary']):
+            entry['summary'] = strip_html(text)
+        elif name in ('pubDate', 'published', 'date', 'updated', 'issued', 'modified'):
+            # Prefer the publication date over the update date
+            if entry['timestamp'] is None or name in ('pubDate', 'published', 'issued'):
+                entry['timestamp'] = parse_timestamp(text) or entry['timestamp']
+        elif name in ('guid', 'id'):
+            entry['id'] = text
+    entry['id'] = entry['id'] or entry['link'] or entry['title']
+    return entry
+
+
+class FeedParser:
+    """Incremental RSS/Atom parser: feed() bytes, get back the entries that closed"""
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=('end',))
+
+    def feed(self, data):
+        self._parser.feed(data)
+        entries = []
+        for _, elem in self._parser.read_events():
+            if _local(elem.tag) in ENTRY_TAGS:
+                entries.append(parse_entry(elem))
+                elem.clear()  # Keep memory flat on large feeds
+        return entries
+
+
+def next_interval(previous, new_count, timestamps):
+    """
+    Seconds until the next poll: half the median gap between the feed's
+    recent entries when it has dated entries, otherwise halve/grow the
+    previous interval depending on whether anything new arrived.
+    """
+    low = Config.FEED_MIN_INTERVAL_HOURS * 3600
+    high = Config.FEED_MAX_INTERVAL_HOURS * 3600
+    recent = sorted(timestamps, reverse=True)[:10]
+    gaps = [a - b for a, b in zip(recent, recent[1:]) if a > b]
+    if gaps:
+        interval = statistics.median(gaps) / 2
+        if not new_count:
+            interval = max(interval, previous * 1.5)
+    else:
+        interval = previous / 2 if new_count else previous * 1.5
+    return min(high, max(low, interval))
+
+
+class FeedStore:
+    """SQLite-backed per-feed polling state"""
+
+    def __init__(self, path=None):
+        self.path = path or Config.FEED_STATE_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path))
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, url, company=None):
+        """State dict of a feed (a fresh, immediately due one if it was never polled)"""
+        row = self._db.execute("SELECT * FROM feeds WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return {'url': url, 'company': company, 'etag': None, 'last_modified': None, 'high_water': None,
+                    'seen': [], 'interval': Config.FEED_DEFAULT_INTERVAL_HOURS * 3600, 'next_poll': 0,
+                    'last_polled': None, 'last_new': None, 'failures': 0, 'last_error': None}
+        state = dict(row)
+        state['seen'] = json.loads(state['seen'] or '[]')
+        state['company'] = company or state['company']
+        return state
+
+    def save(self, state):
+        row = dict(state, seen=json.dumps(state['seen'][:SEEN_IDS_KEPT]))
+        columns = ', '.join(row)
+        self._db.execute(f"INSERT OR REPLACE INTO feeds ({columns}) VALUES ({', '.join('?' for _ in row)})",
+                         list(row.values()))
+        self._db.commit()
+
+
+def is_new(entry, state):
+    if entry['id'] in state['seen']:
+        return False
+    high_water = state['high_water']
+    return high_water is None or entry['timestamp'] is None or entry['timestamp'] >= high_water
+
+
+def entry_to_item(entry, company):
+    """News item in the shape news_fetcher produces"""
+    date = ''
+    if entry['timestamp'] is not None:
+        date = datetime.fromtimestamp(entry['timestamp'], timezone.utc).date().isoformat()
+    return {
+        'company': company,
+        'headline': entry['title'],
+        'summary': entry['summary'],
+        'date': date,
+        'url': entry['link'],
+    }
+
+
+async def poll_feed(state, limiter=None, client=None):
+    """
+    Poll one feed and update its state in place.
+    Returns (status, new_entries) with status 'new', 'unchanged',
+    'not-modified' or 'error'.
+    """
+    headers = {'User-Agent': Config.CRAWL_USER_AGENT}
+    if state['etag']:
+        headers['If-None-Match'] = state['etag']
+    if state['last_modified']:
+        headers['If-Modified-Since'] = state['last_modified']
+
+    now = time.time()
+    state['last_polled'] = now
+    new_entries, timestamps = [], []
+    try:
+        async with limiter.slot(state['url']) if limiter is not None else nullcontext() as ticket:
+            async with astream('GET', state['url'], client=client, headers=headers,
+                               timeout=Config.HTTP_TIMEOUT, follow_redirects=True) as response:
+                if ticket is not None:
+                    ticket.record(response)
+                if response.status_code == 304:
+                    status = 'not-modified'
+                else:
+                    response.raise_for_status()
+                    state['etag'] = response.headers.get('etag')
+                    state['last_modified'] = response.headers.get('last-modified')
+
+                    parser = FeedParser()
+                    size, old_streak, previous_ts, newest_first = 0, 0, None, True
+                    async for chunk in response.aiter_bytes():
+                        size += len(chunk)
+                        for entry in parser.feed(chunk):
+                            if entry['timestamp'] is not None:
+                                timestamps.append(entry['timestamp'])
+                                if previous_ts is not None and entry['timestamp'] > previous_ts:
+                                    newest_first = False
+                                previous_ts = entry['timestamp']
+                            if is_new(entry, state):
+                                new_entries.append(entry)
+                                old_streak = 0
+                            else:
+                                old_streak += 1
+                        if size > Config.FEED_MAX_BYTES:
+                            break
+                        if newest_first and state['high_water'] is not None and old_streak >= OLD_STREAK_STOP:
+                            break  # Everything further down is older still
+                    status = 'new' if new_entries else 'unchanged'
+    except (httpx.HTTPError, ET.ParseError) as e:
+        state['failures'] += 1
+        state['last_error'] = (str(e) or type(e).__name__).splitlines()[0]
+        state['interval'] = min(Config.FEED_MAX_INTERVAL_HOURS * 3600, state['interval'] * 2)
+        state['next_poll'] = now + state['interval']
+        return 'error', []
+
+    if timestamps:
+        state['high_water'] = max([state['high_water'] or 0] + timestamps)
+    if new_entries:
+        state['last_new'] = now
+        state['seen'] = [entry['id'] for entry in new_entries] + state['seen']
+    state['failures'] = 0
+    state['last_error'] = None
+    state['interval'] = next_interval(state['interval'], len(new_entries), timestamps)
+    state['next_poll'] = now + state['interval']
+    return status, new_entries
+
+
+async def poll_feeds(feeds, feed_store, concurrency=None, force=False, limiter=None):
+    """
+    Poll the due feeds of {company: feed_url} concurrently.
+    Returns (items, stats, statuses); items are news items for new entries,
+    stats counts feeds per status plus 'skipped' (not due yet), statuses
+    maps each company to its feed's status. A feed that is not due because
+    it is backing off after a failure counts as 'error' there, so callers
+    can fetch that company's news another way.
+    Without a limiter, the feeds are polled under a CrawlScheduler with the
+    crawler's settings (per-host limits, adaptive delays, robots.txt).
+    """
+    concurrency = concurrency or Config.FEED_CONCURRENCY
+    own_limiter = limiter is None
+    if own_limiter:
+        from crawl_scheduler import CrawlScheduler
+        limiter = CrawlScheduler()
+    semaphore = asyncio.Semaphore(concurrency)
+    now = time.time()
+    stats = {'new': 0, 'unchanged': 0, 'not-modified': 0, 'error': 0, 'skipped': 0}
+    statuses = {}
+    items = []
+
+    async def worker(state):
+        async with semaphore:
+            status, entries = await poll_feed(state, limiter)
+        feed_store.save(state)
+        stats[status] += 1
+        statuses[state['company']] = status
+        items.extend(entry_to_item(entry, state['company']) for entry in entries)
+        if status == 'error':
+            print(f"  ❌ {state['company']}: {state['last_error']}")
+        elif entries:
+            print(f"  + {state['company']}: {len(entries)} new entries")
+
+    due = []
+    for company, url in feeds.items():
+        state = feed_store.get(url, company)
+        if force or state['next_poll'] <= now:
+            due.append(state)
+        else:
+            stats['skipped'] += 1
+            statuses[company] = 'error' if state['failures'] else 'skipped'
+    try:
+        await asyncio.gather(*(worker(state) for state in due))
+    finally:
+        if own_limiter:
+            await limiter.aclose()
+    return items, stats, statuses
+
+
+def print_feed_stats(stats, items):
+    polled = stats['new'] + stats['unchanged'] + stats['not-modified'] + stats['error']
+    print(f"\n📡 Feeds: {polled} polled ({stats['not-modified']} not modified, {stats['error']} failed), "
+          f"{stats['skipped']} not due yet, {len(items)} new entries")
+
+
+def main(argv=None):
+    from http_client import run_async
+    from news_fetcher import filter_recent, save_news
+    from news_store import NewsStore
+
+    parser = argparse.ArgumentParser(description="Poll the discovered RSS/Atom feeds for new entries")
+    parser.add_argument('--force', action='store_true', help="Poll every feed, even if it isn't due yet")
+    parser.add_argument('--concurrency', type=int, default=Config.FEED_CONCURRENCY, help="Feeds polled at once")
+    args = parser.parse_args(argv)
+
+    store = NewsStore()
+    feeds = store.company_feeds()
+    print(f"📡 Polling {len(feeds)} feeds...\n")
+    with FeedStore() as feed_store:
+        items, stats, _ = run_async(poll_feeds(feeds, feed_store, args.concurrency, args.force))
+    added = save_news(filter_recent(items), store)
+    store.close()
+
+    print_feed_stats(stats, items)
+    print(f"✅ {added} new news items stored")
+
+
+if __name__ == '__main__':
+    main()
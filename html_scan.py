@@ -0,0 +1,170 @@
+"""
+Fast HTML scanning for homepage discovery.
+
+- Feed <link> tags are found with a streaming scan that stops at the end
+  of <head>, so the body of heavy pages is never parsed for them.
+- News section links are extracted with the fastest installed parser
+  backend (selectolax, then lxml, then BeautifulSoup's html.parser) and
+  matched against all keywords with a single precompiled regex.
+- The page URL is parsed once per page instead of once per link.
+
+scan_page() returns the same results as check_rss_news.find_feed_links()
+and find_news_section() on a BeautifulSoup tree.
+"""
+
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+from config import Config
+
+NEWS_KEYWORDS = ['news', 'press', 'media', 'blog', 'press-release', 'newsroom',
+                 'announcements', 'updates', 'press-releases']
+
+# Longest first so the alternation never stops at a shorter prefix
+NEWS_KEYWORDS_RE = re.compile('|'.join(re.escape(k) for k in sorted(NEWS_KEYWORDS, key=len, reverse=True)))
+DATE_PATH_RE = re.compile(r'/\d{4}/')
+FEED_TYPE_RE = re.compile(r'application/(rss|atom)\+xml', re.I)
+
+SCAN_CHUNK_SIZE = 8192
+
+
+class _StopScan(Exception):
+    pass
+
+
+class _HeadLinkScanner(HTMLParser):
+    """Collects feed <link> hrefs and stops as soon as <head> is over"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.hrefs = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'link':
+            attrs = dict(attrs)
+            if attrs.get('href') and FEED_TYPE_RE.search(attrs.get('type') or ''):
+                self.hrefs.append(attrs['href'])
+        elif tag == 'body':
+            raise _StopScan
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            raise _StopScan
+
+
+def _decode(content, encoding=None):
+    if isinstance(content, str):
+        return content
+    return content.decode(encoding or 'utf-8', errors='replace')
+
+
+def scan_feed_links(url, content, encoding=None):
+    """Return absolute URLs of feed <link> tags, reading only as far as </head>"""
+    text = _decode(content, encoding)
+    scanner = _HeadLinkScanner()
+    try:
+        for start in range(0, len(text), SCAN_CHUNK_SIZE):
+            scanner.feed(text[start:start + SCAN_CHUNK_SIZE])
+        scanner.close()
+    except _StopScan:
+        pass
+    except Exception:
+        pass  # Malformed markup: keep whatever was found before it
+    return [urljoin(url, href) for href in scanner.hrefs]
+
+
+# Parser backends: each yields (href, link_text) for every <a href>
+
+def _anchors_selectolax(content, encoding=None):
+    from selectolax.lexbor import LexborHTMLParser
+    tree = LexborHTMLParser(_decode(content, encoding))
+    for node in tree.css('a[href]'):
+        yield node.attributes.get('href') or '', node.text() or ''
+
+
+def _anchors_lxml(content, encoding=None):
+    import lxml.html
+    try:
+        doc = lxml.html.fromstring(content)
+    except Exception:  # Empty or unparsable document
+        return
+    for element in doc.iter('a'):
+        href = element.get('href')
+        if href is not None:
+            yield href, element.text_content()
+
+
+def _anchors_html_parser(content, encoding=None):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content, 'html.parser', from_encoding=encoding if isinstance(content, bytes) else None)
+    for link in soup.find_all('a', href=True):
+        yield link.get('href', ''), link.get_text()
+
+
+BACKENDS = {
+    'selectolax': _anchors_selectolax,
+    'lxml': _anchors_lxml,
+    'html.parser': _anchors_html_parser,
+}
+
+
+BACKEND_MODULES = {
+    'selectolax': 'selectolax.lexbor',
+    'lxml': 'lxml.html',
+    'html.parser': 'bs4',
+}
+
+
+def backend_installed(backend):
+    try:
+        __import__(BACKEND_MODULES[backend])
+    except ImportError:
+        return False
+    return True
+
+
+def get_backend(name=None):
+    """Resolve a backend name ('auto' picks the fastest installed one)"""
+    name = name or Config.HTML_PARSER
+    if name == 'auto':
+        if backend_installed('selectolax'):
+            return 'selectolax'
+        if backend_installed('lxml'):
+            return 'lxml'
+        return 'html.parser'
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend: {name} (choose from auto, {', '.join(BACKENDS)})")
+    return name
+
+
+def scan_news_section(url, content, encoding=None, backend=None):
+    """
+    Find the news/press/media section URL on the page.
+    Same rules as check_rss_news.find_news_section(): keyword in href or link
+    text, same host, no date-based paths, shortest URL wins.
+    """
+    anchors = BACKENDS[get_backend(backend)](content, encoding)
+    netloc = urlsplit(url).netloc
+    best = None
+
+    for href, text in anchors:
+        if not (NEWS_KEYWORDS_RE.search(href.lower()) or NEWS_KEYWORDS_RE.search(text.lower())):
+            continue
+        full_url = urljoin(url, href)
+        if urlsplit(full_url).netloc != netloc or DATE_PATH_RE.search(full_url):
+            continue
+        # First of the shortest, like a stable sort by length
+        if best is None or len(full_url) < len(best):
+            best = full_url
+
+    return best
+
+
+def scan_page(url, content, encoding=None, backend=None):
+    """Return (feed_links, news_url) for a downloaded homepage"""
+    return (scan_feed_links(url, content, encoding),
+            scan_news_section(url, content, encoding, backend))
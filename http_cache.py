@@ -0,0 +1,221 @@
+"""
+Persistent HTTP response cache for website discovery.
+
+Stores homepage bodies with their ETag / Last-Modified headers in SQLite,
+so later runs can revalidate with If-None-Match / If-Modified-Since and get
+a cheap 304 instead of downloading the page again. Discovery results
+(RSS feed and news section per site) are stored too, so companies checked
+recently can be skipped without any network traffic.
+"""
+
+import sqlite3
+import threading
+import time
+
+import httpx
+
+from config import Config
+from http_client import arequest
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    content_type TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    body BLOB,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at);
+
+CREATE TABLE IF NOT EXISTS probes (
+    url TEXT PRIMARY KEY,
+    rss_url TEXT,
+    news_url TEXT,
+    checked_at REAL NOT NULL
+);
+"""
+
+
+class HTTPCache:
+    """SQLite-backed response and discovery-result cache, keyed by URL"""
+
+    def __init__(self, path=None, ttl_days=None, max_mb=None):
+        self.path = path or Config.HTTP_CACHE_PATH
+        self.ttl = (Config.HTTP_CACHE_TTL_DAYS if ttl_days is None else ttl_days) * 86400
+        self.max_bytes = int((Config.HTTP_CACHE_MAX_MB if max_mb is None else max_mb) * 1024 * 1024)
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self.evict()
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Responses
+
+    def get(self, url):
+        """Return the cached entry for url as a dict, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content_type, etag, last_modified, body, fetched_at FROM responses WHERE url = ?",
+                (url,)).fetchone()
+        if row is None:
+            return None
+        return {'content_type': row[0], 'etag': row[1], 'last_modified': row[2],
+                'body': row[3], 'fetched_at': row[4]}
+
+    def conditional_headers(self, entry):
+        """Revalidation headers for a cached entry"""
+        headers = {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, response):
+        """Cache a 200 response (only when it can be revalidated later)"""
+        etag = response.headers.get('etag')
+        last_modified = response.headers.get('last-modified')
+        if response.status_code != 200 or not (etag or last_modified):
+            return
+        body = response.content
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, response.headers.get('content-type'), etag, last_modified,
+                 body, len(body), now, now))
+            self._db.commit()
+
+    def touch(self, url, response=None):
+        """Mark an entry as revalidated (304), picking up refreshed validators"""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ?, "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (now, now,
+                 response.headers.get('etag') if response is not None else None,
+                 response.headers.get('last-modified') if response is not None else None,
+                 url))
+            self._db.commit()
+
+    def response_from_entry(self, entry, request_=None):
+        """Rebuild an httpx.Response from a cached entry"""
+        headers = {}
+        if entry['content_type']:
+            headers['content-type'] = entry['content_type']
+        if entry['etag']:
+            headers['etag'] = entry['etag']
+        if entry['last_modified']:
+            headers['last-modified'] = entry['last_modified']
+        return httpx.Response(200, headers=headers, content=entry['body'], request=request_)
+
+    # Discovery results
+
+    def get_probe(self, url, max_age_days=None):
+        """Return (rss_url, news_url) if url was checked within max_age_days, else None"""
+        max_age_days = Config.DISCOVERY_RECHECK_DAYS if max_age_days is None else max_age_days
+        with self._lock:
+            row = self._db.execute(
+                "SELECT rss_url, news_url, checked_at FROM probes WHERE url = ?", (url,)).fetchone()
+        if row is None or time.time() - row[2] > max_age_days * 86400:
+            return None
+        self.hits += 1
+        return row[0], row[1]
+
+    def store_probe(self, url, rss_url, news_url):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?)",
+                             (url, rss_url, news_url, time.time()))
+            self._db.commit()
+
+    # Merging
+
+    def merge(self, path, url_filter=None):
+        """
+        Take over the responses and discovery results of another cache file
+        (e.g. a shard's); the more recently fetched/checked entry wins.
+        url_filter(url) -> bool limits which entries are taken.
+        Returns the number of rows taken over.
+        """
+        keep = 'keep_url(url)' if url_filter is not None else '1'
+        with self._lock:
+            if url_filter is not None:
+                self._db.create_function('keep_url', 1, lambda url: bool(url_filter(url)), deterministic=True)
+            self._db.commit()
+            self._db.execute("ATTACH DATABASE ? AS other", (str(path),))
+            try:
+                before = self._db.total_changes
+                self._db.execute(
+                    f"INSERT INTO responses SELECT * FROM other.responses WHERE {keep} "
+                    "ON CONFLICT(url) DO UPDATE SET content_type = excluded.content_type, "
+                    "etag = excluded.etag, last_modified = excluded.last_modified, body = excluded.body, "
+                    "size = excluded.size, fetched_at = excluded.fetched_at, accessed_at = excluded.accessed_at "
+                    "WHERE excluded.fetched_at > responses.fetched_at")
+                self._db.execute(
+                    f"INSERT INTO probes SELECT * FROM other.probes WHERE {keep} "
+                    "ON CONFLICT(url) DO UPDATE SET rss_url = excluded.rss_url, news_url = excluded.news_url, "
+                    "checked_at = excluded.checked_at WHERE excluded.checked_at > probes.checked_at")
+                taken = self._db.total_changes - before
+                self._db.commit()
+            finally:
+                self._db.execute("DETACH DATABASE other")
+        self.evict()
+        return taken
+
+    # Eviction
+
+    def evict(self):
+        """Drop entries older than the TTL, then least recently used ones above the size cap"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            self._db.execute("DELETE FROM responses WHERE fetched_at < ?", (cutoff,))
+            self._db.execute("DELETE FROM probes WHERE checked_at < ?", (cutoff,))
+
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                freed = 0
+                victims = []
+                for url, size in self._db.execute("SELECT url, size FROM responses ORDER BY accessed_at"):
+                    if total - freed <= self.max_bytes:
+                        break
+                    victims.append((url,))
+                    freed += size
+                self._db.executemany("DELETE FROM responses WHERE url = ?", victims)
+            self._db.commit()
+
+
+async def acached_get(url, cache, **kwargs):
+    """
+    GET through the shared async client, revalidating against the cache when
+    possible: a 304 is answered from the cached body, a fresh 200 is stored
+    """
+    entry = cache.get(url)
+    headers = dict(kwargs.pop('headers', None) or {})
+    headers.update(cache.conditional_headers(entry))
+    response = await arequest('GET', url, headers=headers, **kwargs)
+    if response.status_code == 304 and entry is not None:
+        cache.revalidated += 1
+        cache.touch(url, response)
+        return cache.response_from_entry(entry, response.request)
+    cache.misses += 1
+    cache.store(url, response)
+    return response
@@ -0,0 +1,321 @@
+"""
+Shared HTTP client layer for all network code.
+
+One pooled httpx client per process (and one async client per event loop),
+so connections, TLS sessions and keep-alive are reused across companies,
+between the homepage GET and its feed probes, and across API calls.
+Pool sizes, HTTP/2, timeouts and retry/backoff come from config.Config.
+Every request reports its latency, retries and 429s to metrics.py;
+astream() gives streamed responses the same retries and metrics.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import httpx
+
+import metrics
+from config import Config
+
+# Responses worth retrying: rate limits and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+# Headers that no longer describe a body we have decoded and possibly truncated
+_BODY_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding'}
+
+_client = None
+_client_lock = threading.Lock()
+_async_clients = {}
+
+
+def http2_available():
+    """HTTP/2 is used when enabled in Config and the h2 package is installed"""
+    if not Config.HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _client_options():
+    return {
+        'http2': http2_available(),
+        'limits': httpx.Limits(
+            max_connections=Config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        'timeout': httpx.Timeout(Config.HTTP_TIMEOUT),
+        'headers': {'User-Agent': Config.CRAWL_USER_AGENT},
+    }
+
+
+def get_client():
+    """Return the process-wide httpx.Client (thread-safe, created on first use)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(**_client_options())
+    return _client
+
+
+def close_client():
+    """Close the shared sync client (a new one is created on next use)"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def get_async_client():
+    """Return the httpx.AsyncClient shared by everything on the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = httpx.AsyncClient(**_client_options())
+    return client
+
+
+async def aclose_async_client():
+    """Close the async client of the running event loop"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def run_async(coro):
+    """asyncio.run() that closes the loop's shared async client afterwards"""
+    async def runner():
+        try:
+            return await coro
+        finally:
+            await aclose_async_client()
+
+    return asyncio.run(runner())
+
+
+def retry_after(response):
+    """Seconds asked for by the response's Retry-After header (None without a usable one)"""
+    value = response.headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def retry_after_too_long(response):
+    """True if the server asks to wait longer than HTTP_MAX_RETRY_AFTER: give up instead of sleeping"""
+    seconds = retry_after(response)
+    return seconds is not None and seconds > Config.HTTP_MAX_RETRY_AFTER
+
+
+def retry_delay(attempt, response=None):
+    """
+    Seconds to wait before retry number `attempt` (0-based).
+    Honours a Retry-After header (capped at HTTP_MAX_RETRY_AFTER),
+    otherwise exponential backoff with jitter.
+    """
+    if response is not None:
+        seconds = retry_after(response)
+        if seconds is not None:
+            return min(seconds, Config.HTTP_MAX_RETRY_AFTER)
+    backoff = Config.HTTP_BACKOFF * (2 ** attempt)
+    return backoff + random.uniform(0, backoff)
+
+
+def _should_retry(response, attempt, retries):
+    if response.status_code not in RETRY_STATUSES or attempt >= retries:
+        return False
+    if retry_after_too_long(response):
+        metrics.incr('http_retries_abandoned', reason='retry_after')
+        return False
+    return True
+
+
+class NotHTMLError(ValueError):
+    """Raised by capped page fetches when the server sends something other than HTML"""
+
+
+def _check_html(response):
+    content_type = response.headers.get('content-type', '').lower()
+    if response.status_code == 200 and content_type and not content_type.startswith(HTML_CONTENT_TYPES):
+        raise NotHTMLError(f"Not an HTML page ({content_type.split(';')[0]})")
+
+
+def _capped_response(response, body, truncated):
+    """A fully-read response holding at most max_bytes of (decoded) body"""
+    headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in _BODY_HEADERS]
+    return httpx.Response(response.status_code, headers=headers, content=bytes(body),
+                          request=response.request, extensions={'truncated': truncated})
+
+
+def _send(client, method, url, max_bytes, html_only, kwargs):
+    if max_bytes is None and not html_only:
+        return client.request(method, url, **kwargs)
+
+    with client.stream(method, url, **kwargs) as response:
+        if html_only:
+            _check_html(response)
+        body = bytearray()
+        truncated = False
+        for chunk in response.iter_bytes():
+            body += chunk
+            if max_bytes is not None and len(body) >= max_bytes:
+                truncated = len(body) > max_bytes
+                del body[max_bytes:]
+                break
+    return _capped_response(response, body, truncated)
+
+
+async def _asend(client, method, url, max_bytes, html_only, kwargs):
+    if max_bytes is None and not html_only:
+        return await client.request(method, url, **kwargs)
+
+    async with client.stream(method, url, **kwargs) as response:
+        if html_only:
+            _check_html(response)
+        body = bytearray()
+        truncated = False
+        async for chunk in response.aiter_bytes():
+            body += chunk
+            if max_bytes is not None and len(body) >= max_bytes:
+                truncated = len(body) > max_bytes
+                del body[max_bytes:]
+                break
+    return _capped_response(response, body, truncated)
+
+
+def _traced(url, kwargs, is_async):
+    """Add the metrics trace hook to the request kwargs; returns the host label"""
+    host = urlsplit(str(url)).netloc
+    extensions = dict(kwargs.pop('extensions', None) or {})
+    extensions.setdefault('trace', metrics.http_trace(host, is_async))
+    kwargs['extensions'] = extensions
+    return host
+
+
+def _record_response(host, response, started):
+    metrics.observe('http_request_seconds', time.perf_counter() - started, host=host)
+    metrics.incr('http_responses', status=f"{response.status_code // 100}xx")
+    if response.status_code == 429:
+        metrics.incr('http_rate_limited', host=host)
+
+
+def request(method, url, retries=None, max_bytes=None, html_only=False, **kwargs):
+    """
+    Send a request through the shared client, retrying transport errors
+    and RETRY_STATUSES responses. The last response or error is returned/raised.
+
+    With max_bytes the body is streamed and cut off after that many bytes
+    (response.extensions['truncated'] tells whether it was); with html_only
+    a non-HTML Content-Type raises NotHTMLError before the body is read.
+    """
+    retries = Config.HTTP_RETRIES if retries is None else retries
+    client = get_client()
+    host = _traced(url, kwargs, is_async=False)
+
+    for attempt in range(retries + 1):
+        started = time.perf_counter()
+        try:
+            response = _send(client, method, url, max_bytes, html_only, kwargs)
+        except httpx.TransportError as e:
+            metrics.incr('http_errors', kind=type(e).__name__)
+            if attempt == retries:
+                raise
+            metrics.incr('http_retries', reason='transport')
+            time.sleep(retry_delay(attempt))
+            continue
+
+        _record_response(host, response, started)
+        if _should_retry(response, attempt, retries):
+            metrics.incr('http_retries', reason=str(response.status_code))
+            time.sleep(retry_delay(attempt, response))
+            continue
+        return response
+
+
+async def arequest(method, url, retries=None, client=None, max_bytes=None, html_only=False, **kwargs):
+    """Async version of request(), using the event loop's shared client"""
+    retries = Config.HTTP_RETRIES if retries is None else retries
+    client = client or get_async_client()
+    host = _traced(url, kwargs, is_async=True)
+
+    for attempt in range(retries + 1):
+        started = time.perf_counter()
+        try:
+            response = await _asend(client, method, url, max_bytes, html_only, kwargs)
+        except httpx.TransportError as e:
+            metrics.incr('http_errors', kind=type(e).__name__)
+            if attempt == retries:
+                raise
+            metrics.incr('http_retries', reason='transport')
+            await asyncio.sleep(retry_delay(attempt))
+            continue
+
+        _record_response(host, response, started)
+        if _should_retry(response, attempt, retries):
+            metrics.incr('http_retries', reason=str(response.status_code))
+            await asyncio.sleep(retry_delay(attempt, response))
+            continue
+        return response
+
+
+@asynccontextmanager
+async def astream(method, url, retries=None, client=None, **kwargs):
+    """
+    Streaming version of arequest(): yields the response with its body still
+    unread (aiter_bytes(), aiter_lines(), ...) and closes it afterwards.
+    Transport errors and RETRY_STATUSES are retried before the body is
+    handed out, never in the middle of it. The request is timed until the
+    block exits.
+    """
+    retries = Config.HTTP_RETRIES if retries is None else retries
+    client = client or get_async_client()
+    host = _traced(url, kwargs, is_async=True)
+    follow_redirects = kwargs.pop('follow_redirects', httpx.USE_CLIENT_DEFAULT)
+
+    for attempt in range(retries + 1):
+        started = time.perf_counter()
+        try:
+            response = await client.send(client.build_request(method, url, **kwargs), stream=True,
+                                         follow_redirects=follow_redirects)
+        except httpx.TransportError as e:
+            metrics.incr('http_errors', kind=type(e).__name__)
+            if attempt == retries:
+                raise
+            metrics.incr('http_retries', reason='transport')
+            await asyncio.sleep(retry_delay(attempt))
+            continue
+
+        if _should_retry(response, attempt, retries):
+            await response.aclose()
+            _record_response(host, response, started)
+            metrics.incr('http_retries', reason=str(response.status_code))
+            await asyncio.sleep(retry_delay(attempt, response))
+            continue
+        break
+
+    try:
+        yield response
+    except httpx.TransportError as e:
+        metrics.incr('http_errors', kind=type(e).__name__)
+        raise
+    finally:
+        await response.aclose()
+        _record_response(host, response, started)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Incremental Hugo export of the news database.
+
+Every news item becomes a Markdown page with YAML front matter in
+Config.HUGO_CONTENT_DIR. A manifest (Config.HUGO_MANIFEST_PATH) remembers,
+per news ID, the page's file name, a hash of the item it was rendered from
+and a hash of the rendered page, so a run:
+
+- renders only items that are new or changed since the last run (in a
+  process pool when there are many of them)
+- writes a page only when its content actually differs, via a temporary
+  file and an atomic rename, so Hugo never sees a half-written page
+- deletes pages of items that were removed or renamed
+
+Unchanged pages keep their modification time, so Hugo's rebuild and git
+only see the pages that really changed.
+
+Usage: python hugo_export.py [--content-dir content/news] [--force] [--dry-run]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import tempfile
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import yaml
+
+import metrics
+from config import Config
+
+TEMPLATE_VERSION = 1  # Bump when render_page() changes, to re-render every page
+
+
+def slugify(text):
+    """'BIOWEG secures €16 million' -> 'bioweg-secures-16-million'"""
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode('ascii').lower()
+    text = re.sub(r'[^a-z0-9\s-]', '', text)
+    return re.sub(r'[\s-]+', '-', text).strip('-')
+
+
+def page_name(row):
+    """File name of an item's page: the stored News Filename, else '<date>-<headline slug>.md'"""
+    name = Path(str(row.get('news_filename') or '')).name
+    if name:
+        return name if name.endswith('.md') else name + '.md'
+    slug = slugify(row.get('headline') or '')[:80].rstrip('-') or f"news-{row['id']}"
+    date = str(row.get('date') or '')[:10]
+    return f"{date}-{slug}.md" if date else f"{slug}.md"
+
+
+def source_hash(row):
+    """Hash of everything a page is rendered from"""
+    data = {key: value for key, value in row.items() if key != 'added_at'}
+    canonical = json.dumps([TEMPLATE_VERSION, data], sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def render_page(row):
+    """Markdown page with YAML front matter for one news item"""
+    company = row.get('company_matched') or row.get('company')
+    front = {
+        'title': row.get('headline') or '',
+        'date': str(row.get('date') or '')[:10] or None,
+        'company': company,
+        'category': row.get('category'),
+        'source': row.get('source'),
+        'source_url': row.get('url') or row.get('company_url'),
+        'week': row.get('week'),
+        'credibility': row.get('credibility'),
+        'tags': [tag for tag in (company, row.get('category')) if tag],
+        'news_id': row['id'],
+    }
+    front = {key: value for key, value in front.items() if value not in (None, '', [])}
+    body = (row.get('summary') or '').strip()
+    link = front.get('source_url')
+    if link:
+        body += f"\n\n[Read more at {row.get('source') or 'the source'}]({link})"
+    header = yaml.safe_dump(front, sort_keys=False, allow_unicode=True, width=1000)
+    return f"---\n{header}---\n\n{body}\n"
+
+
+def render_all(rows, workers=None):
+    """Render pages, in a process pool for large batches; returns texts in row order"""
+    workers = workers or Config.HUGO_WORKERS or os.cpu_count() or 1
+    if workers <= 1 or len(rows) < Config.HUGO_POOL_MIN_PAGES:
+        return [render_page(row) for row in rows]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(render_page, rows, chunksize=max(1, len(rows) // (workers * 4))))
+
+
+def write_atomic(path, text):
+    """Write through a temporary file in the same directory and rename it into place"""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def read_page(path):
+    try:
+        return path.read_text(encoding='utf-8')
+    except (OSError, UnicodeDecodeError):
+        return ''
+
+
+class HugoManifest:
+    """news ID -> {'file', 'source', 'hash'} of the pages written by previous runs"""
+
+    def __init__(self, path=None, content_dir=None):
+        self.path = Path(path or Config.HUGO_MANIFEST_PATH)
+        self.content_dir = str(Path(content_dir or Config.HUGO_CONTENT_DIR).resolve())
+        self.pages = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                data = {}
+            if data.get('content_dir') == self.content_dir:  # Pages of another content dir don't count
+                self.pages = {int(news_id): page for news_id, page in data.get('pages', {}).items()}
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {'content_dir': self.content_dir, 'pages': {str(k): v for k, v in sorted(self.pages.items())}}
+        write_atomic(self.path, json.dumps(data, indent=1))
+
+
+def assign_names(rows):
+    """{news ID: file name}; when two items want the same name the later ID gets a '-<id>' suffix"""
+    names, taken = {}, set()
+    for row in rows:
+        name = page_name(row)
+        if name in taken:
+            name = f"{name[:-3]}-{row['id']}.md"
+        taken.add(name)
+        names[row['id']] = name
+    return names
+
+
+def export_hugo(rows, content_dir=None, manifest_path=None, force=False, dry_run=False, workers=None):
+    """
+    Bring the Hugo content directory in line with the news rows.
+    Returns counts: written, unchanged, skipped (not re-rendered), removed.
+    """
+    content_dir = Path(content_dir or Config.HUGO_CONTENT_DIR)
+    content_dir.mkdir(parents=True, exist_ok=True)
+    manifest = HugoManifest(manifest_path, content_dir)
+    existing = {entry.name for entry in os.scandir(content_dir) if entry.is_file()}
+    rows = [row for row in rows if row.get('headline')]
+    names = assign_names(rows)
+    stats = {'written': 0, 'unchanged': 0, 'skipped': 0, 'removed': 0}
+
+    # Only items whose source (or file) changed are rendered again
+    todo = []
+    for row in rows:
+        old = manifest.pages.get(row['id'])
+        digest = source_hash(row)
+        if (not force and old and old['source'] == digest and old['file'] == names[row['id']]
+                and old['file'] in existing):
+            stats['skipped'] += 1
+        else:
+            todo.append((row, digest))
+
+    with metrics.timed('hugo_render'):
+        texts = render_all([row for row, _ in todo], workers)
+
+    with metrics.timed('hugo_write'):
+        current = set(names.values())
+        orphans = []  # Files of deleted items and old names of renamed ones
+        for (row, digest), text in zip(todo, texts):
+            name, page_digest = names[row['id']], content_hash(text)
+            old = manifest.pages.get(row['id'])
+            if name in existing and (old['hash'] == page_digest and old['file'] == name if old
+                                     else content_hash(read_page(content_dir / name)) == page_digest):
+                stats['unchanged'] += 1
+            else:
+                if not dry_run:
+                    write_atomic(content_dir / name, text)
+                stats['written'] += 1
+            if old and old['file'] != name:
+                orphans.append(old['file'])
+            manifest.pages[row['id']] = {'file': name, 'source': digest, 'hash': page_digest}
+
+        for news_id in [news_id for news_id in manifest.pages if news_id not in names]:
+            orphans.append(manifest.pages.pop(news_id)['file'])
+        for name in orphans:
+            # Only pages this exporter wrote are deleted, never a name a current item uses
+            if name not in current and name in existing:
+                if not dry_run:
+                    (content_dir / name).unlink(missing_ok=True)
+                existing.discard(name)
+                stats['removed'] += 1
+
+    if not dry_run:
+        manifest.save()
+    for result, count in stats.items():
+        metrics.incr('hugo_pages', count, result=result)
+    return stats
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Write changed news items as Hugo pages")
+    parser.add_argument('--content-dir', type=Path, default=Config.HUGO_CONTENT_DIR,
+                        help=f"Hugo content directory (default {Config.HUGO_CONTENT_DIR})")
+    parser.add_argument('--workers', type=int, default=Config.HUGO_WORKERS,
+                        help="Render processes for large batches (default one per CPU)")
+    parser.add_argument('--force', action='store_true', help="Re-render every item (pages are still only "
+                                                             "written when their content changed)")
+    parser.add_argument('--dry-run', action='store_true', help="Only report what would change")
+    args = parser.parse_args(argv)
+
+    from news_store import NewsStore
+    with NewsStore() as store:
+        rows = store.news_rows()
+    stats = export_hugo(rows, args.content_dir, force=args.force, dry_run=args.dry_run, workers=args.workers)
+    verb = "Would write" if args.dry_run else "Wrote"
+    print(f"✅ {verb} {stats['written']} pages, removed {stats['removed']} "
+          f"({stats['unchanged']} re-rendered unchanged, {stats['skipped']} untouched) in {args.content_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Content-addressed cache for Perplexity responses.
+
+A call is identified by a SHA-256 of its model, messages, temperature and
+news date window, so repeating the same query costs nothing. Entries live
+for Config.DAYS_TO_SEARCH days (older answers describe a different week)
+and the least recently used ones are evicted above a size cap.
+
+The cache doubles as a record/replay store:
+- 'read-write': use cached answers, call the API and store on a miss
+- 'record':     always call the API and store the answer
+- 'replay':     answer only from the cache, ignoring the TTL; a miss is an
+                error, so a whole pipeline can run offline
+- 'off':        no caching
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from config import Config
+
+MODES = ('read-write', 'record', 'replay', 'off')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    window TEXT,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at);
+"""
+
+
+class CacheMiss(LookupError):
+    """Raised in replay mode when a call has no recorded response"""
+
+
+def cache_key(payload, window=None):
+    """Hash of everything that determines the answer"""
+    material = {
+        'model': payload.get('model'),
+        'messages': payload.get('messages'),
+        'temperature': payload.get('temperature'),
+        'window': [str(d) for d in window] if window else None,
+    }
+    canonical = json.dumps(material, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed response store keyed by cache_key()"""
+
+    def __init__(self, path=None, mode=None, ttl_days=None, max_mb=None):
+        self.path = path or Config.LLM_CACHE_PATH
+        self.mode = mode or Config.LLM_CACHE_MODE
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown LLM cache mode: {self.mode} (choose from {', '.join(MODES)})")
+        self.ttl = (Config.DAYS_TO_SEARCH if ttl_days is None else ttl_days) * 86400
+        self.max_bytes = int((Config.LLM_CACHE_MAX_MB if max_mb is None else max_mb) * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+
+        self._db = None
+        if self.mode != 'off':
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._lock = threading.Lock()
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.executescript(SCHEMA)
+            if self.mode != 'replay':
+                self.evict()
+
+    def close(self):
+        if self._db is not None:
+            with self._lock:
+                self._db.commit()
+                self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, payload, window=None):
+        """Cached response JSON for the call, or None (CacheMiss in replay mode)"""
+        if self.mode in ('off', 'record'):
+            return None
+
+        key = cache_key(payload, window)
+        with self._lock:
+            row = self._db.execute("SELECT response, created_at FROM responses WHERE key = ?",
+                                   (key,)).fetchone()
+            fresh = row is not None and (self.mode == 'replay' or time.time() - row[1] <= self.ttl)
+            if fresh:
+                self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+
+        if not fresh:
+            self.misses += 1
+            if self.mode == 'replay':
+                raise CacheMiss(f"No recorded response for {payload.get('model')} call {key[:12]}")
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, payload, response, window=None):
+        if self.mode in ('off', 'replay'):
+            return
+        body = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (cache_key(payload, window), payload.get('model'),
+                 json.dumps([str(d) for d in window]) if window else None, body, len(body), now, now))
+            self._db.commit()
+
+    def evict(self):
+        """Drop entries past the TTL, then least recently used ones above the size cap"""
+        with self._lock:
+            self._db.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                victims = []
+                for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+                    if total <= self.max_bytes:
+                        break
+                    victims.append((key,))
+                    total -= size
+                self._db.executemany("DELETE FROM responses WHERE key = ?", victims)
+            self._db.commit()
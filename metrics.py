@@ -0,0 +1,323 @@
+"""
+Run metrics: stage timers, latency histograms and counters.
+
+One process-wide registry that the network and pipeline code report into:
+
+- timed('stage') measures a pipeline stage (homepage fetch, HTML parse,
+  feed probes, LLM calls, Excel export, ...)
+- observe() adds a sample to a histogram, e.g. per-host request latency;
+  http_client also records connect (DNS + TCP), TLS and time-to-first-byte
+  per host through httpx's trace extension
+- incr() counts events (retries, 429s, cache hits, tokens)
+- snapshot() / merge() carry a worker process's metrics over to the parent
+
+run_report() wraps a script's run: it prints the slowest stages, writes a
+JSON run report to METRICS_DIR, optionally a Prometheus text file (for the
+node_exporter textfile collector), and with --profile runs everything
+under cProfile or pyinstrument.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from config import Config
+
+PROMETHEUS_PREFIX = 'bioplastics_'
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+MAX_SAMPLES = 10000  # Raw samples kept per series for percentiles
+PROFILERS = ('cprofile', 'pyinstrument')
+
+# httpcore trace events -> histogram
+TRACE_STAGES = {
+    'connection.connect_tcp': 'http_connect_seconds',
+    'connection.start_tls': 'http_tls_seconds',
+    'http11.receive_response_headers': 'http_ttfb_seconds',
+    'http2.receive_response_headers': 'http_ttfb_seconds',
+}
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_gauges = {}
+_histograms = {}
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def incr(name, amount=1, **labels):
+    """Add amount to a counter"""
+    if not amount:
+        return
+    with _lock:
+        _counters[_key(name, labels)] += amount
+
+
+def gauge(name, value, **labels):
+    """Set a value that is reported as-is (e.g. a cache size)"""
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name, value, **labels):
+    """Add one sample (seconds, bytes, ...) to a histogram"""
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = {'count': 0, 'sum': 0.0, 'buckets': [0] * len(BUCKETS), 'samples': []}
+        hist['count'] += 1
+        hist['sum'] += value
+        for idx, bound in enumerate(BUCKETS):
+            if value <= bound:
+                hist['buckets'][idx] += 1
+                break
+        if len(hist['samples']) < MAX_SAMPLES:
+            hist['samples'].append(value)
+
+
+@contextmanager
+def timed(stage, **labels):
+    """Time a block as a pipeline stage (concurrent blocks add up)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe('stage_seconds', time.perf_counter() - started, stage=stage, **labels)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
+
+
+def snapshot():
+    """The raw registry contents (picklable), e.g. to hand a worker process's metrics to the parent"""
+    with _lock:
+        return {
+            'counters': dict(_counters),
+            'gauges': dict(_gauges),
+            'histograms': {key: {**hist, 'buckets': list(hist['buckets']), 'samples': list(hist['samples'])}
+                           for key, hist in _histograms.items()},
+        }
+
+
+def merge(data):
+    """Add a snapshot() from elsewhere into this registry (counters and histograms add up, gauges are replaced)"""
+    with _lock:
+        for key, value in data['counters'].items():
+            _counters[key] += value
+        _gauges.update(data['gauges'])
+        for key, other in data['histograms'].items():
+            hist = _histograms.get(key)
+            if hist is None:
+                hist = _histograms[key] = {'count': 0, 'sum': 0.0, 'buckets': [0] * len(BUCKETS), 'samples': []}
+            hist['count'] += other['count']
+            hist['sum'] += other['sum']
+            hist['buckets'] = [a + b for a, b in zip(hist['buckets'], other['buckets'])]
+            hist['samples'].extend(other['samples'][:MAX_SAMPLES - len(hist['samples'])])
+
+
+def http_trace(host, is_async=False):
+    """httpx 'trace' extension callback recording connect/TLS/TTFB times for host"""
+    started = {}
+
+    def handle(event, info):
+        step, _, phase = event.rpartition('.')
+        if phase == 'started':
+            started[step] = time.perf_counter()
+        elif step in started:
+            elapsed = time.perf_counter() - started.pop(step)
+            if step in TRACE_STAGES and phase == 'complete':
+                observe(TRACE_STAGES[step], elapsed, host=host)
+
+    async def ahandle(event, info):
+        handle(event, info)
+
+    return ahandle if is_async else handle
+
+
+def _percentile(sorted_samples, share):
+    if not sorted_samples:
+        return None
+    return sorted_samples[min(len(sorted_samples) - 1, int(share * len(sorted_samples)))]
+
+
+def _series(key):
+    name, labels = key
+    return {'name': name, 'labels': dict(labels)}
+
+
+def report():
+    """All metrics as a JSON-serializable dict"""
+    with _lock:
+        histograms = []
+        for key, hist in _histograms.items():
+            samples = sorted(hist['samples'])
+            histograms.append({**_series(key), 'count': hist['count'], 'sum': round(hist['sum'], 6),
+                               'min': samples[0] if samples else None, 'max': samples[-1] if samples else None,
+                               'p50': _percentile(samples, 0.5), 'p95': _percentile(samples, 0.95),
+                               'p99': _percentile(samples, 0.99)})
+        return {
+            'counters': [{**_series(key), 'value': value} for key, value in sorted(_counters.items())],
+            'gauges': [{**_series(key), 'value': value} for key, value in sorted(_gauges.items())],
+            'histograms': sorted(histograms, key=lambda h: (h['name'], -h['sum'])),
+        }
+
+
+def _prom_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (f'{k}="' + str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+               for k, v in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _prom_name(name, suffix=''):
+    return PROMETHEUS_PREFIX + re.sub(r'[^a-zA-Z0-9_]', '_', name) + suffix
+
+
+def prometheus_text():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    with _lock:
+        for kind, series in (('counter', _counters), ('gauge', _gauges)):
+            typed = set()
+            for (name, labels), value in sorted(series.items()):
+                metric = _prom_name(name, '_total' if kind == 'counter' and not name.endswith('_total') else '')
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} {kind}")
+                    typed.add(metric)
+                lines.append(f"{metric}{_prom_labels(labels)} {value}")
+
+        typed = set()
+        for (name, labels), hist in sorted(_histograms.items()):
+            metric = _prom_name(name)
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cumulative = 0
+            for bound, count in zip(BUCKETS, hist['buckets']):
+                cumulative += count
+                lines.append(f"{metric}_bucket{_prom_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{metric}_bucket{_prom_labels(labels, [('le', '+Inf')])} {hist['count']}")
+            lines.append(f"{metric}_sum{_prom_labels(labels)} {hist['sum']}")
+            lines.append(f"{metric}_count{_prom_labels(labels)} {hist['count']}")
+    return '\n'.join(lines) + '\n'
+
+
+def write_json(path, **run_info):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({**run_info, **report()}, indent=2, default=str), encoding='utf-8')
+    return path
+
+
+def write_prometheus(path):
+    """Write atomically, so a collector never reads a half-written file"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    tmp.write_text(prometheus_text(), encoding='utf-8')
+    tmp.replace(path)
+    return path
+
+
+def print_summary(limit=8):
+    """Slowest stages and hosts of the run"""
+    data = report()
+    stages = [h for h in data['histograms'] if h['name'] == 'stage_seconds']
+    if stages:
+        print("\n⏱️  Stages (total seconds, calls, p95):")
+        for hist in sorted(stages, key=lambda h: -h['sum'])[:limit]:
+            print(f"    {hist['labels'].get('stage', ''):<18} {hist['sum']:9.2f}s {hist['count']:6d}  "
+                  f"p95 {hist['p95']:.3f}s")
+    hosts = [h for h in data['histograms'] if h['name'] == 'http_request_seconds']
+    if hosts:
+        print("🌐 Slowest hosts (p95 request seconds):")
+        for hist in sorted(hosts, key=lambda h: -h['p95'])[:limit]:
+            print(f"    {hist['labels'].get('host', ''):<40} p95 {hist['p95']:.3f}s  ({hist['count']} requests)")
+
+
+def add_arguments(parser):
+    """--profile / --metrics-json / --prometheus options shared by the scripts"""
+    parser.add_argument('--profile', nargs='?', const='cprofile', choices=PROFILERS,
+                        help="Profile the run with cProfile (default) or pyinstrument")
+    parser.add_argument('--metrics-json', type=Path,
+                        help=f"Run report path (default {Config.METRICS_DIR}/<script>-<time>.json)")
+    parser.add_argument('--prometheus', type=Path, default=Config.METRICS_PROMETHEUS_FILE,
+                        help="Also write the metrics as a Prometheus text file")
+
+
+@contextmanager
+def _profiled(profiler, path_stem):
+    if profiler is None:
+        yield
+        return
+    if profiler == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("⚠️ pyinstrument is not installed (pip install pyinstrument) - using cProfile")
+            profiler = 'cprofile'
+        else:
+            profile = Profiler(async_mode='enabled')
+            profile.start()
+            try:
+                yield
+            finally:
+                profile.stop()
+                Path(f"{path_stem}.html").write_text(profile.output_html(), encoding='utf-8')
+                print(profile.output_text(unicode=True, color=False))
+                print(f"🔬 Profile saved to {path_stem}.html")
+            return
+
+    import cProfile
+    import pstats
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(f"{path_stem}.prof")
+        pstats.Stats(profile).sort_stats('cumulative').print_stats(25)
+        print(f"🔬 Profile saved to {path_stem}.prof (open with snakeviz or pstats)")
+
+
+@contextmanager
+def run_report(script, args=None):
+    """Collect metrics for one script run and write its reports afterwards"""
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    stem = Path(Config.METRICS_DIR) / f"{script}-{stamp}"
+    stem.parent.mkdir(parents=True, exist_ok=True)
+    profiler = getattr(args, 'profile', None)
+    json_path = getattr(args, 'metrics_json', None) or f"{stem}.json"
+    prometheus_path = getattr(args, 'prometheus', None)
+
+    reset()
+    started = time.perf_counter()
+    status = 'ok'
+    try:
+        with _profiled(profiler, stem):
+            yield
+    except BaseException as e:
+        status = type(e).__name__
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        gauge('run_seconds', round(elapsed, 3), script=script)
+        print_summary()
+        path = write_json(json_path, script=script, started=stamp, status=status, seconds=round(elapsed, 3))
+        print(f"📈 Run report: {path}")
+        if prometheus_path:
+            print(f"📈 Prometheus metrics: {write_prometheus(prometheus_path)}")
@@ -0,0 +1,191 @@
+"""
+Near-duplicate detection for news items.
+
+Exact URL matching misses the same press release syndicated on several
+sites and URLs that differ only in tracking parameters. Two measures:
+
+- canonical_url(): strips utm_*/click-id parameters, fragments, "www." and
+  trailing slashes so trivially different URLs compare equal
+- NearDuplicateIndex: MinHash signatures of the normalized headline and
+  summary, bucketed with LSH (locality-sensitive hashing) in SQLite. A new
+  item is only compared with the stored items that share a band bucket,
+  so lookups stay sublinear in the size of the history.
+"""
+
+import hashlib
+import re
+import unicodedata
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+
+from config import Config
+
+# Query parameters that only track the click, never select content
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid', 'ref', 'ref_src',
+                   '_hsenc', '_hsmi', 'mkt_tok', 'cmpid', 'ocid'}
+TRACKING_PREFIXES = ('utm_',)
+
+NUM_PERM = 128
+BANDS = 32  # BANDS * ROWS = NUM_PERM; candidates above a Jaccard similarity of about 0.42
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+
+# Universal hashing (a * x + b) % p of 32-bit shingle hashes: with a, b < 2**32
+# and p the smallest prime above 2**32, a * x + b stays below 2**64 and the
+# uint64 arithmetic never wraps around.
+_PRIME = (1 << 32) + 15
+_MAX_HASH = (1 << 32) - 1
+_rng = np.random.RandomState(20251030)  # Fixed seed: stored signatures must stay comparable
+_PERM_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+# Bumped whenever the hash functions change; older signatures are rebuilt
+SIGNATURE_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS news_signatures (
+    news_id INTEGER PRIMARY KEY,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS news_lsh (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    news_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS news_lsh_bucket ON news_lsh (band, bucket);
+CREATE TABLE IF NOT EXISTS news_signature_version (
+    version INTEGER NOT NULL
+);
+"""
+
+
+def canonical_url(url):
+    """Normalized form of a URL for duplicate checks"""
+    if not url:
+        return url
+    url = str(url).strip()
+    if '://' not in url:
+        url = 'https://' + url
+    parts = urlsplit(url)
+
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and not ((parts.scheme == 'http' and parts.port == 80) or
+                           (parts.scheme == 'https' and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+             if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)]
+    path = re.sub(r'/{2,}', '/', parts.path).rstrip('/')
+
+    # http and https point to the same article
+    return urlunsplit(('https', host, path, urlencode(sorted(query)), ''))
+
+
+def normalize_text(text):
+    """Lowercase, accent-free, punctuation-free words"""
+    text = unicodedata.normalize('NFKD', str(text or '')).encode('ascii', 'ignore').decode('ascii')
+    return re.findall(r'[a-z0-9]+', text.lower())
+
+
+def shingles(text, size=SHINGLE_WORDS):
+    """Set of hashed word n-grams"""
+    words = normalize_text(text)
+    if len(words) < size:
+        grams = [' '.join(words)] if words else []
+    else:
+        grams = [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return {zlib.crc32(gram.encode('utf-8')) for gram in grams}
+
+
+def minhash(text):
+    """NUM_PERM-value MinHash signature (uint32 array) of the text's shingles, or None for empty text"""
+    hashed = shingles(text)
+    if not hashed:
+        return None
+    values = np.fromiter(hashed, dtype=np.uint64, count=len(hashed))
+    permuted = (np.outer(values, _PERM_A) + _PERM_B) % _PRIME & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.mean(sig_a == sig_b))
+
+
+def band_buckets(signature):
+    """(band, bucket) keys of a signature; equal keys make two items candidates"""
+    buckets = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+        buckets.append((band, int.from_bytes(hashlib.blake2b(chunk, digest_size=7).digest(), 'big')))
+    return buckets
+
+
+def item_text(headline, summary):
+    return f"{headline or ''} {summary or ''}"
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index over the news table of a NewsStore connection"""
+
+    def __init__(self, db, threshold=None):
+        self._db = db
+        self.threshold = Config.NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+        self._db.executescript(SCHEMA)
+        self._check_version()
+
+    def _check_version(self):
+        """Drop signatures made with other hash functions; backfill() rebuilds them"""
+        row = self._db.execute("SELECT version FROM news_signature_version").fetchone()
+        if row is not None and row[0] == SIGNATURE_VERSION:
+            return
+        with self._db:
+            self._db.execute("DELETE FROM news_signatures")
+            self._db.execute("DELETE FROM news_lsh")
+            self._db.execute("DELETE FROM news_signature_version")
+            self._db.execute("INSERT INTO news_signature_version VALUES (?)", (SIGNATURE_VERSION,))
+
+    def find(self, headline, summary):
+        """(news_id, similarity) of the closest stored near-duplicate, or None"""
+        signature = minhash(item_text(headline, summary))
+        if signature is None:
+            return None
+        return self._best_match(signature)
+
+    def _best_match(self, signature):
+        buckets = band_buckets(signature)
+        values = ', '.join('(?, ?)' for _ in buckets)
+        rows = self._db.execute(
+            f"SELECT DISTINCT s.news_id, s.signature FROM news_lsh l "
+            f"JOIN (VALUES {values}) v ON l.band = v.column1 AND l.bucket = v.column2 "
+            f"JOIN news_signatures s ON s.news_id = l.news_id",
+            [value for bucket in buckets for value in bucket]).fetchall()
+
+        best = None
+        for news_id, blob in rows:
+            score = similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (news_id, score)
+        return best
+
+    def add(self, news_id, headline, summary):
+        """Index a newly stored item"""
+        signature = minhash(item_text(headline, summary))
+        if signature is None:
+            return
+        self._db.execute("INSERT INTO news_signatures VALUES (?, ?)", (news_id, signature.tobytes()))
+        self._db.executemany("INSERT INTO news_lsh VALUES (?, ?, ?)",
+                             [(band, bucket, news_id) for band, bucket in band_buckets(signature)])
+
+    def backfill(self):
+        """Index stored news that has no signature yet (e.g. after a workbook import)"""
+        rows = self._db.execute(
+            "SELECT id, headline, summary FROM news "
+            "WHERE id NOT IN (SELECT news_id FROM news_signatures)").fetchall()
+        with self._db:
+            for news_id, headline, summary in rows:
+                self.add(news_id, headline, summary)
+        return len(rows)
@@ -0,0 +1,172 @@
+"""
+Multi-company batched news queries.
+
+One request asks about N companies at once and gets back a single JSON
+array of items tagged by company, so the system prompt and date-window
+text are paid for once per batch instead of once per company. The answer
+is validated against a small schema and split back out per company;
+companies the answer does not cover are retried with the single-company
+query from news_fetcher.
+"""
+
+import asyncio
+
+from company_index import CompanyIndex
+from config import Config
+from news_fetcher import (
+    AuthenticationError,
+    build_payload,
+    call_api,
+    fetch_company_news,
+    make_scheduler,
+    normalize_item,
+    search_window,
+)
+from news_stream import StreamingItemParser
+
+BATCH_SYSTEM_PROMPT = ("You are a bioplastics industry news researcher. "
+                       "Provide factual, dated information from reliable sources. "
+                       "Answer with JSON only.")
+
+# Field -> (type, required) for one element of the batch answer
+BATCH_ITEM_SCHEMA = {
+    'company': (str, True),
+    'headline': (str, False),
+    'summary': (str, False),
+    'date': (str, False),
+    'url': (str, False),
+    'no_news': (bool, False),
+}
+
+
+def build_batch_query(companies, today=None, days=None):
+    """One query covering several companies"""
+    days = days or Config.DAYS_TO_SEARCH
+    start, today = search_window(today, days)
+    names = '\n'.join(f"- {company}" for company in companies)
+
+    return f"""
+        Find recent news from the last {days} days about each of these bioplastics companies:
+        {names}
+
+        Focus on: new products, partnerships, investments, research developments, or market expansions.
+        Provide factual information with dates if available.
+        Time period: {start.strftime('%B %d')} to {today.strftime('%B %d, %Y')}
+
+        Return a single JSON array, no other text. For each company give at most
+        {Config.MAX_RESULTS_PER_COMPANY} items tagged with the company name exactly as listed:
+        {{"company": "...", "headline": "...", "summary": "...", "date": "YYYY-MM-DD", "url": "..."}}
+        For a company without news in this period add {{"company": "...", "no_news": true}}.
+        """
+
+
+def validate_batch_item(obj):
+    """True if obj matches BATCH_ITEM_SCHEMA and is either a news item or a no-news marker"""
+    if not isinstance(obj, dict):
+        return False
+    for field, (field_type, required) in BATCH_ITEM_SCHEMA.items():
+        if field not in obj or obj[field] is None:
+            if required:
+                return False
+            continue
+        if not isinstance(obj[field], field_type):
+            return False
+    if obj.get('no_news'):
+        return True
+    return bool(obj.get('headline')) and str(obj.get('url', '')).startswith(('http://', 'https://'))
+
+
+def split_batch_answer(content, companies):
+    """
+    Validate a batch answer and split it per company.
+    Returns (items_by_company, covered_companies, rejected_count). A truncated
+    answer still yields every object that was complete.
+    """
+    items = {company: [] for company in companies}
+    covered = set()
+    objects = StreamingItemParser().feed(content or '')
+    valid = [obj for obj in objects if validate_batch_item(obj)]
+    rejected = len(objects) - len(valid)
+
+    # Map the names in the answer back to the requested names in one bulk lookup
+    resolved = CompanyIndex.from_names(companies).resolve_many([obj['company'] for obj in valid])
+    for obj, company in zip(valid, resolved):
+        if company is None:
+            rejected += 1
+            continue
+        covered.add(company)
+        if not obj.get('no_news'):
+            item = normalize_item(obj, company)
+            item['company'] = company
+            items[company].append(item)
+
+    return {company: items[company] for company in covered}, covered, rejected
+
+
+async def fetch_batch(companies, scheduler, today=None, cache=None):
+    """One batched call; returns (items_by_company, covered, rejected, usage)"""
+    payload = build_payload(build_batch_query(companies, today), system_prompt=BATCH_SYSTEM_PROMPT)
+    payload['max_tokens'] = Config.BATCH_MAX_TOKENS
+    data = await call_api(payload, scheduler, cache=cache, window=search_window(today))
+    content = data['choices'][0]['message']['content'] if data.get('choices') else ''
+    items, covered, rejected = split_batch_answer(content, companies)
+    return items, covered, rejected, data.get('usage', {})
+
+
+async def fetch_news_batched(companies, batch_size=None, concurrency=None, scheduler=None, today=None,
+                             cache=None):
+    """
+    Fetch news for many companies in batches of batch_size per call.
+    Returns (items_by_company, errors_by_company, total_usage, stats) where
+    stats counts the API requests sent (cache hits excluded), batch calls,
+    retried companies and rejected answer items.
+    """
+    batch_size = batch_size or Config.NEWS_BATCH_SIZE
+    concurrency = concurrency or Config.NEWS_FETCH_CONCURRENCY
+    scheduler = scheduler or make_scheduler()
+    semaphore = asyncio.Semaphore(concurrency)
+    companies = list(companies)
+    groups = [companies[i:i + batch_size] for i in range(0, len(companies), batch_size)]
+
+    results, errors = {}, {}
+    usage = {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+    stats = {'calls': 0, 'batch_calls': 0, 'retried': 0, 'rejected': 0}
+    admitted = scheduler.admitted
+
+    def add_usage(call_usage):
+        for key in usage:
+            usage[key] += call_usage.get(key, 0) or 0
+
+    async def run_single(company):
+        async with semaphore:
+            try:
+                items, call_usage = await fetch_company_news(company, scheduler, today, cache)
+                results[company] = items
+                add_usage(call_usage)
+            except AuthenticationError:
+                raise
+            except Exception as e:
+                errors[company] = str(e) or type(e).__name__
+
+    async def run_group(group):
+        covered = set()
+        async with semaphore:
+            stats['batch_calls'] += 1
+            try:
+                items, covered, rejected, call_usage = await fetch_batch(group, scheduler, today, cache)
+                results.update(items)
+                stats['rejected'] += rejected
+                add_usage(call_usage)
+            except AuthenticationError:
+                raise
+            except Exception as e:
+                print(f"  ⚠️ Batch of {len(group)} failed ({str(e) or type(e).__name__}), retrying one by one")
+
+        missing = [company for company in group if company not in covered]
+        stats['retried'] += len(missing)
+        await asyncio.gather(*(run_single(company) for company in missing))
+        print(f"  Batch {', '.join(group)[:60]}: {len(group) - len(missing)}/{len(group)} covered")
+
+    await asyncio.gather(*(run_group(group) for group in groups))
+    stats['calls'] = scheduler.admitted - admitted
+    return results, errors, usage, stats
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Batch news fetcher for all companies in companies.xlsx.
+
+Sends the per-company Perplexity query (see test_company_news_search() in
+test_perplexity_api.py) for many companies at once. A RateLimitScheduler
+keeps the calls within the account's request-per-minute and
+token-per-minute quotas, and 429 responses pause all workers for the
+Retry-After time (or a jittered backoff) before the company is retried.
+
+Results are date-filtered, de-duplicated by URL and appended to the news
+database (news_store.py); --export regenerates companies_news.xlsx and
+--hugo writes the changed Hugo news pages (hugo_export.py).
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import time
+from datetime import datetime, timedelta
+
+import metrics
+from config import Config
+from http_client import arequest, retry_after_too_long, retry_delay, run_async
+from llm_cache import MODES, LLMCache
+from rate_limiter import RateLimitScheduler
+
+SYSTEM_PROMPT = ("You are a bioplastics industry news researcher. "
+                 "Provide factual, dated information from reliable sources.")
+
+
+class RateLimitExceeded(Exception):
+    """A company was still rate limited after all retries"""
+
+
+class AuthenticationError(Exception):
+    """The API rejected the key; retrying other companies is pointless"""
+
+
+def search_window(today=None, days=None):
+    """(start, end) dates of the news search"""
+    today = today or datetime.now()
+    days = days or Config.DAYS_TO_SEARCH
+    return (today - timedelta(days=days)).date(), today.date()
+
+
+def build_news_query(company, today=None, days=None):
+    """The per-company news query, asking for a JSON array of items"""
+    days = days or Config.DAYS_TO_SEARCH
+    start, today = search_window(today, days)
+
+    return f"""
+        Find recent news about {company} bioplastics company from the last {days} days.
+        Focus on: new products, partnerships, investments, research developments, or market expansions.
+        Provide factual information with dates if available.
+        Time period: {start.strftime('%B %d')} to {today.strftime('%B %d, %Y')}
+
+        Return at most {Config.MAX_RESULTS_PER_COMPANY} items as a JSON array only, no other text:
+        [{{"headline": "...", "summary": "...", "date": "YYYY-MM-DD", "url": "..."}}]
+        Return [] if there is no news in this period.
+        """
+
+
+def build_payload(query, system_prompt=SYSTEM_PROMPT):
+    return {
+        "model": Config.DEFAULT_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": query},
+        ],
+        "max_tokens": Config.MAX_TOKENS,
+        "temperature": Config.TEMPERATURE,
+        "return_citations": True,
+        "stream": False,
+    }
+
+
+def api_headers():
+    return {
+        "Authorization": f"Bearer {Config.PERPLEXITY_API_KEY}",
+        "Content-Type": "application/json",
+    }
+
+
+def estimate_tokens(payload):
+    """Upper-bound token cost of a call: prompt (~4 chars/token) plus the full completion budget"""
+    prompt_chars = sum(len(m['content']) for m in payload['messages'])
+    return prompt_chars // 4 + payload['max_tokens']
+
+
+def record_usage(usage):
+    """Count the tokens of one (uncached) API call"""
+    metrics.incr('llm_calls')
+    metrics.incr('llm_tokens', usage.get('prompt_tokens') or 0, kind='prompt')
+    metrics.incr('llm_tokens', usage.get('completion_tokens') or 0, kind='completion')
+
+
+def parse_news_items(content, company=None):
+    """
+    Extract the JSON array of news items from a completion.
+    Tolerates code fences and explanatory text around the array.
+    """
+    match = re.search(r'\[.*\]', content or '', re.S)
+    if not match:
+        return []
+    try:
+        items = json.loads(match.group(0))
+    except ValueError:
+        return []
+
+    news = [normalize_item(item, company) for item in items]
+    return [item for item in news if item is not None]
+
+
+def normalize_item(item, company=None):
+    """A news item dict with the fields we store, or None if it has no headline"""
+    if not isinstance(item, dict) or not item.get('headline'):
+        return None
+    return {
+        'company': item.get('company') or company,
+        'headline': str(item.get('headline', '')).strip(),
+        'summary': str(item.get('summary', '')).strip(),
+        'date': str(item.get('date', '')).strip(),
+        'url': str(item.get('url', '')).strip(),
+    }
+
+
+async def call_api(payload, scheduler, max_retries=None, cache=None, window=None):
+    """
+    POST one completion request under the scheduler.
+    429s pause the scheduler and are retried (unless Retry-After asks for
+    more than HTTP_MAX_RETRY_AFTER); returns the response JSON.
+    With an llm_cache.LLMCache, cached answers skip the API (and the quota).
+    """
+    if cache is not None:
+        cached = cache.get(payload, window)
+        if cached is not None:
+            return cached
+
+    max_retries = Config.PERPLEXITY_MAX_RETRIES if max_retries is None else max_retries
+    estimated = estimate_tokens(payload)
+
+    for attempt in range(max_retries + 1):
+        await scheduler.acquire(estimated)
+        started = time.perf_counter()
+        response = await arequest('POST', Config.PERPLEXITY_API_URL, retries=0,
+                                  headers=api_headers(), json=payload, timeout=60)
+        metrics.observe('llm_request_seconds', time.perf_counter() - started)
+
+        if response.status_code == 429:
+            metrics.incr('llm_rate_limited')
+            scheduler.settle(estimated, 0)
+            if retry_after_too_long(response):
+                raise RateLimitExceeded(f"Rate limited, Retry-After {response.headers['retry-after']}")
+            scheduler.pause(retry_delay(attempt, response))
+            continue
+        if response.status_code == 401:
+            raise AuthenticationError("Authentication failed - check PERPLEXITY_API_KEY in .env")
+        response.raise_for_status()
+
+        data = response.json()
+        scheduler.settle(estimated, data.get('usage', {}).get('total_tokens'))
+        record_usage(data.get('usage', {}))
+        if cache is not None:
+            cache.put(payload, data, window)
+        return data
+
+    raise RateLimitExceeded(f"Still rate limited after {max_retries} retries")
+
+
+async def fetch_company_news(company, scheduler, today=None, cache=None):
+    """Fetch and parse the news items for one company"""
+    payload = build_payload(build_news_query(company, today))
+    data = await call_api(payload, scheduler, cache=cache, window=search_window(today))
+    content = data['choices'][0]['message']['content'] if data.get('choices') else ''
+    return parse_news_items(content, company), data.get('usage', {})
+
+
+def make_scheduler():
+    """Scheduler sized from the configured account quota"""
+    return RateLimitScheduler(
+        rpm=Config.PERPLEXITY_RPM,
+        tpm=Config.PERPLEXITY_TPM,
+        headroom=Config.RATE_LIMIT_HEADROOM,
+        max_request_tokens=Config.MAX_TOKENS * 2,
+    )
+
+
+async def fetch_news_batch(companies, concurrency=None, scheduler=None, today=None, cache=None):
+    """
+    Fetch news for many companies concurrently.
+    Returns (items_by_company, errors_by_company, total_usage).
+    """
+    concurrency = concurrency or Config.NEWS_FETCH_CONCURRENCY
+    scheduler = scheduler or make_scheduler()
+    semaphore = asyncio.Semaphore(concurrency)
+    companies = list(companies)
+    results, errors = {}, {}
+    usage = {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+    done = 0
+
+    async def worker(company):
+        nonlocal done
+        async with semaphore:
+            try:
+                items, call_usage = await fetch_company_news(company, scheduler, today, cache)
+                results[company] = items
+                for key in usage:
+                    usage[key] += call_usage.get(key, 0) or 0
+            except AuthenticationError:
+                raise  # Stop the whole batch
+            except Exception as e:
+                errors[company] = str(e) or type(e).__name__
+        done += 1
+        status = f"❌ {errors[company]}" if company in errors else f"{len(results[company])} items"
+        print(f"[{done}/{len(companies)}] {company}: {status}")
+
+    await asyncio.gather(*(worker(company) for company in companies))
+
+    if scheduler.rate_limited:
+        print(f"\n⚠️ Rate limited {scheduler.rate_limited} times, waited {scheduler.waited:.0f}s in total")
+    return results, errors, usage
+
+
+def filter_recent(items, days=None, today=None):
+    """Keep items dated within the search window (undated or unparsable dates are dropped)"""
+    from dateutil import parser as date_parser
+
+    days = days or Config.DAYS_TO_SEARCH
+    today = today or datetime.now()
+    cutoff = (today - timedelta(days=days)).date()
+
+    recent = []
+    for item in items:
+        try:
+            item_date = date_parser.parse(item['date']).date()
+        except (ValueError, OverflowError, TypeError):
+            continue
+        if cutoff <= item_date <= today.date():
+            item['date'] = item_date.isoformat()
+            recent.append(item)
+    return recent
+
+
+def save_news(items, store):
+    """Append new items to the news database, skipping URLs that are already stored"""
+    return len(store.add_news(items))
+
+
+def parse_args(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Fetch recent news for all companies via Perplexity")
+    parser.add_argument('--companies-file', help="Workbook with a Company column (default: the companies database)")
+    parser.add_argument('--limit', type=int, help="Only fetch the first N companies")
+    parser.add_argument('--concurrency', type=int, default=Config.NEWS_FETCH_CONCURRENCY,
+                        help="Number of API calls in flight")
+    parser.add_argument('--cache-mode', choices=MODES, default=Config.LLM_CACHE_MODE,
+                        help="Response cache: read-write, record, replay (offline) or off")
+    parser.add_argument('--batch-size', type=int, default=Config.NEWS_BATCH_SIZE,
+                        help="Companies packed into one query (1 = one query per company)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Stream completions (SSE) and process items as they arrive")
+    parser.add_argument('--date', type=datetime.fromisoformat,
+                        help="Search window end date YYYY-MM-DD (default today; use the recording date to replay)")
+    parser.add_argument('--no-feeds', action='store_true',
+                        help="Query Perplexity for every company instead of polling discovered RSS feeds")
+    parser.add_argument('--export', action='store_true', help=f"Regenerate {Config.NEWS_XLSX} after the run")
+    parser.add_argument('--hugo', action='store_true',
+                        help=f"Update the changed news pages in {Config.HUGO_CONTENT_DIR} after the run")
+    metrics.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None, prog=None):
+    args = parse_args(argv, prog)
+    with metrics.run_report('news_fetcher', args):
+        run(args)
+
+
+def run(args):
+    import pandas as pd
+    from news_store import NewsStore
+
+    if args.cache_mode != 'replay':
+        Config.validate()
+
+    print("=" * 60)
+    print("Bioplastic Company News Fetcher")
+    print("=" * 60)
+
+    store = NewsStore()
+    if args.companies_file:
+        companies = pd.read_excel(args.companies_file)['Company'].dropna().astype(str).tolist()
+    else:
+        companies = store.company_names()
+    if args.limit:
+        companies = companies[:args.limit]
+
+    # Companies with a discovered feed are read from the feed, not from Perplexity
+    feed_items = []
+    selected = set(companies)
+    feeds = {} if args.no_feeds else {company: url for company, url in store.company_feeds().items()
+                                      if company in selected}
+    if feeds:
+        from feed_poller import FeedStore, poll_feeds, print_feed_stats
+        print(f"\n📡 Polling {len(feeds)} company feeds...")
+        with FeedStore() as feed_store, metrics.timed('feeds'):
+            feed_items, feed_stats, feed_statuses = run_async(poll_feeds(feeds, feed_store))
+        print_feed_stats(feed_stats, feed_items)
+        failed = [company for company in feeds if feed_statuses.get(company) == 'error']
+        if failed:
+            print(f"   ↩️  {len(failed)} companies with failing feeds are fetched via Perplexity")
+        companies = [company for company in companies if company not in feeds or company in failed]
+
+    print(f"\n🔍 Fetching news for {len(companies)} companies "
+          f"({Config.PERPLEXITY_RPM} RPM / {Config.PERPLEXITY_TPM} TPM quota)\n")
+
+    with LLMCache(mode=args.cache_mode) as cache, metrics.timed('perplexity'):
+        if args.stream:
+            from news_stream import stream_news_pipeline
+            items, recent, new_items, errors, usage = run_async(stream_news_pipeline(
+                companies, concurrency=args.concurrency, today=args.date, cache=cache, store=store))
+            results = set(companies) - set(errors)
+            streamed, new_items = len(new_items), []  # Stored as they arrived
+        else:
+            if args.batch_size > 1:
+                from news_batch import fetch_news_batched
+                results, errors, usage, stats = run_async(fetch_news_batched(
+                    companies, batch_size=args.batch_size, concurrency=args.concurrency,
+                    today=args.date, cache=cache))
+            else:
+                scheduler = make_scheduler()
+                results, errors, usage = run_async(fetch_news_batch(companies, concurrency=args.concurrency,
+                                                                    scheduler=scheduler, today=args.date,
+                                                                    cache=cache))
+                stats = {'calls': scheduler.admitted}  # Requests sent; cache hits don't count
+            streamed = 0
+            items = [item for company_items in results.values() for item in company_items]
+            recent = new_items = filter_recent(items, today=args.date)
+            if stats['calls']:
+                print(f"\n📦 {len(companies) / stats['calls']:.1f} companies per call "
+                      f"({stats['calls']} calls), {usage['total_tokens'] / max(len(companies), 1):.0f} tokens per company")
+            if stats.get('retried'):
+                print(f"   {stats['retried']} companies missing from batch answers were retried on their own")
+    if cache.hits or cache.misses:
+        print(f"\n🗄️  Response cache: {cache.hits} hits, {cache.misses} misses")
+    metrics.incr('llm_cache', cache.hits, result='hit')
+    metrics.incr('llm_cache', cache.misses, result='miss')
+
+    feed_recent = filter_recent(feed_items, today=args.date)
+    with metrics.timed('save'):
+        added = streamed + save_news(feed_recent + new_items, store)
+    metrics.incr('news_items', len(items) + len(feed_items), result='returned')
+    metrics.incr('news_items', added, result='new')
+    metrics.incr('news_items', store.skipped['url'], result='duplicate_url')
+    metrics.incr('news_items', store.skipped['near_duplicate'], result='near_duplicate')
+    if args.export:
+        with metrics.timed('excel_export'):
+            print(f"\n💾 Exported {store.count_news()} items to {store.export_news()}")
+    if args.hugo:
+        from hugo_export import export_hugo
+        with metrics.timed('hugo_export'):
+            pages = export_hugo(store.news_rows())
+        print(f"\n📰 Hugo pages: {pages['written']} written, {pages['removed']} removed, "
+              f"{pages['skipped'] + pages['unchanged']} unchanged")
+    store.close()
+
+    print("\n" + "=" * 60)
+    print("📊 Summary")
+    print("=" * 60)
+    print(f"Companies fetched: {len(results)} ({len(errors)} failed)")
+    print(f"Items returned: {len(items) + len(feed_items)}, within date range: {len(recent) + len(feed_recent)}, "
+          f"new: {added}")
+    if store.skipped['url'] or store.skipped['near_duplicate']:
+        print(f"Duplicates skipped: {store.skipped['url']} by URL, {store.skipped['near_duplicate']} near-duplicates")
+    print(f"Tokens used: {usage['total_tokens']} "
+          f"(prompt {usage['prompt_tokens']}, completion {usage['completion_tokens']})")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+SQLite storage engine for news items and companies.
+
+Replaces the read-modify-write cycle on companies_news.xlsx: new items are
+appended (rows imported from the workbook are upserted by ID), and dedup
+(canonical URL plus the near_duplicates MinHash/LSH index), week filters
+and company lookups go through indexes instead of loading the whole
+history. The workbooks companies_news.xlsx and companies.xlsx become
+exports generated on demand; on first use existing workbooks are imported.
+
+Usage:
+    python news_store.py export            # write both workbooks
+    python news_store.py export --news     # only companies_news.xlsx
+    python news_store.py import            # (re)import both workbooks
+"""
+
+import argparse
+import json
+import math
+import sqlite3
+from datetime import datetime
+
+from config import Config
+from company_index import CompanyIndex
+from near_duplicates import NearDuplicateIndex, canonical_url
+
+# Workbook header -> news table column, in export order
+NEWS_COLUMNS = [
+    ('ID', 'id'),
+    ('Company', 'company'),
+    ('Company matched', 'company_matched'),
+    ('Publishing Date', 'date'),
+    ('Headline', 'headline'),
+    ('Description', 'summary'),
+    ('Category', 'category'),
+    ('Source URL (company)', 'company_url'),
+    ('Source URL (other)', 'url'),
+    ('Week', 'week'),
+    ('Source Skill', 'source'),
+    ('Credibility Score', 'credibility'),
+    ('Story Generated', 'story_generated'),
+    ('News Filename', 'news_filename'),
+]
+
+# Companies columns written by check_rss_news.py; a workbook re-import keeps them
+DISCOVERED_COLUMNS = ('RSS Feed URL', 'News Section URL')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS news (
+    id INTEGER PRIMARY KEY,
+    company TEXT,
+    company_matched TEXT,
+    date TEXT,
+    headline TEXT,
+    summary TEXT,
+    category TEXT,
+    company_url TEXT,
+    url TEXT,
+    canonical_url TEXT,
+    week TEXT,
+    source TEXT,
+    credibility REAL,
+    story_generated TEXT,
+    news_filename TEXT,
+    added_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS news_url ON news (url);
+CREATE INDEX IF NOT EXISTS news_company ON news (company);
+CREATE INDEX IF NOT EXISTS news_week ON news (week);
+
+CREATE TABLE IF NOT EXISTS companies (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def iso_week(date_text):
+    """'2025-10-30' -> '2025-W44' (None if the date can't be parsed)"""
+    try:
+        year, week, _ = datetime.fromisoformat(str(date_text)[:10]).isocalendar()
+    except ValueError:
+        return None
+    return f"{year}-W{week:02d}"
+
+
+def _clean(value):
+    """JSON-safe cell value (NaN/NaT -> None, timestamps -> ISO text)"""
+    if value is None:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if hasattr(value, 'isoformat'):
+        try:
+            return value.isoformat()
+        except ValueError:  # NaT
+            return None
+    if hasattr(value, 'item'):  # numpy scalars
+        return value.item()
+    return value
+
+
+class NewsStore:
+    """News items and companies in one SQLite database"""
+
+    def __init__(self, path=None, import_workbooks=True):
+        self.path = path or Config.NEWS_DB_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path))
+        self._db.executescript(SCHEMA)
+        self._migrate()
+        self.duplicates = NearDuplicateIndex(self._db)
+        self.skipped = {'url': 0, 'near_duplicate': 0}
+        self._company_index = None
+        if import_workbooks:
+            self.import_if_empty()
+        self.duplicates.backfill()
+
+    def _migrate(self):
+        """Bring databases created by older versions up to the current schema"""
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(news)")}
+        if 'canonical_url' not in columns:
+            self._db.execute("ALTER TABLE news ADD COLUMN canonical_url TEXT")
+            rows = self._db.execute("SELECT id, url FROM news WHERE url IS NOT NULL").fetchall()
+            self._db.executemany("UPDATE news SET canonical_url = ? WHERE id = ?",
+                                 [(canonical_url(url), news_id) for news_id, url in rows])
+        self._db.execute("CREATE INDEX IF NOT EXISTS news_canonical_url ON news (canonical_url)")
+        self._db.commit()
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # News
+
+    def add_news(self, items):
+        """
+        Append fetched news items (dicts with company, headline, summary, date
+        and url). Items whose canonical URL is already stored, or whose text
+        nearly duplicates a stored item, are skipped and counted in
+        self.skipped. Returns the items that were actually new.
+        """
+        added = []
+        now = datetime.now().isoformat(timespec='seconds')
+        items = list(items)
+        matched = self.company_index().resolve_many([item.get('company') for item in items])
+        with self._db:
+            for item, company_matched in zip(items, matched):
+                if not item.get('url'):
+                    continue
+                if self.is_known(item['url']):
+                    self.skipped['url'] += 1
+                    continue
+                if self.duplicates.find(item.get('headline'), item.get('summary')) is not None:
+                    self.skipped['near_duplicate'] += 1
+                    continue
+                cursor = self._db.execute(
+                    "INSERT INTO news (company, company_matched, date, headline, summary, url, canonical_url, "
+                    "week, added_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (item.get('company'), company_matched, item.get('date'), item.get('headline'),
+                     item.get('summary'), item['url'], canonical_url(item['url']), iso_week(item.get('date')), now))
+                self.duplicates.add(cursor.lastrowid, item.get('headline'), item.get('summary'))
+                added.append(item)
+        return added
+
+    def is_known(self, url):
+        """True if a URL equal to this one after canonicalization is stored"""
+        return self._db.execute("SELECT 1 FROM news WHERE canonical_url = ?",
+                                (canonical_url(url),)).fetchone() is not None
+
+    def news_rows(self):
+        """All news items as dicts, oldest ID first"""
+        return self._rows("SELECT * FROM news ORDER BY id")
+
+    def count_news(self):
+        return self._db.execute("SELECT COUNT(*) FROM news").fetchone()[0]
+
+    def news_frame(self):
+        """All news as a DataFrame with the workbook's columns"""
+        import pandas as pd
+        columns = ', '.join(column for _, column in NEWS_COLUMNS)
+        rows = self._db.execute(f"SELECT {columns} FROM news ORDER BY id")
+        return pd.DataFrame(rows.fetchall(), columns=[header for header, _ in NEWS_COLUMNS])
+
+    def _rows(self, sql, params=()):
+        cursor = self._db.execute(sql, params)
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    # Companies
+
+    def companies_frame(self):
+        """companies.xlsx as a DataFrame, in stored order"""
+        return _companies_frame(self._db)
+
+    def company_names(self):
+        return [row[0] for row in self._db.execute("SELECT name FROM companies ORDER BY position")]
+
+    def company_feeds(self):
+        """{company: RSS Feed URL} for the companies with a discovered feed"""
+        feeds = {}
+        for name, data in self._db.execute("SELECT name, data FROM companies ORDER BY position"):
+            feed = json.loads(data).get('RSS Feed URL')
+            if feed:
+                feeds[name] = feed
+        return feeds
+
+    def company_index(self):
+        """Alias index over the stored companies (rebuilt only when they change)"""
+        if self._company_index is None:
+            self._company_index = CompanyIndex.load(self._db, self.company_names())
+        return self._company_index
+
+    def save_companies(self, df):
+        """Upsert every row of a companies DataFrame (keyed by the Company column)"""
+        with self._db:
+            for position, row in enumerate(df.to_dict('records')):
+                name = _clean(row.get('Company'))
+                if not name:
+                    continue
+                data = json.dumps({column: _clean(value) for column, value in row.items()}, ensure_ascii=False)
+                self._db.execute(
+                    "INSERT INTO companies (name, position, data) VALUES (?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET position = excluded.position, data = excluded.data",
+                    (str(name), position, data))
+        self._company_index = None
+
+    # Import / export
+
+    def import_if_empty(self):
+        """
+        First use: load the existing workbooks into empty tables. The companies
+        workbook is also re-imported when it was edited since the last
+        import or export.
+        """
+        import os
+        if not self.count_news() and os.path.exists(Config.NEWS_XLSX):
+            self.import_news(Config.NEWS_XLSX)
+        if os.path.exists(Config.COMPANIES_XLSX):
+            if not self.company_names() or self._workbook_changed(Config.COMPANIES_XLSX):
+                self.import_companies(Config.COMPANIES_XLSX)
+
+    def _workbook_changed(self, filename):
+        import os
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (f"mtime:{filename}",)).fetchone()
+        return row is None or os.path.getmtime(filename) > float(row[0])
+
+    def _remember_workbook(self, filename):
+        import os
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                             (f"mtime:{filename}", str(os.path.getmtime(filename))))
+
+    def import_news(self, filename):
+        """Upsert the rows of a news workbook, keyed by its ID column"""
+        import pandas as pd
+        df = pd.read_excel(filename)
+        now = datetime.now().isoformat(timespec='seconds')
+        present = [(header, column) for header, column in NEWS_COLUMNS if header in df.columns]
+        columns = [column for _, column in present]
+        columns += [column for column in ('week', 'canonical_url') if column not in columns]
+        placeholders = ', '.join('?' for _ in columns)
+        updates = ', '.join(f"{column} = excluded.{column}" for column in columns if column != 'id')
+
+        with self._db:
+            for row in df.to_dict('records'):
+                record = {column: _clean(row[header]) for header, column in present}
+                if record.get('date'):
+                    record['date'] = str(record['date'])[:10]
+                record['week'] = record.get('week') or iso_week(record.get('date'))
+                record['canonical_url'] = canonical_url(record.get('url'))
+                self._db.execute(
+                    f"INSERT INTO news ({', '.join(columns)}, added_at) VALUES ({placeholders}, ?) "
+                    f"ON CONFLICT(id) DO UPDATE SET {updates}",
+                    [record.get(column) for column in columns] + [now])
+            # Imported rows may have changed text: re-index them all
+            self._db.execute("DELETE FROM news_signatures")
+            self._db.execute("DELETE FROM news_lsh")
+        self.duplicates.backfill()
+        return len(df)
+
+    def import_companies(self, filename):
+        """
+        Replace the stored companies with the rows of a companies workbook.
+        Discovered feed / news section URLs already stored for a company are
+        kept; the workbook only fills them in where none was found yet.
+        """
+        import pandas as pd
+        df = pd.read_excel(filename)
+        stored = {name: json.loads(data) for name, data in self._db.execute("SELECT name, data FROM companies")}
+        for column in DISCOVERED_COLUMNS:
+            kept = df['Company'].map(lambda name: stored.get(str(name), {}).get(column))
+            df[column] = kept.where(kept.notna(), df[column]) if column in df.columns else kept
+        names = set(df['Company'].dropna().astype(str))
+        with self._db:
+            self._db.executemany("DELETE FROM companies WHERE name = ?",
+                                 [(name,) for name in self.company_names() if name not in names])
+        self.save_companies(df)
+        self._remember_workbook(filename)
+        return len(df)
+
+    def export_news(self, filename=None):
+        from excel_writer import write_formatted_excel
+        return write_formatted_excel(self.news_frame(), filename or Config.NEWS_XLSX)
+
+    def export_companies(self, filename=None):
+        from excel_writer import write_formatted_excel
+        filename = write_formatted_excel(self.companies_frame(), filename or Config.COMPANIES_XLSX)
+        self._remember_workbook(filename)
+        return filename
+
+
+def _companies_frame(db):
+    import pandas as pd
+    rows = [json.loads(data) for (data,) in db.execute("SELECT data FROM companies ORDER BY position")]
+    return pd.DataFrame(rows)
+
+
+def read_companies_frame(path=None):
+    """
+    NewsStore.companies_frame() from a read-only connection, for processes
+    that must not write the database (discovery shards)
+    """
+    path = path or Config.NEWS_DB_PATH
+    if not path.exists():
+        raise FileNotFoundError(f"{path} not found - run once without --shard to import the companies")
+    db = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        return _companies_frame(db)
+    finally:
+        db.close()
+
+
+def main(argv=None, command=None, prog=None):
+    """command: run only 'export' or 'import' (it is then not parsed from argv), as for `cli.py export`"""
+    parser = argparse.ArgumentParser(prog=prog, description="Import/export the news database")
+    if command is None:
+        parser.add_argument('command', choices=['export', 'import'])
+    parser.add_argument('--news', action='store_true', help="Only the news workbook")
+    parser.add_argument('--companies', action='store_true', help="Only the companies workbook")
+    args = parser.parse_args(argv)
+    command = command or args.command
+    both = not (args.news or args.companies)
+
+    with NewsStore(import_workbooks=False) as store:
+        if command == 'import':
+            if both or args.news:
+                print(f"✅ Imported {store.import_news(Config.NEWS_XLSX)} items from {Config.NEWS_XLSX}")
+            if both or args.companies:
+                print(f"✅ Imported {store.import_companies(Config.COMPANIES_XLSX)} companies from {Config.COMPANIES_XLSX}")
+        else:
+            if both or args.news:
+                print(f"✅ Exported {store.count_news()} items to {store.export_news()}")
+            if both or args.companies:
+                print(f"✅ Exported {len(store.company_names())} companies to {store.export_companies()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+"""
+Streaming (server-sent events) mode for Perplexity completions.
+
+Instead of waiting for the full MAX_TOKENS completion, the request is sent
+with "stream": true and the SSE stream is consumed as it arrives. News
+items are pulled out of the partial JSON array as soon as each object
+closes, and handed to the downstream stages (date filter, dedup, Excel
+write) while the rest of the completion is still being generated.
+
+fake_perplexity.py serves a local SSE stand-in for trying this offline.
+"""
+
+import asyncio
+import json
+import time
+
+import metrics
+from config import Config
+from http_client import astream, retry_after_too_long, retry_delay
+from news_fetcher import (
+    AuthenticationError,
+    RateLimitExceeded,
+    api_headers,
+    build_news_query,
+    build_payload,
+    estimate_tokens,
+    make_scheduler,
+    normalize_item,
+    record_usage,
+    search_window,
+)
+
+
+async def iter_sse_events(lines):
+    """Yield the data of each server-sent event from an async iterator of lines"""
+    data = []
+    async for line in lines:
+        if not line:
+            if data:
+                yield '\n'.join(data)
+                data = []
+            continue
+        if line.startswith(':'):
+            continue  # Comment / keep-alive
+        field, _, value = line.partition(':')
+        if field == 'data':
+            data.append(value[1:] if value.startswith(' ') else value)
+    if data:
+        yield '\n'.join(data)
+
+
+class StreamingItemParser:
+    """
+    Pulls complete JSON objects out of a streamed JSON array.
+    feed() returns every top-level object that closed in the new text;
+    text outside objects (fences, explanations) is skipped.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.pos = 0
+        self.depth = 0
+        self.start = None
+        self.in_string = False
+        self.escape = False
+
+    def feed(self, text):
+        self.buffer += text
+        objects = []
+        buffer = self.buffer
+
+        while self.pos < len(buffer):
+            ch = buffer[self.pos]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"' and self.depth > 0:
+                self.in_string = True
+            elif ch == '{':
+                if self.depth == 0:
+                    self.start = self.pos
+                self.depth += 1
+            elif ch == '}' and self.depth > 0:
+                self.depth -= 1
+                if self.depth == 0:
+                    try:
+                        objects.append(json.loads(buffer[self.start:self.pos + 1]))
+                    except ValueError:
+                        pass
+                    self.start = None
+            self.pos += 1
+
+        # Only keep the unfinished object in memory
+        keep_from = self.start if self.start is not None else self.pos
+        self.buffer = buffer[keep_from:]
+        self.pos -= keep_from
+        if self.start is not None:
+            self.start = 0
+        return objects
+
+
+async def stream_completion(payload, scheduler, usage, max_retries=None):
+    """
+    Async generator of content deltas of a streamed completion.
+    Retries 429s like news_fetcher.call_api(); the final usage block is
+    copied into `usage`.
+    """
+    max_retries = Config.PERPLEXITY_MAX_RETRIES if max_retries is None else max_retries
+    payload = dict(payload, stream=True)
+    estimated = estimate_tokens(payload)
+
+    for attempt in range(max_retries + 1):
+        await scheduler.acquire(estimated)
+        started = time.perf_counter()
+        first_delta = True
+        async with astream('POST', Config.PERPLEXITY_API_URL, retries=0, headers=api_headers(),
+                           json=payload, timeout=60) as response:
+            if response.status_code == 429:
+                metrics.incr('llm_rate_limited')
+                scheduler.settle(estimated, 0)
+                if retry_after_too_long(response):
+                    raise RateLimitExceeded(f"Rate limited, Retry-After {response.headers['retry-after']}")
+                scheduler.pause(retry_delay(attempt, response))
+                continue
+            if response.status_code == 401:
+                raise AuthenticationError("Authentication failed - check PERPLEXITY_API_KEY in .env")
+            if response.status_code >= 400:
+                await response.aread()
+                response.raise_for_status()
+
+            async for event in iter_sse_events(response.aiter_lines()):
+                if event.strip() == '[DONE]':
+                    break
+                chunk = json.loads(event)
+                if chunk.get('usage'):
+                    usage.update(chunk['usage'])
+                for choice in chunk.get('choices') or []:
+                    delta = (choice.get('delta') or {}).get('content')
+                    if delta:
+                        if first_delta:
+                            metrics.observe('llm_first_token_seconds', time.perf_counter() - started)
+                            first_delta = False
+                        yield delta
+
+        metrics.observe('llm_request_seconds', time.perf_counter() - started)
+        scheduler.settle(estimated, usage.get('total_tokens'))
+        record_usage(usage)
+        return
+
+    raise RateLimitExceeded(f"Still rate limited after {max_retries} retries")
+
+
+async def stream_company_news(company, scheduler, today=None, cache=None, usage=None):
+    """Async generator of news items for one company, yielded as they are generated"""
+    usage = {} if usage is None else usage
+    payload = build_payload(build_news_query(company, today))
+    window = search_window(today)
+    parser = StreamingItemParser()
+
+    cached = cache.get(payload, window) if cache is not None else None
+    if cached is not None:
+        content = cached['choices'][0]['message']['content'] if cached.get('choices') else ''
+        usage.update(cached.get('usage') or {})
+        for obj in parser.feed(content):
+            item = normalize_item(obj, company)
+            if item is not None:
+                yield item
+        return
+
+    content = []
+    async for delta in stream_completion(payload, scheduler, usage):
+        content.append(delta)
+        for obj in parser.feed(delta):
+            item = normalize_item(obj, company)
+            if item is not None:
+                yield item
+
+    if cache is not None:
+        cache.put(payload, {'choices': [{'message': {'role': 'assistant', 'content': ''.join(content)}}],
+                            'usage': usage}, window)
+
+
+async def stream_news_batch(companies, concurrency=None, scheduler=None, today=None, cache=None,
+                            errors=None, usage=None):
+    """
+    Stream news items for many companies concurrently.
+    Yields items from all companies in arrival order; failures go to `errors`
+    and token usage is summed into `usage`.
+    """
+    concurrency = concurrency or Config.NEWS_FETCH_CONCURRENCY
+    scheduler = scheduler or make_scheduler()
+    errors = {} if errors is None else errors
+    usage = {} if usage is None else usage
+    semaphore = asyncio.Semaphore(concurrency)
+    queue = asyncio.Queue()
+    done = object()
+
+    async def worker(company):
+        call_usage = {}
+        try:
+            async with semaphore:
+                async for item in stream_company_news(company, scheduler, today, cache, call_usage):
+                    await queue.put(item)
+        except AuthenticationError as e:
+            await queue.put(e)
+        except Exception as e:
+            errors[company] = str(e) or type(e).__name__
+        finally:
+            for key in ('prompt_tokens', 'completion_tokens', 'total_tokens'):
+                usage[key] = usage.get(key, 0) + (call_usage.get(key) or 0)
+            await queue.put(done)
+
+    tasks = [asyncio.create_task(worker(company)) for company in companies]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item = await queue.get()
+            if item is done:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def stream_news_pipeline(companies, concurrency=None, today=None, cache=None, store=None):
+    """
+    Run the streaming fetch and handle each item as soon as it is parsed:
+    date filter, then dedup (URL and near-duplicate text) and insert into
+    the news store, so stored news doesn't wait for the slowest company.
+    Returns (items, recent_items, new_items, errors, usage); with a store
+    new_items are already saved, without one they are the recent items
+    with unseen URLs.
+    """
+    from near_duplicates import canonical_url
+    from news_fetcher import filter_recent
+
+    seen_urls = set()
+    items, recent, new_items = [], [], []
+    errors = {}
+    usage = {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+    started = time.perf_counter()
+    first_item_at = None
+
+    async for item in stream_news_batch(companies, concurrency=concurrency, today=today, cache=cache,
+                                        errors=errors, usage=usage):
+        items.append(item)
+        if first_item_at is None:
+            first_item_at = time.perf_counter() - started
+        if not filter_recent([item], today=today):
+            continue
+        recent.append(item)
+        if store is not None:
+            if not store.add_news([item]):
+                continue
+        else:
+            url = canonical_url(item['url'])
+            if not url or url in seen_urls:
+                continue
+            seen_urls.add(url)
+        new_items.append(item)
+        print(f"  + {item['company']}: {item['headline']}")
+
+    for company, error in errors.items():
+        print(f"  ❌ {company}: {error}")
+    if first_item_at is not None:
+        print(f"\n⏱️  First item after {first_item_at:.2f}s, all done after {time.perf_counter() - started:.2f}s")
+    return items, recent, new_items, errors, usage
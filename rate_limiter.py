@@ -0,0 +1,94 @@
+"""
+Rate-limit-aware scheduling for API calls.
+
+A RateLimitScheduler holds two token buckets, one for requests per minute
+and one for tokens per minute. Every call reserves one request and its
+estimated token cost before it is sent, and settles the difference once
+the real usage is known. A 429 pauses the whole scheduler, so concurrent
+workers back off together instead of hammering the API.
+
+Each bucket refills at `headroom` of the quota and holds the rest as burst
+capacity, so no rolling minute can ever see more than the quota.
+"""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Refills continuously at rate_per_minute, holds at most capacity"""
+
+    def __init__(self, rate_per_minute, capacity):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until `amount` can be taken (amount is clamped to the capacity)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount):
+        """Remove (or, if negative, return) tokens; may go below zero, which delays later callers"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+def quota_bucket(quota_per_minute, headroom, min_capacity=1):
+    """Bucket whose worst-case rolling minute stays within quota_per_minute"""
+    if not quota_per_minute:
+        return None
+    capacity = max(min_capacity, quota_per_minute * (1 - headroom))
+    return TokenBucket(quota_per_minute * headroom, capacity)
+
+
+class RateLimitScheduler:
+    """Admits API calls under request-per-minute and token-per-minute quotas"""
+
+    def __init__(self, rpm, tpm=None, headroom=0.9, max_request_tokens=1):
+        self.requests = quota_bucket(rpm, headroom)
+        self.tokens = quota_bucket(tpm, headroom, min_capacity=max_request_tokens)
+        self._lock = asyncio.Lock()
+        self._paused_until = 0.0
+        self.waited = 0.0
+        self.rate_limited = 0
+        self.admitted = 0  # Requests sent (cache hits never get here)
+
+    async def acquire(self, estimated_tokens=0):
+        """Wait until one request with estimated_tokens fits in both quotas, then reserve it"""
+        async with self._lock:  # First come, first served
+            while True:
+                wait = self._paused_until - time.monotonic()
+                if self.requests is not None:
+                    wait = max(wait, self.requests.wait_time(1))
+                if self.tokens is not None:
+                    wait = max(wait, self.tokens.wait_time(estimated_tokens))
+                if wait <= 0:
+                    break
+                self.waited += wait
+                await asyncio.sleep(wait)
+
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(estimated_tokens)
+            self.admitted += 1
+
+    def settle(self, estimated_tokens, actual_tokens):
+        """Correct the token reservation once the response reports real usage"""
+        if self.tokens is not None and actual_tokens is not None:
+            self.tokens.take(actual_tokens - estimated_tokens)
+
+    def pause(self, seconds):
+        """Hold back every worker for `seconds` (used after a 429)"""
+        self.rate_limited += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Sitemap-based news section discovery.
+
+Homepage anchors miss newsrooms that only appear in JavaScript menus, but
+sitemaps list them anyway, with <lastmod> dates:
+
+- sitemap locations come from the Sitemap: lines of robots.txt (read
+  through the crawl scheduler, which fetches robots.txt once per site),
+  with /sitemap.xml as fallback and when robots.txt is ignored
+- sitemap indexes are followed, news-looking and recently modified child
+  sitemaps first, up to SITEMAP_MAX_FILES files per site
+- each file is parsed while it downloads by an incremental XML parser;
+  gzip-compressed sitemaps are inflated on the fly
+- URLs below a news/press path are grouped by that section, and sections
+  are scored by freshness: every article adds 0.5 ** (age / half-life)
+
+A handful of sitemap requests replaces guessing news paths one by one.
+
+Usage: python sitemap_scan.py https://www.example.com [...]
+"""
+
+import argparse
+import asyncio
+import time
+import xml.etree.ElementTree as ET
+import zlib
+from urllib.parse import urlsplit
+
+import httpx
+
+from config import Config
+from crawl_scheduler import CrawlScheduler, domain_key
+from feed_poller import parse_timestamp
+from html_scan import NEWS_KEYWORDS_RE
+from http_client import astream, run_async
+
+ENTRY_TAGS = {'url', 'sitemap'}
+SITEMAP_NAMESPACE = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+NEWS_NAMESPACE = 'http://www.google.com/schemas/sitemap-news/0.9'
+SITEMAP_MAX_URLS = 50000  # The sitemap protocol's per-file limit
+FRESHNESS_HALF_LIFE_DAYS = 90
+UNDATED_WEIGHT = 0.1  # Score of an article without <lastmod>
+RECENT_ARTICLES = 10
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+
+def _namespace(tag):
+    return tag[1:].split('}', 1)[0] if isinstance(tag, str) and tag.startswith('{') else ''
+
+
+def parse_sitemap_entry(elem):
+    """
+    A <url> / <sitemap> element as a dict. Only the entry's own <loc> and
+    <lastmod> count (not those of nested image:image or video:video
+    elements); <news:news> adds the publication date and title.
+    """
+    entry = {'kind': _local(elem.tag), 'loc': '', 'lastmod': None, 'news': False, 'title': ''}
+    for child in elem:
+        name, namespace = _local(child.tag), _namespace(child.tag)
+        if namespace in (SITEMAP_NAMESPACE, ''):  # Some sites leave out the namespace
+            text = (child.text or '').strip()
+            if name == 'loc':
+                entry['loc'] = text
+            elif name == 'lastmod':
+                entry['lastmod'] = parse_timestamp(text) or entry['lastmod']
+        elif namespace == NEWS_NAMESPACE and name == 'news':  # Google News sitemaps
+            for field in child.iter():
+                text = (field.text or '').strip()
+                if _local(field.tag) == 'publication_date':
+                    entry['news'] = True
+                    entry['lastmod'] = parse_timestamp(text) or entry['lastmod']
+                elif _local(field.tag) == 'title':
+                    entry['title'] = text
+    return entry
+
+
+class SitemapParser:
+    """Incremental sitemap / sitemap index parser: feed() bytes, get back the entries that closed"""
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=('end',))
+        self._inflate = None
+        self._started = False
+        self.size = 0  # Uncompressed bytes parsed so far
+
+    def feed(self, data):
+        """Parse the next chunk; nothing beyond SITEMAP_MAX_BYTES (uncompressed) is parsed"""
+        if not self._started:
+            self._started = True
+            if data[:2] == b'\x1f\x8b':  # .xml.gz served as a file, not as Content-Encoding
+                self._inflate = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        remaining = Config.SITEMAP_MAX_BYTES - self.size
+        if remaining <= 0:
+            return []
+        if self._inflate is not None:
+            # Input is only left in unconsumed_tail once the limit is reached, and then we stop
+            data = self._inflate.decompress(data, remaining)
+        else:
+            data = data[:remaining]
+        self.size += len(data)
+        self._parser.feed(data)
+
+        entries = []
+        for _, elem in self._parser.read_events():
+            if _local(elem.tag) in ENTRY_TAGS:
+                entries.append(parse_sitemap_entry(elem))
+                elem.clear()
+        return entries
+
+
+async def fetch_sitemap(url, limiter, client=None):
+    """Entries of one sitemap file, parsed while it downloads (what was read before an error)"""
+    parser = SitemapParser()
+    entries = []
+    try:
+        async with limiter.slot(url) as ticket:
+            async with astream('GET', url, client=client, timeout=Config.HTTP_TIMEOUT,
+                               follow_redirects=True) as response:
+                ticket.record(response)
+                if response.status_code != 200:
+                    return entries
+                async for chunk in response.aiter_bytes():
+                    entries.extend(parser.feed(chunk))
+                    if parser.size >= Config.SITEMAP_MAX_BYTES or len(entries) >= SITEMAP_MAX_URLS:
+                        break
+    except (httpx.HTTPError, ET.ParseError, zlib.error):
+        pass  # Missing, HTML soft-404 or cut off: keep what was parsed
+    return entries
+
+
+def looks_like_news(url):
+    return bool(NEWS_KEYWORDS_RE.search(urlsplit(url).path.lower()))
+
+
+def sitemap_priority(entry):
+    """Sort key for child sitemaps: news-looking first, then most recently modified"""
+    return not looks_like_news(entry['loc']), -(entry['lastmod'] or 0)
+
+
+def news_section(url, news=False):
+    """
+    Section URL an article belongs to: the path up to its news/press segment
+    ('/en/press-releases/2025/x' -> '/en/press-releases'). Google News
+    sitemap entries without such a segment fall back to their first segment.
+    Returns (section_url, is_article) or (None, False).
+    """
+    parts = urlsplit(url)
+    segments = [segment for segment in parts.path.split('/') if segment]
+    for idx, segment in enumerate(segments):
+        if NEWS_KEYWORDS_RE.search(segment.lower()):
+            section = f"{parts.scheme}://{parts.netloc}/{'/'.join(segments[:idx + 1])}"
+            return section, idx + 1 < len(segments)
+    if news and len(segments) > 1:
+        return f"{parts.scheme}://{parts.netloc}/{segments[0]}", True
+    return None, False
+
+
+def score_sections(entries, now=None):
+    """[(score, section_url, article_count)] best first, from sitemap <url> entries"""
+    now = now or time.time()
+    half_life = FRESHNESS_HALF_LIFE_DAYS * 86400
+    sections = {}
+    listed = {}  # Section pages that appear in the sitemap themselves, in their exact spelling
+
+    for entry in entries:
+        section, is_article = news_section(entry['loc'], entry['news'])
+        if section is None:
+            continue
+        score, count = sections.get(section, (0.0, 0))
+        if is_article:
+            weight = UNDATED_WEIGHT if entry['lastmod'] is None else 0.5 ** (max(0, now - entry['lastmod']) / half_life)
+            sections[section] = (score + weight, count + 1)
+        else:
+            sections[section] = (score, count)
+            listed[section] = entry['loc']
+
+    ranked = [(score, listed.get(section, section), count) for section, (score, count) in sections.items()]
+    # Best score first; ties (e.g. no articles) go to the shorter, more general section
+    ranked.sort(key=lambda item: (-item[0], len(item[1])))
+    return ranked
+
+
+def recent_articles(entries, limit=RECENT_ARTICLES):
+    """[(lastmod, url, title)] of the newest dated news articles"""
+    articles = [(entry['lastmod'], entry['loc'], entry['title']) for entry in entries
+                if entry['lastmod'] is not None and news_section(entry['loc'], entry['news'])[1]]
+    articles.sort(reverse=True)
+    return articles[:limit]
+
+
+async def discover_news(url, limiter, max_files=None):
+    """
+    News section and latest articles of a site from its sitemaps.
+    Returns {'news_url', 'sections', 'articles', 'files'}.
+    """
+    max_files = max_files or Config.SITEMAP_MAX_FILES
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}"
+    site = domain_key(url)
+
+    pending = [{'loc': loc, 'lastmod': None} for loc in await limiter.sitemaps(url)]
+    pending = pending or [{'loc': origin + '/sitemap.xml', 'lastmod': None}]
+    seen, pages, files = set(), [], 0
+
+    while pending and files < max_files:
+        sitemap_url = pending.pop(0)['loc']
+        if sitemap_url in seen:
+            continue
+        seen.add(sitemap_url)
+        files += 1
+        for entry in await fetch_sitemap(sitemap_url, limiter):
+            if entry['kind'] == 'sitemap':
+                pending.append(entry)
+            elif domain_key(entry['loc']) == site:
+                pages.append(entry)
+        pending.sort(key=sitemap_priority)
+
+    sections = score_sections(pages)
+    return {
+        'news_url': sections[0][1] if sections else None,
+        'sections': sections,
+        'articles': recent_articles(pages),
+        'files': files,
+    }
+
+
+async def _scan(urls):
+    limiter = CrawlScheduler()
+    try:
+        results = await asyncio.gather(*(discover_news(url, limiter) for url in urls))
+    finally:
+        await limiter.aclose()
+
+    for url, found in zip(urls, results):
+        print(f"\n🗺️  {url} ({found['files']} sitemap files)")
+        print(f"    News: {found['news_url'] or 'Not found'}")
+        for score, section, count in found['sections'][:5]:
+            print(f"      {score:6.2f}  {section} ({count} articles)")
+        for lastmod, article, title in found['articles']:
+            day = time.strftime('%Y-%m-%d', time.gmtime(lastmod))
+            print(f"    {day}  {article}" + (f"  {title}" if title else ''))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find news sections and recent articles from sitemaps")
+    parser.add_argument('urls', nargs='+', help="Website URLs")
+    args = parser.parse_args(argv)
+    urls = [url if '://' in url else 'https://' + url for url in args.urls]
+    run_async(_scan(urls))
+
+
+if __name__ == '__main__':
+    main()
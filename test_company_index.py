@@ -0,0 +1,29 @@
+"""
+Tests for company_index.py: fuzzy name resolution
+"""
+
+from company_index import CompanyIndex
+
+NAMES = ['Bio-On', 'BASF SE', 'Novamont', 'Danimer Scientific', 'Roquette Frères']
+
+
+def test_resolves_suffixes_and_typos():
+    index = CompanyIndex.from_names(NAMES)
+    assert index.resolve('BASF') == 'BASF SE'
+    assert index.resolve('Bio-On S.p.A.') == 'Bio-On'
+    assert index.resolve('Novamount') == 'Novamont'
+    assert index.resolve('Roquete Freres') == 'Roquette Frères'
+    assert index.resolve('Scientific Danimer') == 'Danimer Scientific'
+
+
+def test_word_subset_does_not_match():
+    index = CompanyIndex.from_names(NAMES)
+    # Every word of 'Bio' is in 'Bio-On', but it is a different name
+    assert index.resolve('Bio') is None
+    assert index.resolve_many(['Bio', 'Bio On']) == [None, 'Bio-On']
+
+
+def test_trigram_fallback_rejects_word_subset():
+    index = CompanyIndex.from_names(NAMES)
+    assert index._best_dice('bio', index.candidates('bio')) is None
+    assert index._best_dice('danimer scientifics', index.candidates('danimer scientifics')) == 'Danimer Scientific'
@@ -0,0 +1,79 @@
+"""
+Tests for feed_poller.py: incremental parsing, conditional GETs and per-company statuses
+"""
+
+import asyncio
+
+import httpx
+
+import feed_poller
+from crawl_scheduler import CrawlScheduler
+from feed_poller import FeedParser, FeedStore, poll_feed, poll_feeds
+
+RSS = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Acme news</title>
+<item><title>Second plant opens</title><link>https://acme.example/news/2</link>
+  <pubDate>Tue, 14 Oct 2025 09:00:00 GMT</pubDate><guid>acme-2</guid></item>
+<item><title>First plant opens</title><link>https://acme.example/news/1</link>
+  <pubDate>Mon, 06 Oct 2025 09:00:00 GMT</pubDate><guid>acme-1</guid></item>
+</channel></rss>"""
+
+
+def test_feed_parser_handles_split_chunks():
+    parser = FeedParser()
+    entries = []
+    for start in range(0, len(RSS), 7):
+        entries.extend(parser.feed(RSS[start:start + 7]))
+    assert [entry['id'] for entry in entries] == ['acme-2', 'acme-1']
+    assert entries[0]['title'] == 'Second plant opens'
+    assert entries[0]['timestamp'] > entries[1]['timestamp']
+
+
+def test_poll_feed_conditional_get(tmp_path):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get('if-none-match') == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=RSS, headers={'etag': '"v1"'})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            with FeedStore(tmp_path / 'feeds.db') as store:
+                state = store.get('https://acme.example/feed', 'Acme')
+                first = await poll_feed(state, client=client)
+                second = await poll_feed(state, client=client)
+        return first, second
+
+    (status, entries), (status_again, entries_again) = asyncio.run(run())
+    assert status == 'new' and len(entries) == 2
+    assert status_again == 'not-modified' and entries_again == []
+    assert requests[1].headers['if-none-match'] == '"v1"'
+
+
+def test_poll_feeds_reports_failed_companies(tmp_path, monkeypatch):
+    limiters = []
+
+    async def fake_poll_feed(state, limiter=None, client=None):
+        limiters.append(limiter)
+        if 'broken' in state['url']:
+            state['failures'] += 1
+            state['next_poll'] = 2e9
+            return 'error', []
+        state['next_poll'] = 2e9
+        return 'unchanged', []
+
+    monkeypatch.setattr(feed_poller, 'poll_feed', fake_poll_feed)
+    feeds = {'Acme': 'https://acme.example/feed', 'Broken': 'https://broken.example/feed'}
+
+    with FeedStore(tmp_path / 'feeds.db') as store:
+        _, stats, statuses = asyncio.run(poll_feeds(feeds, store))
+        assert statuses == {'Acme': 'unchanged', 'Broken': 'error'}
+        assert stats['error'] == 1
+        assert all(isinstance(limiter, CrawlScheduler) for limiter in limiters)
+
+        # Not due on the next run: the feed that failed still counts as an error
+        _, stats, statuses = asyncio.run(poll_feeds(feeds, store))
+        assert statuses == {'Acme': 'skipped', 'Broken': 'error'}
+        assert stats['skipped'] == 2
@@ -0,0 +1,25 @@
+"""
+Tests for metrics.py: carrying a worker process's metrics over with snapshot() / merge()
+"""
+
+import pickle
+
+import metrics
+
+
+def test_merge_adds_worker_snapshot():
+    metrics.reset()
+    metrics.incr('http_requests', 2, host='acme.example')
+    metrics.observe('stage_seconds', 0.2, stage='homepage')
+    worker = pickle.loads(pickle.dumps(metrics.snapshot()))  # As returned from a worker process
+
+    metrics.reset()
+    metrics.incr('http_requests', 1, host='acme.example')
+    metrics.observe('stage_seconds', 3.0, stage='homepage')
+    metrics.merge(worker)
+    report = metrics.report()
+    metrics.reset()
+
+    assert [c['value'] for c in report['counters'] if c['name'] == 'http_requests'] == [3]
+    stage, = [h for h in report['histograms'] if h['name'] == 'stage_seconds']
+    assert stage['count'] == 2 and stage['min'] == 0.2 and stage['max'] == 3.0
@@ -0,0 +1,77 @@
+"""
+Tests for near_duplicates.py: MinHash hashing and Jaccard estimates
+"""
+
+import sqlite3
+
+import numpy as np
+
+import near_duplicates
+from near_duplicates import NUM_PERM, NearDuplicateIndex, minhash, shingles, similarity
+
+HEADLINE = ("Acme Bioplastics opens a new compounding plant in Rotterdam to triple its "
+            "output of compostable PLA films for food packaging customers across Europe")
+
+
+def exact_jaccard(text_a, text_b):
+    a, b = shingles(text_a), shingles(text_b)
+    return len(a & b) / len(a | b)
+
+
+def test_minhash_matches_exact_integer_arithmetic():
+    """The uint64 computation must not wrap around: compare with Python integers"""
+    text = HEADLINE
+    expected = [min((int(a) * x + int(b)) % near_duplicates._PRIME & near_duplicates._MAX_HASH
+                    for x in shingles(text))
+                for a, b in zip(near_duplicates._PERM_A, near_duplicates._PERM_B)]
+    assert minhash(text).tolist() == expected
+
+
+def test_hash_parameters_fit_in_64_bits():
+    largest = int(near_duplicates._PERM_A.max()) * near_duplicates._MAX_HASH + int(near_duplicates._PERM_B.max())
+    assert largest < 2 ** 64
+
+
+def test_estimated_jaccard_close_to_exact():
+    words = HEADLINE.split()
+    variants = [
+        HEADLINE,
+        ' '.join(words[:-3]),
+        ' '.join(words[:len(words) // 2] + ['announces', 'record', 'quarterly', 'results']),
+        ' '.join(reversed(words)),
+        "Unrelated story about a shipping company buying three container vessels",
+    ]
+    for text in variants:
+        exact = exact_jaccard(HEADLINE, text)
+        estimated = similarity(minhash(HEADLINE), minhash(text))
+        # Standard error of a 128-permutation estimate is at most 0.044
+        assert abs(estimated - exact) < 0.15, (text, exact, estimated)
+
+
+def test_signature_shape_and_empty_text():
+    signature = minhash(HEADLINE)
+    assert signature.dtype == np.uint32 and signature.shape == (NUM_PERM,)
+    assert minhash('') is None
+
+
+def test_index_finds_near_duplicate():
+    db = sqlite3.connect(':memory:')
+    index = NearDuplicateIndex(db, threshold=0.5)
+    index.add(1, HEADLINE, "The plant starts production next spring.")
+    match = index.find(HEADLINE.replace('triple', 'double'), "The plant starts production next spring.")
+    assert match is not None and match[0] == 1
+    assert index.find("Unrelated story about a shipping company", "") is None
+
+
+def test_old_signatures_are_rebuilt():
+    db = sqlite3.connect(':memory:')
+    db.execute("CREATE TABLE news (id INTEGER PRIMARY KEY, headline TEXT, summary TEXT)")
+    db.execute("INSERT INTO news VALUES (1, ?, '')", (HEADLINE,))
+    index = NearDuplicateIndex(db)
+    index.backfill()
+    db.execute("UPDATE news_signature_version SET version = 1")
+
+    index = NearDuplicateIndex(db)
+    assert db.execute("SELECT COUNT(*) FROM news_signatures").fetchone()[0] == 0
+    assert index.backfill() == 1
+    assert index.find(HEADLINE, '')[0] == 1
@@ -0,0 +1,34 @@
+"""
+Tests for news_store.py: re-importing an edited companies workbook
+"""
+
+import pandas as pd
+
+from news_store import NewsStore
+
+
+def test_reimport_keeps_discovered_urls(tmp_path):
+    workbook = tmp_path / 'companies.xlsx'
+    pd.DataFrame({'Company': ['Acme Bio', 'Beta Polymers'],
+                  'Webpage': ['acme.example', 'beta.example'],
+                  'RSS Feed URL': [None, 'https://beta.example/old-feed']}).to_excel(workbook, index=False)
+
+    with NewsStore(tmp_path / 'news.sqlite', import_workbooks=False) as store:
+        store.import_companies(workbook)
+        df = store.companies_frame()
+        df['RSS Feed URL'] = ['https://acme.example/feed', None]
+        df['News Section URL'] = ['https://acme.example/news', None]
+        store.save_companies(df)  # What a discovery run writes
+
+        # The workbook is edited (a new company) with the stale URL columns
+        pd.DataFrame({'Company': ['Acme Bio', 'Beta Polymers', 'Gamma Films'],
+                      'Webpage': ['acme.example', 'beta.example', 'gamma.example'],
+                      'RSS Feed URL': [None, 'https://beta.example/old-feed', None]}).to_excel(workbook, index=False)
+        store.import_companies(workbook)
+        rows = store.companies_frame().set_index('Company')
+
+    assert rows.loc['Acme Bio', 'RSS Feed URL'] == 'https://acme.example/feed'
+    assert rows.loc['Acme Bio', 'News Section URL'] == 'https://acme.example/news'
+    # Nothing discovered for Beta: the workbook's value fills the gap
+    assert rows.loc['Beta Polymers', 'RSS Feed URL'] == 'https://beta.example/old-feed'
+    assert 'Gamma Films' in rows.index
@@ -0,0 +1,134 @@
+"""
+Tests for news_stream.py against the local fake_perplexity server:
+SSE parsing, incremental item extraction and the end of the stream
+"""
+
+import functools
+import json
+
+import httpx
+import pytest
+
+import fake_perplexity
+import http_client
+import news_stream
+from config import Config
+from http_client import run_async
+from news_fetcher import build_news_query, build_payload, make_scheduler
+from news_stream import StreamingItemParser, iter_sse_events, stream_company_news, stream_completion
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    server, url = fake_perplexity.start_in_thread(chunk_size=24)
+    monkeypatch.setattr(Config, 'PERPLEXITY_API_URL', url)
+    monkeypatch.setattr(Config, 'PERPLEXITY_API_KEY', 'test-key')
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+async def _lines(lines):
+    for line in lines:
+        yield line
+
+
+async def _collect(agen):
+    return [item async for item in agen]
+
+
+def test_iter_sse_events():
+    lines = [': keep-alive', 'data: {"a": 1}', '', 'event: message', 'data: first', 'data: second', '',
+             '', 'data:[DONE]']
+    events = run_async(_collect(iter_sse_events(_lines(lines))))
+    assert events == ['{"a": 1}', 'first\nsecond', '[DONE]']
+
+
+def test_parser_handles_objects_split_across_chunks():
+    items = [{'headline': 'Brace { and "quote" inside', 'summary': 'Nested {"x": [1, 2]} text \\ slash'},
+             {'headline': 'Second', 'summary': ''}]
+    text = '```json\n' + json.dumps(items, indent=2) + '\n```'
+    parser = StreamingItemParser()
+    found = []
+    for ch in text:  # One character at a time: every object is split
+        found.extend(parser.feed(ch))
+    assert found == items
+    assert parser.buffer == ''  # Nothing kept once the objects closed
+
+
+def test_items_arrive_one_at_a_time(fake_api):
+    usage = {}
+    payload = build_payload(build_news_query('Acme Bio'))
+    deltas = run_async(_collect(stream_completion(payload, make_scheduler(), usage)))
+    assert len(deltas) > 10
+
+    parser = StreamingItemParser()
+    arrivals = []
+    for idx, delta in enumerate(deltas):
+        objects = parser.feed(delta)
+        assert len(objects) <= 1
+        arrivals.extend((idx, obj) for obj in objects)
+
+    items = [obj for _, obj in arrivals]
+    assert items == json.loads(''.join(deltas))
+    assert len(items) == 3
+    # Each item is available as soon as it closes, before the rest of the completion
+    assert arrivals[0][0] < arrivals[1][0] < arrivals[2][0]
+    assert arrivals[1][0] < len(deltas) - 1
+    assert usage['total_tokens'] > 0
+
+
+def test_stream_company_news(fake_api):
+    usage = {}
+    items = run_async(_collect(stream_company_news('Acme Bio', make_scheduler(), usage=usage)))
+    assert [item['headline'] for item in items] == [
+        item['headline'] for item in fake_perplexity.generate_items('Acme Bio')]
+    assert all(item['company'] == 'Acme Bio' for item in items)
+    assert usage['total_tokens'] > 0
+
+
+def test_stream_stops_at_done(monkeypatch):
+    chunk = {'choices': [{'delta': {'content': '[{"headline": "Only item"}]'}}]}
+    body = (f"data: {json.dumps(chunk)}\n\n"
+            f"data: {json.dumps({'usage': {'total_tokens': 7}, 'choices': []})}\n\n"
+            "data: [DONE]\n\n"
+            "data: not json, must not be read\n\n")
+    transport = httpx.MockTransport(lambda request: httpx.Response(
+        200, headers={'content-type': 'text/event-stream'}, content=body.encode('utf-8')))
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            monkeypatch.setattr(news_stream, 'astream', functools.partial(http_client.astream, client=client))
+            usage = {}
+            deltas = await _collect(stream_completion(build_payload('query'), make_scheduler(), usage))
+            return deltas, usage
+
+    deltas, usage = run_async(run())
+    assert deltas == ['[{"headline": "Only item"}]']
+    assert usage == {'total_tokens': 7}
+
+
+def test_pipeline_stores_items_as_they_arrive(fake_api, tmp_path, monkeypatch):
+    from news_store import NewsStore
+
+    finished = []
+    monkeypatch.setattr(news_stream, 'record_usage', lambda usage: finished.append(usage))
+    store = NewsStore(tmp_path / 'news.sqlite', import_workbooks=False)
+    stored_while = []
+    add_news = store.add_news
+
+    def tracking_add_news(items):
+        stored_while.append((len(items), len(finished)))
+        return add_news(items)
+
+    monkeypatch.setattr(store, 'add_news', tracking_add_news)
+    try:
+        items, recent, new_items, errors, _ = run_async(news_stream.stream_news_pipeline(
+            ['Acme Bio', 'Beta Polymers'], concurrency=2, store=store))
+        assert not errors and len(items) == len(recent) == 6
+        assert store.count_news() == len(new_items) == 6
+    finally:
+        store.close()
+    # One item at a time, the first one before any completion has finished
+    assert [count for count, _ in stored_while] == [1] * 6
+    assert stored_while[0][1] == 0
@@ -5,9 +5,10 @@ Tests basic connectivity and news search functionality
 """
 
 import json
-import requests
+import httpx
 from datetime import datetime, timedelta
 from config import Config
+from http_client import request
 
 def test_perplexity_connection():
     """Test basic connection to Perplexity API"""
@@ -49,7 +50,8 @@ def test_perplexity_connection():
         print(f"📡 Sending request to: {Config.PERPLEXITY_API_URL}")
         print(f"📝 Test query: {test_query}\n")
         
-        response = requests.post(
+        response = request(
+            'POST',
             Config.PERPLEXITY_API_URL,
             headers=headers,
             json=payload,
@@ -107,11 +109,11 @@ def test_perplexity_connection():
             print(f"   Response: {response.text}")
             return False
             
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         print("❌ Request timed out. Please check your internet connection.")
         return False
         
-    except requests.exceptions.ConnectionError:
+    except httpx.TransportError:
         print("❌ Could not connect to Perplexity API. Please check your internet connection.")
         return False
         
@@ -169,7 +171,8 @@ def test_company_news_search():
         print(f"🔍 Searching news for: {company}")
         print(f"📅 Time period: Last 7 days\n")
         
-        response = requests.post(
+        response = request(
+            'POST',
             Config.PERPLEXITY_API_URL,
             headers=headers,
             json=payload,
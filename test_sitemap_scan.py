@@ -0,0 +1,107 @@
+"""
+Tests for sitemap_scan.py: entry parsing and the incremental (gzip) sitemap parser
+"""
+
+import asyncio
+import gzip
+import xml.etree.ElementTree as ET
+
+import sitemap_scan
+from config import Config
+from crawl_scheduler import CrawlScheduler
+from sitemap_scan import SitemapParser, discover_news, parse_sitemap_entry
+
+URLSET = ('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+          'xmlns:image="http://www.google.com/schemas/sitemap-image/1.1" '
+          'xmlns:video="http://www.google.com/schemas/sitemap-video/1.1" '
+          'xmlns:news="http://www.google.com/schemas/sitemap-news/0.9">{}</urlset>')
+
+
+def parse_one(url_xml):
+    return parse_sitemap_entry(ET.fromstring(URLSET.format(url_xml))[0])
+
+
+def test_image_entry_keeps_page_loc():
+    entry = parse_one("""<url>
+        <loc>https://acme.example/news/new-plant</loc>
+        <lastmod>2025-10-14</lastmod>
+        <image:image>
+            <image:loc>https://cdn.acme.example/plant.jpg</image:loc>
+            <image:title>The new plant</image:title>
+        </image:image>
+        <video:video><video:content_loc>https://cdn.acme.example/tour.mp4</video:content_loc>
+            <video:loc>https://cdn.acme.example/tour</video:loc></video:video>
+    </url>""")
+    assert entry['loc'] == 'https://acme.example/news/new-plant'
+    assert entry['lastmod'] is not None
+    assert entry['title'] == '' and not entry['news']
+
+
+def test_news_entry_reads_publication_date_and_title():
+    entry = parse_one("""<url>
+        <loc>https://acme.example/2025/plant</loc>
+        <news:news>
+            <news:publication><news:name>Acme</news:name><news:language>en</news:language></news:publication>
+            <news:publication_date>2025-10-14T09:00:00+00:00</news:publication_date>
+            <news:title>Acme opens a new plant</news:title>
+        </news:news>
+    </url>""")
+    assert entry['loc'] == 'https://acme.example/2025/plant'
+    assert entry['news'] and entry['title'] == 'Acme opens a new plant'
+    assert entry['lastmod'] is not None
+
+
+def test_entry_without_namespace():
+    entry = parse_sitemap_entry(ET.fromstring('<url><loc>https://acme.example/press</loc></url>'))
+    assert entry['loc'] == 'https://acme.example/press'
+
+
+def sitemap_bytes(count):
+    urls = ''.join(f'<url><loc>https://acme.example/news/{idx}</loc></url>' for idx in range(count))
+    return URLSET.format(urls).encode('utf-8')
+
+
+def feed_in_chunks(parser, data, size):
+    entries = []
+    for start in range(0, len(data), size):
+        entries.extend(parser.feed(data[start:start + size]))
+        if parser.size >= Config.SITEMAP_MAX_BYTES:
+            break
+    return entries
+
+
+def test_gzip_sitemap_in_small_chunks():
+    data = sitemap_bytes(500)
+    entries = feed_in_chunks(SitemapParser(), gzip.compress(data), 64)
+    assert [entry['loc'] for entry in entries] == [f'https://acme.example/news/{idx}' for idx in range(500)]
+
+
+def test_gzip_sitemap_stops_at_size_limit(monkeypatch):
+    monkeypatch.setattr(Config, 'SITEMAP_MAX_BYTES', 20000)
+    data = sitemap_bytes(5000)
+    parser = SitemapParser()
+    # Highly compressible: every compressed chunk inflates to more than the limit
+    entries = feed_in_chunks(parser, gzip.compress(data), 4096)
+    assert parser.size == 20000
+    assert entries and len(entries) < 5000
+    assert [entry['loc'] for entry in entries] == [f'https://acme.example/news/{idx}'
+                                                    for idx in range(len(entries))]
+    assert parser.feed(b'more') == []
+
+
+def test_ignored_robots_falls_back_to_sitemap_xml(monkeypatch):
+    limiter = CrawlScheduler(respect_robots=False)
+    fetched = []
+
+    async def no_robots(origin):
+        raise AssertionError("robots.txt must not be read")
+
+    async def fake_fetch_sitemap(url, limiter):
+        fetched.append(url)
+        return []
+
+    monkeypatch.setattr(limiter, '_fetch_robots', no_robots)
+    monkeypatch.setattr(sitemap_scan, 'fetch_sitemap', fake_fetch_sitemap)
+    found = asyncio.run(discover_news('https://acme.example/', limiter))
+    assert fetched == ['https://acme.example/sitemap.xml']
+    assert found['files'] == 1 and found['news_url'] is None